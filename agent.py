@@ -12,19 +12,170 @@ Description:
 - Sets up structured logging.
 - Creates and validates a LangChain agent instance with proper
   error handling and logging for observability.
+- Reuses the compiled agent for the rest of the process as long as the
+  tool schemas it was built from are unchanged.
+- Wraps the agent in a FastPathRouter so unambiguous requests are answered
+  with a direct tool call instead of an LLM round trip.
+- Passes the system prompt selected by SYSTEM_PROMPT_VARIANT and bounds
+  the history sent with each model call (see context_budget.py).
+- Sends the expense tool calls of one model turn as a single add_expenses
+  call (see tool_batching.py).
+- Throttles, retries and coalesces model calls through one shared
+  limiter (see rate_limit.py).
+- Serves repeated read-only model calls from the on-disk LLM response cache
+  (see llm_cache.py) while the budget state version is unchanged.
+- Traces agent creation and every model and tool call when TRACING_ENABLED
+  is set (see tracing.py and agent_tracing.py).
+- Leaves the server's operator tools (server_stats) out of the agent.
 
 If agent creation fails, the error is logged with stack trace details
 and re-raised to ensure failure visibility.
 """
 
+import hashlib
+import json
+
 from langchain.agents import create_agent
 
+from agent_tracing import AgentTracingMiddleware
 from client import model
+from context_budget import ContextBudgetMiddleware
+from config import (
+    BUDGET_VERSION_URI,
+    CONTEXT_BUDGET_ENABLED,
+    CONTEXT_MAX_HISTORY_TOKENS,
+    CONTEXT_MAX_SUMMARY_TOKENS,
+    FAST_PATH_ENABLED,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_PATH,
+    LLM_BACKOFF_BASE_S,
+    LLM_BACKOFF_MAX_S,
+    LLM_CACHE_TTL_S,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_MIN_CONCURRENCY,
+    LLM_RATE_LIMIT_ENABLED,
+    LLM_REQUESTS_PER_MIN,
+    LLM_TARGET_LATENCY_S,
+    LLM_TIMEOUT_S,
+    LLM_TOKENS_PER_MIN,
+    SYSTEM_PROMPT_VARIANT,
+    TOOL_BATCH_WAIT_MS,
+    TOOL_BATCHING_ENABLED,
+    TRACING_ENABLED,
+)
+from fast_router import FastPathRouter
+from llm_cache import LLMCacheStore, LLMResponseCacheMiddleware
 from logger_config import setup_logger
+from prompts import SYSTEM_PROMPTS
+from rate_limit import ModelRateLimiter, ModelRateLimitMiddleware
+from run_config import BINDS_NODE_CONFIG, RunConfigMiddleware
+from tool_batching import BATCH_TOOL, ExpenseBatchMiddleware
+from tracing import setup_tracing, tracer
 
 
 logger = setup_logger(__name__)
 
+# Exports spans when TRACING_ENABLED is set (see tracing.py)
+setup_tracing("trip-budget-agent")
+
+# Compiled agents keyed on the MCP client and the fingerprint of its tools
+_agent_cache = {}
+
+llm_cache_store = (
+    LLMCacheStore(LLM_CACHE_PATH, ttl_s=LLM_CACHE_TTL_S, max_entries=LLM_CACHE_MAX_ENTRIES)
+    if LLM_CACHE_ENABLED else None
+)
+
+# One limiter for every model call in the process
+model_rate_limiter = (
+    ModelRateLimiter(
+        requests_per_min=LLM_REQUESTS_PER_MIN,
+        tokens_per_min=LLM_TOKENS_PER_MIN,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        min_concurrency=LLM_MIN_CONCURRENCY,
+        max_retries=LLM_MAX_RETRIES,
+        backoff_base_s=LLM_BACKOFF_BASE_S,
+        backoff_max_s=LLM_BACKOFF_MAX_S,
+        timeout_s=LLM_TIMEOUT_S,
+        target_latency_s=LLM_TARGET_LATENCY_S,
+    )
+    if LLM_RATE_LIMIT_ENABLED else None
+)
+
+
+def tools_key(tools) -> str:
+    """
+    Summary:
+        Fingerprint a list of LangChain tools by name, description and schema.
+
+    Args:
+        tools: Tools returned by an MCP client's get_tools().
+
+    Returns:
+        Hex digest that changes whenever a tool is added, removed or altered.
+    """
+    payload = [
+        (tool.name, tool.description, tool.args_schema if isinstance(tool.args_schema, dict) else tool.args)
+        for tool in tools
+    ]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _is_operator_tool(tool) -> bool:
+    """Whether the server marked the tool as an operator tool (_meta {"operator": true})."""
+    meta = (tool.metadata or {}).get("_meta") or {}
+    return bool(meta.get("operator"))
+
+
+def _build_middleware(mcp_client, tools, tools_hash):
+    """
+    Summary:
+        Build the agent middleware list for an MCP client and its tools.
+
+    The conversation history sent to the model is bounded by the context
+    budget. Expense calls of one model turn are merged into a single add_expenses
+    call when the server offers it. The LLM response cache needs the budget
+    state version, which is read as an MCP resource, so it is only enabled
+    for clients that can read resources through a warm session (the
+    MCPSessionManager). The rate limiter comes last so cache hits skip it.
+    Tracing comes first so its spans cover all of the above. On Python 3.10
+    RunConfigMiddleware hands the run's callbacks to the model calls, so
+    astream_events sees their tokens.
+
+    Args:
+        mcp_client: MCP client the tools were loaded from.
+        tools: LangChain MCP tools.
+        tools_hash: tools_key() of the tools.
+
+    Returns:
+        List of AgentMiddleware instances (possibly empty).
+    """
+    middleware = []
+    if not BINDS_NODE_CONFIG:
+        middleware.append(RunConfigMiddleware())
+    if TRACING_ENABLED:
+        middleware.append(AgentTracingMiddleware())
+    if CONTEXT_BUDGET_ENABLED:
+        middleware.append(ContextBudgetMiddleware(CONTEXT_MAX_HISTORY_TOKENS, CONTEXT_MAX_SUMMARY_TOKENS))
+    batch_tool = next((tool for tool in tools if tool.name == BATCH_TOOL), None)
+    if TOOL_BATCHING_ENABLED and batch_tool is not None:
+        middleware.append(ExpenseBatchMiddleware(batch_tool, wait_ms=TOOL_BATCH_WAIT_MS))
+
+    if llm_cache_store is not None and hasattr(mcp_client, "read_resource"):
+
+        async def budget_version():
+            return json.loads(await mcp_client.read_resource(BUDGET_VERSION_URI))["version"]
+
+        read_only_tools = [tool.name for tool in tools if (tool.metadata or {}).get("readOnlyHint")]
+        logger.info(f"LLM response cache enabled, read-only tools: {read_only_tools}")
+        middleware.append(LLMResponseCacheMiddleware(llm_cache_store, tools_hash, read_only_tools, budget_version))
+
+    if model_rate_limiter is not None:
+        middleware.append(ModelRateLimitMiddleware(model_rate_limiter))
+    return middleware
+
 
 async def create_budget_agent(mcp_client):
     """
@@ -32,11 +183,19 @@ async def create_budget_agent(mcp_client):
         Retrieves tools from the MCP server and creates a LangChain agent
         using Google Gemini model and the system prompt for trip budget calculations.
 
+        The compiled agent is cached per process and returned again while
+        the tool schemas are unchanged, so only the first call pays for graph
+        compilation. With the MCPSessionManager the tools themselves come
+        from its on-disk schema cache, so no server round trip is needed.
+        Tools the server marks as operator tools in their _meta are left out.
+
     Args:
-        mcp_client: FastMCP client instance used to fetch available budget tools.
+        mcp_client: MCP client used to fetch available budget tools; either the
+            MultiServerMCPClient or the MCPSessionManager that keeps warm sessions.
 
     Returns:
-        A fully initialized LangChain agent instance for trip budget calculations.
+        A fully initialized LangChain agent instance for trip budget calculations,
+        wrapped in a FastPathRouter (same ainvoke interface, plus stats()).
 
     Raises:
         Exception: If agent creation fails for any reason.
@@ -44,19 +203,47 @@ async def create_budget_agent(mcp_client):
 
 
     try:
-        logger.debug("Fetching tools from MCP client")
-        tools = await mcp_client.get_tools()
-        logger.info("Tools successfully retrieved from MCP client")
-        logger.debug(f"Retrieved tools: {tools}")
-
-        logger.info("Creating LangChain agent instance")
-        agent = create_agent(
-            model=model,
-            tools=tools
-        )
-
-        logger.info("LangChain agent created successfully")
-        return agent
+        with tracer.start_as_current_span("create_budget_agent") as span:
+            logger.debug("Fetching tools from MCP client")
+            # Operator tools (server_stats) are for monitoring, not for the model
+            tools = [tool for tool in await mcp_client.get_tools() if not _is_operator_tool(tool)]
+            logger.info("Tools successfully retrieved from MCP client")
+            logger.debug("Retrieved tools: %s", tools)
+
+            # The client is part of the key because the tools route calls through it
+            tools_hash = tools_key(tools)
+            key = (id(mcp_client), tools_hash)
+            agent = _agent_cache.get(key)
+            if agent is not None:
+                logger.info("Reusing compiled LangChain agent")
+                span.set_attribute("agent.reused", True)
+                return agent
+
+            if SYSTEM_PROMPT_VARIANT not in SYSTEM_PROMPTS:
+                raise ValueError(
+                    f"Unknown SYSTEM_PROMPT_VARIANT '{SYSTEM_PROMPT_VARIANT}'. "
+                    f"Valid options: {', '.join(SYSTEM_PROMPTS)}"
+                )
+
+            logger.info(f"Creating LangChain agent instance ({SYSTEM_PROMPT_VARIANT} system prompt)")
+            agent = FastPathRouter(
+                create_agent(
+                    model=model,
+                    tools=tools,
+                    system_prompt=SYSTEM_PROMPTS[SYSTEM_PROMPT_VARIANT],
+                    middleware=_build_middleware(mcp_client, tools, tools_hash)
+                ),
+                tools,
+                enabled=FAST_PATH_ENABLED
+            )
+            # Only the newest agent is kept, so a schema change does not leak the old one
+            _agent_cache.clear()
+            _agent_cache[key] = agent
+
+            span.set_attribute("agent.reused", False)
+            span.set_attribute("agent.tool_count", len(tools))
+            logger.info("LangChain agent created successfully")
+            return agent
 
     except Exception:
         logger.exception("Failed to create budget agent")
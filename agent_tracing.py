@@ -0,0 +1,64 @@
+"""
+Agent Tracing Module
+
+Summary:
+This module adds a tracing span around every model call and tool call the
+agent makes.
+
+Description:
+- AgentTracingMiddleware wraps every other agent middleware that does
+  work, so a model call span covers the context budget, the LLM response
+  cache and the rate limiter's waits and retries as well as the provider
+  call, and a tool call span covers the wait for its batch. On Python
+  < 3.11 RunConfigMiddleware (run_config.py) sits outside it; it only
+  binds the run's callbacks around the call and takes no measurable time.
+- Model call spans record the model, the number of messages sent, the
+  reported input and output tokens and whether the LLM cache answered.
+- Tool call spans record the tool name and call id and are marked as
+  errors when the tool returned one. The MCP round trip itself is a child
+  span created by the session manager (mcp_sessions.py), and the server's
+  spans are children of that.
+"""
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import ToolMessage
+from opentelemetry.trace import SpanKind, StatusCode
+
+from llm_cache import model_id
+from tracing import tracer
+
+
+class AgentTracingMiddleware(AgentMiddleware):
+    """
+    Summary:
+        Agent middleware that wraps every model call and tool call in a span.
+    """
+
+    async def awrap_model_call(self, request, handler):
+        model = getattr(request.model, "model", None) or type(request.model).__name__
+        with tracer.start_as_current_span(f"chat {model}", kind=SpanKind.CLIENT) as span:
+            span.set_attribute("gen_ai.request.model", model_id(request.model))
+            span.set_attribute("gen_ai.request.message_count", len(request.messages))
+            response = await handler(request)
+
+            result = getattr(response, "result", None) or [response]
+            message = result[-1]
+            usage = getattr(message, "usage_metadata", None) or {}
+            if usage:
+                span.set_attribute("gen_ai.usage.input_tokens", usage.get("input_tokens", 0))
+                span.set_attribute("gen_ai.usage.output_tokens", usage.get("output_tokens", 0))
+            span.set_attribute("gen_ai.response.tool_calls", len(getattr(message, "tool_calls", None) or []))
+            span.set_attribute(
+                "llm_cache.hit", (getattr(message, "response_metadata", None) or {}).get("llm_cache") == "hit"
+            )
+            return response
+
+    async def awrap_tool_call(self, request, handler):
+        name = request.tool_call["name"]
+        with tracer.start_as_current_span(f"execute_tool {name}") as span:
+            span.set_attribute("gen_ai.tool.name", name)
+            span.set_attribute("gen_ai.tool.call.id", request.tool_call.get("id") or "")
+            result = await handler(request)
+            if isinstance(result, ToolMessage) and result.status == "error":
+                span.set_status(StatusCode.ERROR, "tool returned an error")
+            return result
@@ -0,0 +1,186 @@
+"""
+Batch Query Runner Module
+
+Summary:
+This module runs many agent queries from a JSONL file concurrently.
+
+Description:
+- Streams queries from the input file line by line instead of loading it
+  all into memory.
+- Runs them through the agent with asyncio under a concurrency limit.
+- Appends one JSON result per query to the output file as soon as that
+  query finishes, so results are usable while the batch is still running.
+- Reports throughput, p50/p95/p99 latency and the error count at the end.
+
+Input lines are JSON objects; the query text is read from "query", "text"
+or "body" and the identifier from "id" or "request_id" (the line number is
+used otherwise). Each query runs under its own logging correlation ID,
+written to its result as "request_id". A line may also be a bare JSON string. Blank lines are
+skipped.
+"""
+
+import asyncio
+import json
+import math
+import time
+
+from langchain_core.messages import HumanMessage
+
+from fast_router import message_text
+from logger_config import correlation_scope, setup_logger
+
+logger = setup_logger(__name__)
+
+QUERY_FIELDS = ("query", "text", "body")
+ID_FIELDS = ("id", "request_id")
+
+
+def parse_batch_line(line: str, line_number: int):
+    """
+    Summary:
+        Extract the identifier and query text from one input line.
+
+    Args:
+        line: Raw JSONL line.
+        line_number: 1-based line number, used as the default identifier.
+
+    Returns:
+        (query_id, query) tuple.
+
+    Raises:
+        ValueError: If the line is not valid JSON or has no query text.
+    """
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e}") from e
+
+    if isinstance(record, str):
+        return line_number, record
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object or string")
+
+    query_id = next((record[field] for field in ID_FIELDS if field in record), line_number)
+    query = next((record[field] for field in QUERY_FIELDS if isinstance(record.get(field), str)), None)
+    if not query or not query.strip():
+        raise ValueError(f"no query text in any of {', '.join(QUERY_FIELDS)}")
+    return query_id, query
+
+
+def percentile(sorted_samples, pct: float):
+    """Return the nearest-rank percentile of an ascending list, or None if empty."""
+    if not sorted_samples:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+async def run_batch(agent, input_path: str, output_path: str, concurrency: int) -> dict:
+    """
+    Summary:
+        Run every query of a JSONL file through the agent concurrently.
+
+    Args:
+        agent: Agent (or FastPathRouter) exposing ainvoke().
+        input_path: JSONL file with one query per line.
+        output_path: JSONL file the results are written to.
+        concurrency: Maximum number of queries in flight.
+
+    Returns:
+        Dictionary with counts, wall time, throughput and latency percentiles.
+    """
+    concurrency = max(1, concurrency)
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    latencies = []
+    counts = {"completed": 0, "errors": 0}
+
+    with open(output_path, "w", encoding="utf-8") as output:
+
+        def write_result(record):
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                line_number, query_id, query, parse_error = item
+                record = {"id": query_id, "line": line_number, "query": query}
+                counts["completed"] += 1
+                if parse_error is not None:
+                    logger.warning(f"Skipping batch line {line_number}: {parse_error}")
+                    counts["errors"] += 1
+                    record.update(status="error", error=parse_error)
+                    write_result(record)
+                    continue
+
+                start = time.perf_counter()
+                with correlation_scope() as request_id:
+                    record["request_id"] = request_id
+                    try:
+                        result = await agent.ainvoke({"messages": [HumanMessage(content=query)]})
+                        record.update(status="success", response=message_text(result["messages"][-1]))
+                    except Exception as e:
+                        logger.exception(f"Batch query {query_id} failed")
+                        counts["errors"] += 1
+                        record.update(status="error", error=str(e))
+                latency_ms = (time.perf_counter() - start) * 1000
+                latencies.append(latency_ms)
+                record["latency_ms"] = round(latency_ms, 2)
+                write_result(record)
+
+        start = time.perf_counter()
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            with open(input_path, encoding="utf-8") as source:
+                for line_number, line in enumerate(source, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        query_id, query = parse_batch_line(line, line_number)
+                        await queue.put((line_number, query_id, query, None))
+                    except ValueError as e:
+                        await queue.put((line_number, line_number, line.strip(), str(e)))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            raise
+        elapsed_s = time.perf_counter() - start
+
+    latencies.sort()
+    summary = {
+        "queries": counts["completed"],
+        "errors": counts["errors"],
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed_s, 3),
+        "throughput_qps": round(counts["completed"] / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+    }
+    for pct in (50, 95, 99):
+        value = percentile(latencies, pct)
+        summary[f"p{pct}_ms"] = round(value, 2) if value is not None else None
+    logger.info(f"Batch finished: {summary}")
+    return summary
+
+
+def format_batch_summary(summary: dict) -> str:
+    """Render a run_batch() summary for the terminal."""
+
+    def ms(value):
+        return "n/a" if value is None else f"{value:,.1f}"
+
+    return "\n".join([
+        "=" * 50,
+        "BATCH SUMMARY:",
+        "=" * 50,
+        f"Queries:     {summary['queries']} ({summary['errors']} errors)",
+        f"Concurrency: {summary['concurrency']}",
+        f"Elapsed:     {summary['elapsed_s']:.2f} s",
+        f"Throughput:  {summary['throughput_qps']:.2f} queries/s",
+        f"Latency p50: {ms(summary['p50_ms'])} ms",
+        f"Latency p95: {ms(summary['p95_ms'])} ms",
+        f"Latency p99: {ms(summary['p99_ms'])} ms",
+    ])
@@ -0,0 +1,104 @@
+"""
+Agent Start-up Benchmark
+
+Summary:
+Measures how long create_budget_agent() takes to return a usable agent.
+
+Description:
+- Starts the real mcp_server.py over stdio against a throwaway database and
+  a throwaway tool cache directory.
+- "cold" has no tool cache: the server is spawned, its tools are listed and
+  the agent graph is compiled before create_budget_agent() returns.
+- "disk cache" is a fresh MCPSessionManager (as in a new process) that finds
+  the schemas on disk: the agent is compiled without waiting for the server,
+  which starts and refreshes the cache in the background.
+- "reused" calls create_budget_agent() again in the same process and gets
+  the already compiled agent back.
+
+No model call is made; a placeholder API key is enough.
+
+Usage:
+    python benchmarks/bench_agent_startup.py --runs 5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def make_client(db_path):
+    """Build a MultiServerMCPClient for the local server using this interpreter."""
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+    return MultiServerMCPClient(
+        {
+            "trip-budget": {
+                "command": sys.executable,
+                "args": [str(ROOT / "mcp_server.py")],
+                "transport": "stdio",
+                "cwd": str(ROOT),
+                "env": {**os.environ, "DB_PATH": db_path},
+            }
+        }
+    )
+
+
+async def time_agent(manager, agent_module, clear_agents=True):
+    """Return the create_budget_agent() latency for a manager in ms."""
+    if clear_agents:
+        agent_module._agent_cache.clear()
+    start = time.perf_counter()
+    await agent_module.create_budget_agent(manager)
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(args):
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    import agent
+    from mcp_sessions import MCPSessionManager
+    from tool_cache import ToolSchemaCache
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_agent_startup_")
+    client = make_client(os.path.join(tmp_dir, "trip_budget.db"))
+    cache = ToolSchemaCache(os.path.join(tmp_dir, "cache"))
+
+    results = {"cold": [], "disk cache": [], "reused": []}
+    for _ in range(args.runs):
+        cache.path_for("trip-budget").unlink(missing_ok=True)
+        manager = MCPSessionManager(client, "trip-budget", health_check_interval_s=0, tool_cache=cache)
+        try:
+            results["cold"].append(await time_agent(manager, agent))
+        finally:
+            await manager.close()
+
+        manager = MCPSessionManager(client, "trip-budget", health_check_interval_s=0, tool_cache=cache)
+        try:
+            results["disk cache"].append(await time_agent(manager, agent))
+            results["reused"].append(await time_agent(manager, agent, clear_agents=False))
+        finally:
+            await manager.close()
+
+    print(f"{'mode':>12} {'p50_ms':>10} {'mean_ms':>10}")
+    for label, samples in results.items():
+        print(f"{label:>12} {statistics.median(samples):>10.2f} {statistics.mean(samples):>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
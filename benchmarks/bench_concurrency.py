@@ -0,0 +1,88 @@
+"""
+Read-During-Write Concurrency Check
+
+Summary:
+Shows that the async MCP tools keep serving reads while a long write is
+pending.
+
+Description:
+- Runs against a throwaway database in a temporary directory, with the
+  response cache off so every call runs its queries.
+- Starts a write that holds the writer connection (and the SQLite write
+  lock) for --hold seconds, simulating a lock wait or a slow fsync.
+- While it is pending, repeatedly calls the total_budget and
+  get_expense_summary tools on the same event loop and records their latency.
+- Exits with status 1 if the reads did not complete while the write was
+  still in flight.
+
+Usage:
+    python benchmarks/bench_concurrency.py --hold 2 --interval 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def slow_write(mcp_server, database, hold_seconds):
+    """Insert an expense and keep the write transaction open for hold_seconds."""
+    with database.writer() as conn:
+        conn.execute(mcp_server.INSERT_EXPENSE_SQL, ("Hotel", 1000, "slow write", "2025-01-01T00:00:00"))
+        time.sleep(hold_seconds)
+
+
+async def run(args):
+    tmp_dir = tempfile.mkdtemp(prefix="bench_concurrency_")
+    os.environ["DB_PATH"] = os.path.join(tmp_dir, "trip_budget.db")
+    # Measure the queries themselves, not cached responses
+    os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+    logging.disable(logging.INFO)
+
+    import database
+    import mcp_server
+
+    await mcp_server.food_cost.fn(days=3, cost_per_day=500)
+
+    write_started = time.perf_counter()
+    write_task = asyncio.create_task(
+        database.run_blocking(slow_write, mcp_server, database, args.hold)
+    )
+
+    latencies = []
+    while not write_task.done():
+        start = time.perf_counter()
+        await mcp_server.total_budget.fn(include_items=False)
+        await mcp_server.get_expense_summary.fn(include_items=True)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(args.interval)
+
+    await write_task
+    write_ms = (time.perf_counter() - write_started) * 1000
+    database.close_pool()
+
+    latencies.sort()
+    print(f"write held for:         {write_ms:.1f} ms")
+    print(f"reads served meanwhile: {len(latencies)}")
+    if latencies:
+        print(f"read latency p50/max:   {latencies[len(latencies) // 2]:.3f} / {latencies[-1]:.3f} ms")
+
+    return 0 if len(latencies) > 1 and latencies[-1] < write_ms else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hold", type=float, default=2.0, help="Seconds to hold the write lock")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between reads")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
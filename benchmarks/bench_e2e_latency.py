@@ -0,0 +1,192 @@
+"""
+End-to-End Latency Breakdown Benchmark
+
+Summary:
+Runs real agent queries through create_budget_agent() and the real
+mcp_server.py, and reports where each query's time goes.
+
+Description:
+- Uses the offline scripted chat model (LLM_BACKEND=scripted), so no network
+  or API key is needed; --model-latency-ms simulates a remote model.
+- Disables the fast path and the LLM response cache so every query goes
+  through the agent loop and the model.
+- Starts mcp_server.py over stdio with MCP_REPORT_TIMINGS=1 against a
+  throwaway database; the server returns tool and SQLite timings in each
+  tool result's _meta.
+- Splits every query into:
+    model      time inside chat model calls
+    agent      agent graph overhead (total - model - tool wall time)
+    transport  client-observed tool time minus server tool time (MCP
+               serialization, stdio and session routing)
+    tool body  server tool time minus SQLite time
+    sqlite     time in database calls on the server's executor threads
+  transport, tool body and sqlite are summed over the query's tool calls.
+
+Usage:
+    python benchmarks/bench_e2e_latency.py --repeat 20 --model-latency-ms 0
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+QUERIES = {
+    "hotel": "Calculate hotel cost for 4 nights at 2000 rupees per night",
+    "transport": "Calculate transport cost for 300 km by train",
+    "three expenses": (
+        "Calculate food cost for 5 days at 500 rupees per day, hotel cost for 4 nights "
+        "at 2000 rupees per night and transport cost for 300 km by train"
+    ),
+    "total budget": "Show me the total trip budget summary",
+    "list expenses": "List my expenses",
+}
+
+COLUMNS = ("total", "model", "agent", "transport", "tool body", "sqlite")
+
+
+class ToolCallTimer:
+    """Tool interceptor recording client-side latency and the server's _meta timings."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, request, handler):
+        start = time.perf_counter()
+        result = await handler(request)
+        end = time.perf_counter()
+        timings = (getattr(result, "meta", None) or {}).get("timings", {})
+        self.calls.append({"start": start, "end": end, **timings})
+        return result
+
+
+def make_model_timer():
+    """Build a callback handler that sums the time spent in chat model calls."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class ModelTimer(BaseCallbackHandler):
+        run_inline = True
+
+        def __init__(self):
+            self.starts = {}
+            self.total_ms = 0.0
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self.starts[run_id] = time.perf_counter()
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            start = self.starts.pop(run_id, None)
+            if start is not None:
+                self.total_ms += (time.perf_counter() - start) * 1000
+
+    return ModelTimer()
+
+
+def union_ms(intervals):
+    """Total length in ms covered by possibly overlapping (start, end) intervals."""
+    total = 0.0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total * 1000
+
+
+async def run_query(agent, timer, query):
+    """Run one query and return its latency breakdown in ms."""
+    from langchain_core.messages import HumanMessage
+
+    model_timer = make_model_timer()
+    timer.calls.clear()
+    start = time.perf_counter()
+    await agent.ainvoke({"messages": [HumanMessage(content=query)]}, {"callbacks": [model_timer]})
+    total_ms = (time.perf_counter() - start) * 1000
+
+    calls = list(timer.calls)
+    client_ms = sum((call["end"] - call["start"]) * 1000 for call in calls)
+    tool_ms = sum(call.get("tool_ms", 0.0) for call in calls)
+    sqlite_ms = sum(call.get("sqlite_ms", 0.0) for call in calls)
+    tool_wall_ms = union_ms([(call["start"], call["end"]) for call in calls])
+    return {
+        "total": total_ms,
+        "model": model_timer.total_ms,
+        "agent": total_ms - model_timer.total_ms - tool_wall_ms,
+        "transport": client_ms - tool_ms,
+        "tool body": tool_ms - sqlite_ms,
+        "sqlite": sqlite_ms,
+        "tool calls": len(calls),
+    }
+
+
+async def run(args):
+    tmp_dir = tempfile.mkdtemp(prefix="bench_e2e_latency_")
+    os.environ["LLM_BACKEND"] = "scripted"
+    os.environ["SCRIPTED_MODEL_LATENCY_MS"] = str(args.model_latency_ms)
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+    import agent as agent_module
+    from mcp_sessions import MCPSessionManager
+
+    timer = ToolCallTimer()
+    client = MultiServerMCPClient(
+        {
+            "trip-budget": {
+                "command": sys.executable,
+                "args": [str(ROOT / "mcp_server.py")],
+                "transport": "stdio",
+                "cwd": str(ROOT),
+                "env": {
+                    **os.environ,
+                    "DB_PATH": os.path.join(tmp_dir, "trip_budget.db"),
+                    "MCP_REPORT_TIMINGS": "1",
+                },
+            }
+        },
+        tool_interceptors=[timer],
+    )
+
+    results = {label: [] for label in QUERIES}
+    async with MCPSessionManager(client, "trip-budget", health_check_interval_s=0) as manager:
+        agent = await agent_module.create_budget_agent(manager)
+        for label, query in QUERIES.items():
+            await run_query(agent, timer, query)
+        for _ in range(args.repeat):
+            for label, query in QUERIES.items():
+                results[label].append(await run_query(agent, timer, query))
+
+    print(f"mean ms per query ({args.repeat} runs, model latency {args.model_latency_ms} ms)")
+    print(f"{'query':>15} {'calls':>5} " + " ".join(f"{column:>10}" for column in COLUMNS))
+    for label, samples in results.items():
+        calls = samples[0]["tool calls"]
+        means = [statistics.mean(sample[column] for sample in samples) for column in COLUMNS]
+        print(f"{label:>15} {calls:>5} " + " ".join(f"{value:>10.2f}" for value in means))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--model-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
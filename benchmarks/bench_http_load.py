@@ -0,0 +1,160 @@
+"""
+Shared HTTP Server Load Test
+
+Summary:
+Starts one streamable-HTTP mcp_server.py and drives it with many concurrent
+agent sessions over localhost.
+
+Description:
+- Launches `python mcp_server.py --http` with --workers uvicorn workers
+  against a throwaway WAL-mode database.
+- Opens --agents independent MCP client sessions spread over --procs client
+  processes (so the load generator itself is not the bottleneck); each
+  session alternates expense inserts and budget summaries for --calls calls.
+- Reports throughput, p50/p95/p99 latency and errors, then checks that the
+  stored row count matches the inserts that succeeded.
+
+Usage:
+    python benchmarks/bench_http_load.py --workers 4 --agents 32 --procs 4 --calls 50
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    """Return a free localhost TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=60.0):
+    """Block until something accepts connections on port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Server did not start listening on port {port}")
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a sorted list."""
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+async def agent(url, calls, latencies, errors, inserted):
+    """One simulated agent: its own MCP session issuing calls back to back."""
+    from fastmcp import Client
+
+    async with Client(url) as client:
+        for i in range(calls):
+            if i % 2 == 0:
+                name, args = "food_cost", {"days": 2, "cost_per_day": 400}
+            else:
+                name, args = "get_expense_summary", {"include_items": False}
+            start = time.perf_counter()
+            try:
+                result = await client.call_tool(name, args)
+                if result.data.get("status") != "success":
+                    raise RuntimeError(result.data)
+                if name == "food_cost":
+                    inserted.append(1)
+            except Exception:
+                errors.append(name)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_agents(url, agents, calls):
+    latencies, errors, inserted = [], [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(agent(url, calls, latencies, errors, inserted) for _ in range(agents)))
+    return time.perf_counter() - start, latencies, errors, len(inserted)
+
+
+def client_process(job):
+    """Entry point of one load-generator process."""
+    url, agents, calls = job
+    logging.disable(logging.WARNING)
+    import fastmcp  # noqa: F401  (import before the clock starts)
+    return asyncio.run(run_agents(url, agents, calls))
+
+
+def run_load(url, agents, procs, calls):
+    """Spread the agents over procs processes and merge their results."""
+    procs = max(1, min(procs, agents))
+    jobs = [(url, agents // procs + (1 if i < agents % procs else 0), calls) for i in range(procs)]
+    with multiprocessing.get_context("spawn").Pool(procs) as pool:
+        results = pool.map(client_process, jobs)
+
+    # Throughput is measured over the slowest process's load phase
+    elapsed = max(result[0] for result in results)
+    latencies, errors, inserted = [], [], 0
+    for _, proc_latencies, proc_errors, proc_inserted in results:
+        latencies.extend(proc_latencies)
+        errors.extend(proc_errors)
+        inserted += proc_inserted
+    return elapsed, sorted(latencies), errors, inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--agents", type=int, default=32)
+    parser.add_argument("--procs", type=int, default=4, help="Load-generator processes")
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_http_load_"), "trip_budget.db")
+    port = free_port()
+    env = dict(
+        os.environ,
+        DB_PATH=db_path,
+        MCP_HTTP_PORT=str(port),
+        MCP_HTTP_WORKERS=str(args.workers),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "mcp_server.py", "--http"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}/mcp"
+        elapsed, latencies, errors, inserted = run_load(url, args.agents, args.procs, args.calls)
+    finally:
+        server.send_signal(signal.SIGINT)
+        server.wait(timeout=30)
+
+    stored = sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM trip_expenses").fetchone()[0]
+    total = len(latencies)
+    print(f"workers={args.workers} agents={args.agents} procs={args.procs} calls/agent={args.calls}")
+    print(f"throughput:   {total / elapsed:,.0f} calls/s ({total} calls in {elapsed:.2f} s)")
+    print(f"latency ms:   p50={percentile(latencies, 50):.2f} p95={percentile(latencies, 95):.2f} "
+          f"p99={percentile(latencies, 99):.2f}")
+    print(f"errors:       {len(errors)}")
+    print(f"rows stored:  {stored} (expected {inserted})")
+    sys.exit(0 if not errors and stored == inserted else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Logging Overhead Benchmark
+
+Summary:
+Measures how long a log call blocks the calling thread (the event loop in
+the agent and the MCP server) with direct handlers and with the
+queue-based handlers of logger_config.setup_logger.
+
+Description:
+- Each mode logs --records INFO records carrying a tool result sized like
+  a total_budget response, to the console (redirected to /dev/null) and to
+  a log file in a temporary directory.
+- Reports the mean and p99 time per call on the calling thread and, for
+  the queue mode, the time until the writer thread has written every
+  record.
+- Also times a disabled DEBUG call with an f-string against the same call
+  with %-style arguments, the difference lazy formatting saves on hot
+  paths.
+
+Usage:
+    python benchmarks/bench_logging.py --records 20000
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+PAYLOAD = {
+    "status": "success",
+    "items": [
+        {"id": i, "category": "Food", "amount": 500 * i, "description": f"Food for {i} days at ₹500/day"}
+        for i in range(50)
+    ],
+}
+
+
+def time_calls(logger, records):
+    """Log records INFO records and return the per-call times in microseconds."""
+    timings = []
+    for i in range(records):
+        start = time.perf_counter()
+        logger.info("Tool result %d: %s", i, PAYLOAD)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+
+    import logger_config
+    from batch_runner import percentile
+
+    log_dir = tempfile.mkdtemp(prefix="bench_logging_")
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for mode, use_queue in (("direct", False), ("queue", True)):
+            logger = logger_config.setup_logger(f"bench_{mode}", log_dir=log_dir, use_queue=use_queue)
+            logger.propagate = False
+            start = time.perf_counter()
+            timings = time_calls(logger, args.records)
+            caller_s = time.perf_counter() - start
+            # Drains the queue; a no-op for direct handlers
+            logger_config.shutdown_logging()
+            drained_s = time.perf_counter() - start
+            timings.sort()
+            results[mode] = (sum(timings) / len(timings), percentile(timings, 99), caller_s, drained_s)
+
+    print(f"{args.records} INFO records of {len(str(PAYLOAD))} chars to console and file")
+    print(f"{'handlers':>8} {'mean us':>8} {'p99 us':>8} {'caller s':>9} {'written s':>9}")
+    for mode, (mean, p99, caller_s, drained_s) in results.items():
+        print(f"{mode:>8} {mean:>8.1f} {p99:>8.1f} {caller_s:>9.2f} {drained_s:>9.2f}")
+
+    logger = logging.getLogger("bench_disabled")
+    logger.setLevel(logging.INFO)
+    for label, call in (
+        ("f-string", lambda: logger.debug(f"Retrieved tools: {PAYLOAD}")),
+        ("%-style", lambda: logger.debug("Retrieved tools: %s", PAYLOAD)),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.records):
+            call()
+        print(f"disabled DEBUG {label}: {(time.perf_counter() - start) / args.records * 1e6:.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+MCP Tool Call Latency Benchmark
+
+Summary:
+Compares tool call latency when every call opens a new MCP session against
+calls routed through MCPSessionManager's warm sessions.
+
+Description:
+- Starts the real mcp_server.py over stdio against a throwaway database.
+- "per-call" loads tools with MultiServerMCPClient.get_tools(), which spawns
+  a server subprocess and performs the MCP handshake for every call.
+- "persistent" loads the same tools through MCPSessionManager.
+- Calls hotel_cost and total_budget alternately and reports p50/mean latency.
+
+Usage:
+    python benchmarks/bench_mcp_sessions.py --calls 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def make_client(db_path):
+    """Build a MultiServerMCPClient for the local server using this interpreter."""
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+    return MultiServerMCPClient(
+        {
+            "trip-budget": {
+                "command": sys.executable,
+                "args": [str(ROOT / "mcp_server.py")],
+                "transport": "stdio",
+                "cwd": str(ROOT),
+                "env": {**os.environ, "DB_PATH": db_path},
+            }
+        }
+    )
+
+
+async def time_calls(tools, calls):
+    """Invoke the tools alternately and return per-call latencies in ms."""
+    by_name = {tool.name: tool for tool in tools}
+    samples = []
+    for i in range(calls):
+        if i % 2 == 0:
+            tool, args = by_name["hotel_cost"], {"nights": 2, "price_per_night": 1500}
+        else:
+            tool, args = by_name["total_budget"], {"include_items": False}
+        start = time.perf_counter()
+        await tool.ainvoke(args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def run(args):
+    from mcp_sessions import MCPSessionManager
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_mcp_sessions_"), "trip_budget.db")
+    client = make_client(db_path)
+
+    per_call = await time_calls(await client.get_tools(), args.calls)
+
+    manager = MCPSessionManager(client, "trip-budget", health_check_interval_s=0)
+    start = time.perf_counter()
+    async with manager:
+        warmup_ms = (time.perf_counter() - start) * 1000
+        persistent = await time_calls(await manager.get_tools(), args.calls)
+
+    print(f"{'mode':>12} {'p50_ms':>10} {'mean_ms':>10}")
+    for label, samples in (("per-call", per_call), ("persistent", persistent)):
+        print(f"{label:>12} {statistics.median(samples):>10.2f} {statistics.mean(samples):>10.2f}")
+    print(f"one-time session start-up: {warmup_ms:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
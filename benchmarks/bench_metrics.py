@@ -0,0 +1,124 @@
+"""
+Server Metrics Overhead Benchmark
+
+Summary:
+Measures what the server metrics (METRICS_ENABLED) add to a tool call.
+
+Description:
+- Calls the MCP server's tools through an in-memory FastMCP client, so
+  there is no transport cost and the metrics' share of the server's own
+  work is as large as it can be.
+- Each mode runs in a fresh subprocess (the middleware is installed at
+  import time) against a throwaway database, with the response cache off
+  so every read reaches SQLite.
+- Alternates a cheap tool (food_cost, one insert) and a summary read
+  (get_expense_summary without items) --calls times and reports the
+  p50/p95 latency per tool and the difference between the modes.
+- Also times one tool call's worth of recording (a counter increment and
+  a histogram observation) in isolation.
+
+Usage:
+    python benchmarks/bench_metrics.py --calls 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+CALLS = [
+    ("food_cost", {"days": 3, "cost_per_day": 400}),
+    ("get_expense_summary", {"include_items": False}),
+]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run_mode(args):
+    """Run the tool calls in this process and return the latency per tool."""
+    import logging
+    from fastmcp import Client
+
+    import mcp_server
+
+    logging.getLogger().setLevel(logging.WARNING)
+    timings = {name: [] for name, _ in CALLS}
+    async with Client(mcp_server.mcp) as client:
+        for _ in range(args.warmup):
+            for name, arguments in CALLS:
+                await client.call_tool(name, arguments)
+        for _ in range(args.calls):
+            for name, arguments in CALLS:
+                start = time.perf_counter()
+                await client.call_tool(name, arguments)
+                timings[name].append((time.perf_counter() - start) * 1000)
+    mcp_server.shutdown_storage()
+    return {name: {"p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95)}
+            for name, values in timings.items()}
+
+
+def time_recording(samples=200000) -> float:
+    """Return the cost of one counter increment plus one observation in microseconds."""
+    from metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "", ("tool", "status"))
+    latency = registry.histogram("latency_ms", "", ("tool",))
+    start = time.perf_counter()
+    for i in range(samples):
+        calls.inc("food_cost", "ok")
+        latency.observe(i % 97 + 0.5, "food_cost")
+    return (time.perf_counter() - start) / samples * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--mode", choices=("off", "on"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(asyncio.run(run_mode(args))))
+        return
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_metrics_")
+    results = {}
+    for mode in ("off", "on"):
+        env = {
+            **os.environ,
+            "METRICS_ENABLED": "true" if mode == "on" else "false",
+            "RESPONSE_CACHE_ENABLED": "false",
+            "DB_PATH": os.path.join(tmp_dir, f"trip_budget_{mode}.db"),
+        }
+        child = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, *sys.argv[1:]],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        results[mode] = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print(f"{args.calls} call(s) per tool, in-memory client")
+    print(f"{'tool':<22} {'off p50':>8} {'on p50':>8} {'off p95':>8} {'on p95':>8} {'p50 delta':>10}")
+    for name, _ in CALLS:
+        off, on = results["off"][name], results["on"][name]
+        print(
+            f"{name:<22} {off['p50_ms']:>8.3f} {on['p50_ms']:>8.3f} {off['p95_ms']:>8.3f} "
+            f"{on['p95_ms']:>8.3f} {(on['p50_ms'] - off['p50_ms']) * 1000:>8.0f} µs"
+        )
+    print(f"recording one tool call (inc + observe): {time_recording():.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
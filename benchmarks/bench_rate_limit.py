@@ -0,0 +1,176 @@
+"""
+Model Rate Limiting Benchmark
+
+Summary:
+Runs a burst of agent queries against a local fake model endpoint that
+injects 429s, 503s and latency, with and without the model rate limiter.
+
+Description:
+- Starts benchmarks/fake_llm_endpoint.py in process on a free port and
+  uses the "scripted-http" model backend, so every model call goes
+  through the endpoint's rate and concurrency limits.
+- Disables the fast path and the LLM response cache so every query makes
+  its model calls, and runs the real mcp_server.py against a throwaway
+  database.
+- Each mode runs in a fresh subprocess (the limiter is configured at
+  import time) and submits --queries queries --concurrency at a time.
+  The query mix repeats, so identical requests are in flight together
+  and can be coalesced.
+- Reports succeeded and failed queries, p50/p95 latency, the endpoint's
+  429/503 counts and the limiter's retry and coalescing counters.
+
+Usage:
+    python benchmarks/bench_rate_limit.py --queries 80 --concurrency 16 --rps 20 --max-concurrent 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+QUERIES = [
+    "Show me the total trip budget summary",
+    "Calculate hotel cost for 4 nights at 2000 rupees per night",
+    "List my expenses",
+    "Calculate transport cost for 300 km by train",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_mode(args):
+    """Run the burst in this process and return its summary."""
+    import uvicorn
+    from langchain_core.messages import HumanMessage
+
+    from fake_llm_endpoint import create_app
+
+    port = free_port()
+    app = create_app(args.rps, args.max_concurrent, args.latency_ms, args.jitter_ms, args.error_rate, seed=1)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    os.environ["SCRIPTED_MODEL_URL"] = f"http://127.0.0.1:{port}"
+
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+    import agent as agent_module
+    from batch_runner import percentile
+    from mcp_sessions import MCPSessionManager
+
+    client = MultiServerMCPClient({
+        "trip-budget": {
+            "command": sys.executable,
+            "args": [str(ROOT / "mcp_server.py")],
+            "transport": "stdio",
+            "cwd": str(ROOT),
+            "env": dict(os.environ),
+        }
+    })
+    session_manager = MCPSessionManager(client, "trip-budget", health_check_interval_s=0)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    errors = []
+
+    async def one(index, agent):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await agent.ainvoke({"messages": [HumanMessage(content=QUERIES[index % len(QUERIES)])]})
+                latencies.append((time.perf_counter() - start) * 1000)
+            except Exception as e:
+                errors.append(type(e).__name__)
+
+    try:
+        agent = await agent_module.create_budget_agent(session_manager)
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i, agent) for i in range(args.queries)))
+        elapsed_s = time.perf_counter() - start
+    finally:
+        await session_manager.close()
+        server.should_exit = True
+        await server_task
+
+    latencies.sort()
+    limiter = agent_module.model_rate_limiter
+    return {
+        "succeeded": len(latencies),
+        "failed": len(errors),
+        "elapsed_s": round(elapsed_s, 2),
+        "p50_ms": round(percentile(latencies, 50) or 0, 1),
+        "p95_ms": round(percentile(latencies, 95) or 0, 1),
+        "endpoint": dict(app.state.stats),
+        "limiter": limiter.stats() if limiter is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=80)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rps", type=float, default=20.0)
+    parser.add_argument("--max-concurrent", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--mode", choices=["on", "off"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        logging.disable(logging.WARNING)
+        print(json.dumps(asyncio.run(run_mode(args))))
+        return
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_rate_limit_")
+    results = {}
+    for mode in ("off", "on"):
+        env = {
+            **os.environ,
+            "LLM_BACKEND": "scripted-http",
+            "FAST_PATH_ENABLED": "false",
+            "LLM_CACHE_ENABLED": "false",
+            "LLM_RATE_LIMIT_ENABLED": "true" if mode == "on" else "false",
+            "LLM_BACKOFF_BASE_S": os.environ.get("LLM_BACKOFF_BASE_S", "0.05"),
+            "LLM_MAX_RETRIES": os.environ.get("LLM_MAX_RETRIES", "8"),
+            "DB_PATH": os.path.join(tmp_dir, f"trip_budget_{mode}.db"),
+        }
+        child = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, *sys.argv[1:]],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        results[mode] = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print(f"{args.queries} queries, {args.concurrency} at a time; endpoint {args.rps} req/s, "
+          f"{args.max_concurrent} concurrent, {args.latency_ms}±{args.jitter_ms} ms, {args.error_rate:.0%} 503s")
+    print(f"{'limiter':>8} {'ok':>5} {'failed':>6} {'elapsed s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'429s':>5} {'503s':>5} {'retries':>7} {'coalesced':>9}")
+    for mode, result in results.items():
+        endpoint = result["endpoint"]
+        limiter = result["limiter"] or {}
+        print(
+            f"{mode:>8} {result['succeeded']:>5} {result['failed']:>6} {result['elapsed_s']:>9.2f} "
+            f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+            f"{endpoint['rate_limited'] + endpoint['concurrency_limited']:>5} {endpoint['failed']:>5} "
+            f"{limiter.get('retries', '-'):>7} {limiter.get('coalesced', '-'):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
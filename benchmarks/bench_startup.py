@@ -0,0 +1,71 @@
+"""
+MCP Server Cold Start Benchmark
+
+Summary:
+Measures how long mcp_server takes to become ready and to answer its first
+tool call.
+
+Description:
+- Each run is a fresh subprocess, like a stdio server spawn.
+- Third-party imports (fastmcp) are timed separately so the numbers
+  isolate the server module's own start-up work.
+- Runs against a brand-new database and against an already initialized one.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD_SCRIPT = """
+import asyncio, logging, time
+logging.disable(logging.INFO)
+import fastmcp
+start = time.perf_counter()
+import mcp_server
+ready = time.perf_counter()
+asyncio.run(mcp_server.total_budget.fn(include_items=False))
+first_call = time.perf_counter()
+print((ready - start) * 1000, (first_call - ready) * 1000)
+"""
+
+
+def run_once(db_path):
+    """Spawn one server process and return (module_init_ms, first_call_ms)."""
+    env = dict(os.environ, DB_PATH=db_path)
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT],
+        env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[-2]), float(output[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_startup_")
+    print(f"{'database':>10} {'module_init_ms':>15} {'first_call_ms':>14}")
+
+    fresh = [run_once(os.path.join(tmp_dir, f"fresh_{i}.db")) for i in range(args.runs)]
+    existing_path = os.path.join(tmp_dir, "existing.db")
+    run_once(existing_path)
+    existing = [run_once(existing_path) for _ in range(args.runs)]
+
+    for label, samples in (("fresh", fresh), ("existing", existing)):
+        init_ms = statistics.median(sample[0] for sample in samples)
+        call_ms = statistics.median(sample[1] for sample in samples)
+        print(f"{label:>10} {init_ms:>15.2f} {call_ms:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
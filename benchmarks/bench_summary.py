@@ -0,0 +1,101 @@
+"""
+Budget Summary Benchmark
+
+Summary:
+Measures summary latency of the MCP server tools as the trip_expenses
+table grows.
+
+Description:
+- Runs against a throwaway database in a temporary directory, with the
+  response cache off so every call runs its queries.
+- Grows the table step by step using batched inserts.
+- Times subtotals-only summaries (read from the budget_totals rollup),
+  full summaries with item detail, and the previous approach of
+  aggregating every row in Python.
+
+Usage:
+    python benchmarks/bench_summary.py --sizes 1000 10000 100000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def python_aggregation(rows):
+    """The pre-SQL aggregation: group and sum every row in Python."""
+    categories = {}
+    total = 0
+    for category, amount, description in rows:
+        total += amount
+        categories.setdefault(category, {"items": [], "subtotal": 0})
+        categories[category]["items"].append({"amount": amount, "description": description})
+        categories[category]["subtotal"] += amount
+    return total, categories
+
+
+async def time_call(fn, repeat):
+    """Return the median latency of fn() in milliseconds, awaiting coroutines."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+async def run(args):
+    tmp_dir = tempfile.mkdtemp(prefix="bench_summary_")
+    os.environ["DB_PATH"] = os.path.join(tmp_dir, "trip_budget.db")
+    # Measure the queries themselves, not cached responses
+    os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+    logging.disable(logging.INFO)
+
+    import mcp_server
+
+    total_budget = mcp_server.total_budget.fn
+    get_expense_summary = mcp_server.get_expense_summary.fn
+    categories = ("Food", "Hotel", "Transport")
+    rng = random.Random(42)
+
+    print(f"{'rows':>10} {'subtotals_ms':>14} {'summary_ms':>12} {'with_items_ms':>14} {'python_agg_ms':>14}")
+    current = 0
+    for size in sorted(args.sizes):
+        rows = [
+            (rng.choice(categories), rng.randint(100, 5000), f"item {i}")
+            for i in range(current, size)
+        ]
+        for start in range(0, len(rows), 10_000):
+            mcp_server.insert_expenses(rows[start:start + 10_000])
+        current = size
+
+        subtotals = await time_call(lambda: get_expense_summary(include_items=False), args.repeat)
+        summary = await time_call(lambda: total_budget(include_items=False), args.repeat)
+        with_items = await time_call(lambda: get_expense_summary(include_items=True), max(1, args.repeat // 4))
+        python_agg = await time_call(
+            lambda: python_aggregation(mcp_server.fetch_all_expenses()), max(1, args.repeat // 4)
+        )
+        print(f"{size:>10} {subtotals:>14.3f} {summary:>12.3f} {with_items:>14.3f} {python_agg:>14.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Write-Behind Insert Throughput Benchmark
+
+Summary:
+Compares insert throughput of one-commit-per-call against the write-behind
+group-commit mode.
+
+Description:
+- Runs each mode in its own subprocess against a throwaway database,
+  because the mode is chosen when mcp_server is imported.
+- Inserts --count expenses one call at a time through insert_expense.
+- Includes the final flush in the write-behind timing and checks that a
+  read through total_budget sees every queued insert.
+
+Usage:
+    python benchmarks/bench_write_behind.py --count 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def run_child(count):
+    """Insert count expenses in the current mode and print 'seconds visible_rows'."""
+    logging.disable(logging.INFO)
+    import database
+    import mcp_server
+
+    start = time.perf_counter()
+    for i in range(count):
+        mcp_server.insert_expense("Food", 100 + i, f"item {i}")
+    mcp_server.flush_pending_writes()
+    elapsed = time.perf_counter() - start
+
+    summary = asyncio.run(mcp_server.get_expense_summary.fn(include_items=False))
+    visible = sum(category["count"] for category in summary["categories"].values())
+
+    if mcp_server.write_queue is not None:
+        mcp_server.write_queue.close()
+    database.close_pool()
+    print(f"{elapsed} {visible}")
+
+
+def run_mode(count, write_behind, extra_env):
+    """Run one mode in a subprocess and return (seconds, visible_rows)."""
+    tmp_dir = tempfile.mkdtemp(prefix="bench_write_behind_")
+    env = dict(os.environ, **extra_env)
+    env["DB_PATH"] = os.path.join(tmp_dir, "trip_budget.db")
+    env["DB_WRITE_BEHIND"] = "true" if write_behind else "false"
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", "--count", str(count)],
+        env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[-2]), int(output[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--synchronous", default="NORMAL", help="PRAGMA synchronous for both modes")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.count)
+        return
+
+    extra_env = {"DB_SYNCHRONOUS": args.synchronous}
+    print(f"{'mode':>14} {'inserts/s':>12} {'visible':>9}")
+    for label, write_behind in (("per-call", False), ("write-behind", True)):
+        seconds, visible = run_mode(args.count, write_behind, extra_env)
+        print(f"{label:>14} {args.count / seconds:>12,.0f} {visible:>9}")
+
+
+if __name__ == "__main__":
+    main()
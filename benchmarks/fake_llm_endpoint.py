@@ -0,0 +1,108 @@
+"""
+Fake Model Endpoint
+
+Summary:
+Local HTTP endpoint that behaves like a rate-limited model provider, for
+the "scripted-http" model backend (LLM_BACKEND=scripted-http).
+
+Description:
+- POST /v1/generate waits for a latency (with jitter) and answers 200.
+- Requests over the per-second rate get 429 with a Retry-After header;
+  requests over the concurrency limit get 429 without one.
+- A fraction of the accepted requests fail with 503 (--error-rate).
+- GET /stats returns the counts of accepted, rate-limited and failed
+  requests.
+
+Usage:
+    python benchmarks/fake_llm_endpoint.py --port 8765 --rps 20 --max-concurrent 4
+    LLM_BACKEND=scripted-http SCRIPTED_MODEL_URL=http://127.0.0.1:8765 python main.py
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def create_app(rps=20.0, max_concurrent=4, latency_ms=50.0, jitter_ms=20.0, error_rate=0.0, seed=None):
+    """
+    Summary:
+        Build the fake endpoint's ASGI app.
+
+    Args:
+        rps: Requests accepted per second (token bucket, burst of one second).
+        max_concurrent: Requests processed at the same time.
+        latency_ms: Mean response time of an accepted request.
+        jitter_ms: Uniform jitter added to or removed from latency_ms.
+        error_rate: Fraction of accepted requests answered with 503.
+        seed: Random seed for reproducible runs.
+
+    Returns:
+        Starlette app.
+    """
+    rng = random.Random(seed)
+    state = {"tokens": float(rps), "updated": time.monotonic(), "in_flight": 0}
+    stats = {"requests": 0, "ok": 0, "rate_limited": 0, "concurrency_limited": 0, "failed": 0}
+
+    async def generate(request):
+        stats["requests"] += 1
+        now = time.monotonic()
+        state["tokens"] = min(float(rps), state["tokens"] + (now - state["updated"]) * rps)
+        state["updated"] = now
+        if state["tokens"] < 1:
+            stats["rate_limited"] += 1
+            retry_after = (1 - state["tokens"]) / rps
+            return JSONResponse(
+                {"error": "rate limit exceeded"}, status_code=429, headers={"Retry-After": f"{retry_after:.3f}"}
+            )
+        if state["in_flight"] >= max_concurrent:
+            stats["concurrency_limited"] += 1
+            return JSONResponse({"error": "too many concurrent requests"}, status_code=429)
+
+        state["tokens"] -= 1
+        state["in_flight"] += 1
+        try:
+            await request.body()
+            await asyncio.sleep(max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000)
+            if rng.random() < error_rate:
+                stats["failed"] += 1
+                return JSONResponse({"error": "overloaded"}, status_code=503)
+            stats["ok"] += 1
+            return JSONResponse({"ok": True})
+        finally:
+            state["in_flight"] -= 1
+
+    async def get_stats(request):
+        return JSONResponse(stats)
+
+    app = Starlette(routes=[
+        Route("/v1/generate", generate, methods=["POST"]),
+        Route("/stats", get_stats, methods=["GET"]),
+    ])
+    app.state.stats = stats
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rps", type=float, default=20.0)
+    parser.add_argument("--max-concurrent", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = create_app(args.rps, args.max_concurrent, args.latency_ms, args.jitter_ms, args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Trace Report
+
+Summary:
+Splits the latency of every traced agent request into model time, MCP
+transport, tool body, SQLite and lock wait, from the spans exported with
+TRACING_ENABLED=true.
+
+Description:
+- Reads the JSON-lines span file written by tracing.py (TRACING_FILE).
+- For every "invoke_agent" root span, sums its model call spans, the MCP
+  transport (client tools/call and resources/read spans minus the matching
+  server span), the server's tool body outside the database, the database
+  spans and the writer lock / reader pool wait recorded on them.
+- "other" is the rest of the request: agent graph, middleware and batching
+  waits.
+
+Usage:
+    TRACING_ENABLED=true LLM_BACKEND=scripted python main.py
+    python benchmarks/trace_report.py logs/traces.jsonl
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from datetime import datetime
+
+
+def duration_ms(span) -> float:
+    start = datetime.fromisoformat(span["start_time"].replace("Z", "+00:00"))
+    end = datetime.fromisoformat(span["end_time"].replace("Z", "+00:00"))
+    return (end - start).total_seconds() * 1000
+
+
+def service(span) -> str:
+    return span["resource"]["attributes"].get("service.name", "")
+
+
+def breakdown(root, children):
+    """Return the latency split of one request's span tree."""
+    parts = defaultdict(float)
+    stack = [root]
+    while stack:
+        span = stack.pop()
+        name = span["name"]
+        kids = children.get(span["context"]["span_id"], [])
+        if name.startswith("chat "):
+            # The LLM cache's budget version reads happen inside the model call span
+            mcp = sum(duration_ms(kid) for kid in kids if kid["kind"] == "SpanKind.CLIENT")
+            parts["model"] += duration_ms(span) - mcp
+        elif span["kind"] == "SpanKind.CLIENT":
+            server = sum(duration_ms(kid) for kid in kids if kid["kind"] == "SpanKind.SERVER")
+            parts["mcp_transport"] += duration_ms(span) - server
+        elif span["kind"] == "SpanKind.SERVER":
+            parts["tool_body"] += duration_ms(span) - sum(duration_ms(kid) for kid in kids)
+        elif name.startswith("db "):
+            parts["sqlite"] += duration_ms(span)
+            attributes = span["attributes"]
+            parts["lock_wait"] += attributes.get("db.lock_wait_ms", 0) + attributes.get("db.pool_wait_ms", 0)
+        stack.extend(kids)
+    total = duration_ms(root)
+    parts["other"] = total - parts["model"] - parts["mcp_transport"] - parts["tool_body"] - parts["sqlite"]
+    return total, parts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", default="logs/traces.jsonl")
+    args = parser.parse_args()
+
+    with open(args.path, encoding="utf-8") as source:
+        spans = [json.loads(line) for line in source if line.strip()]
+    children = defaultdict(list)
+    for span in spans:
+        if span["parent_id"]:
+            children[span["parent_id"]].append(span)
+
+    roots = [span for span in spans if span["name"].startswith("invoke_agent") and not span["parent_id"]]
+    roots.sort(key=lambda span: span["start_time"])
+    columns = ("model", "mcp_transport", "tool_body", "sqlite", "lock_wait", "other")
+    print(f"{'trace':<34} {'total ms':>9} " + " ".join(f"{column:>13}" for column in columns))
+    for root in roots:
+        total, parts = breakdown(root, children)
+        print(f"{root['context']['trace_id']:<34} {total:>9.1f} "
+              + " ".join(f"{parts[column]:>13.1f}" for column in columns))
+    print(f"{len(roots)} request(s), {len(spans)} span(s) from {len({service(s) for s in spans})} service(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,60 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
+import os
+
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from mcp.client.stdio import get_default_environment
+
+from config import (
+    MCP_SERVER_URL,
+    MCP_SESSION_REUSE,
+    MCP_TOOL_CACHE_DIR,
+    MCP_TOOL_CACHE_ENABLED,
+    MCP_TRANSPORT,
+)
+from mcp_sessions import MCPSessionManager
+from models import create_chat_model
+from tool_cache import ToolSchemaCache
+
+# Prefixes of the config.py settings the stdio server process reads:
+# storage, response cache, metrics and timings, plus the logging and
+# tracing settings it must share with the agent
+SERVER_ENV_PREFIXES = ("DB_", "LIST_", "RESPONSE_CACHE_", "METRICS_", "MCP_REPORT_", "LOG_", "TRACING_")
 
-from cred import GEMINI_API_KEY
+# MCP_TRANSPORT=http connects to a shared server started with
+# `python mcp_server.py --http` instead of spawning a private one.
+if MCP_TRANSPORT == "http":
+    server_connection = {
+        "url": MCP_SERVER_URL,
+        "transport": "streamable_http"
+    }
+else:
+    server_connection = {
+        "command": "python",
+        "args": ["mcp_server.py"],
+        "transport": "stdio",
+        # Only a minimal environment is inherited; pass the server settings
+        # so DB_PATH, DB_STORAGE, ... apply to the server the agent starts
+        "env": {
+            **get_default_environment(),
+            **{name: value for name, value in os.environ.items() if name.startswith(SERVER_ENV_PREFIXES)},
+        },
+    }
 
 client = MultiServerMCPClient(
         {
-            "trip-budget": {
-                "command": "python",
-                "args": ["mcp_server.py"],
-                "transport": "stdio"
-            }
+            "trip-budget": server_connection
         }
     )
 
-model=ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash-lite",
-    api_key=GEMINI_API_KEY,
-)
\ No newline at end of file
+# Warm server sessions reused by every tool call for the process lifetime
+# Tool schemas are served from disk so building the agent needs no server round trip
+session_manager = MCPSessionManager(
+    client,
+    "trip-budget",
+    tool_cache=ToolSchemaCache(MCP_TOOL_CACHE_DIR) if MCP_TOOL_CACHE_ENABLED else None,
+)
+
+# What the agent loads its tools from
+tool_client = session_manager if MCP_SESSION_REUSE else client
+
+# Gemini by default; LLM_BACKEND=scripted runs offline (see models.py)
+model = create_chat_model()
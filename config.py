@@ -1,3 +1,159 @@
+import os
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Read a boolean flag from the environment ("1", "true", "yes", "on")."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 LLM_MODEL = "gemini-2.5-flash"
 TEMPERATURE = 0
-DB_PATH = "trip_budget.db"
+
+# Chat model backend (see models.py): "gemini", "scripted" (offline,
+# deterministic tool calls for CI and benchmarks) or "scripted-http"
+# (scripted, behind an HTTP endpoint)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
+# Simulated round-trip time of the scripted model
+SCRIPTED_MODEL_LATENCY_MS = float(os.getenv("SCRIPTED_MODEL_LATENCY_MS", "0"))
+# Endpoint called by the "scripted-http" backend before every response
+# (e.g. benchmarks/fake_llm_endpoint.py)
+SCRIPTED_MODEL_URL = os.getenv("SCRIPTED_MODEL_URL", "http://127.0.0.1:8765")
+
+# Model call limits shared by every agent in the process (see rate_limit.py).
+# 0 disables the per-minute buckets; set them to the provider quota.
+LLM_RATE_LIMIT_ENABLED = _env_flag("LLM_RATE_LIMIT_ENABLED", True)
+LLM_REQUESTS_PER_MIN = float(os.getenv("LLM_REQUESTS_PER_MIN", "0"))
+LLM_TOKENS_PER_MIN = float(os.getenv("LLM_TOKENS_PER_MIN", "0"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "0.5"))
+LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", "20"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "60"))
+LLM_TARGET_LATENCY_S = float(os.getenv("LLM_TARGET_LATENCY_S", "15"))
+
+# Answer simple, fully specified requests with a direct tool call instead of
+# the LLM (see fast_router.py)
+FAST_PATH_ENABLED = _env_flag("FAST_PATH_ENABLED", True)
+
+# On-disk cache of model responses (see llm_cache.py), keyed on the
+# normalized conversation, the tool schemas and the budget state version
+LLM_CACHE_ENABLED = _env_flag("LLM_CACHE_ENABLED", True)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.db")
+LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+# System prompt given to the agent: "full", "compact" or "none" (see prompts.py)
+SYSTEM_PROMPT_VARIANT = os.getenv("SYSTEM_PROMPT_VARIANT", "compact").lower()
+
+# Token budget for the conversation history sent with each model call; older
+# turns are replaced by a summary of at most CONTEXT_MAX_SUMMARY_TOKENS
+# (see context_budget.py)
+CONTEXT_BUDGET_ENABLED = _env_flag("CONTEXT_BUDGET_ENABLED", True)
+CONTEXT_MAX_HISTORY_TOKENS = int(os.getenv("CONTEXT_MAX_HISTORY_TOKENS", "2000"))
+CONTEXT_MAX_SUMMARY_TOKENS = int(os.getenv("CONTEXT_MAX_SUMMARY_TOKENS", "300"))
+
+# Send the food/hotel/transport calls of one model turn as a single
+# add_expenses call (see tool_batching.py); the first call waits at most
+# TOOL_BATCH_WAIT_MS for its siblings
+TOOL_BATCHING_ENABLED = _env_flag("TOOL_BATCHING_ENABLED", True)
+TOOL_BATCH_WAIT_MS = float(os.getenv("TOOL_BATCH_WAIT_MS", "50"))
+
+# Queries in flight at once in batch mode (python main.py --batch FILE.jsonl)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# MCP server transport: "stdio" (one private server per agent process) or
+# "http" (one shared streamable-HTTP server that many agents connect to)
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio").lower()
+MCP_HTTP_HOST = os.getenv("MCP_HTTP_HOST", "127.0.0.1")
+MCP_HTTP_PORT = int(os.getenv("MCP_HTTP_PORT", "8000"))
+MCP_HTTP_PATH = os.getenv("MCP_HTTP_PATH", "/mcp")
+MCP_HTTP_WORKERS = int(os.getenv("MCP_HTTP_WORKERS", "1"))
+# Stateless mode is always used with more than one worker, because a
+# stateful session cannot follow a client across worker processes.
+MCP_HTTP_STATELESS = _env_flag("MCP_HTTP_STATELESS", False)
+MCP_SERVER_URL = os.getenv(
+    "MCP_SERVER_URL", f"http://{MCP_HTTP_HOST}:{MCP_HTTP_PORT}{MCP_HTTP_PATH}"
+)
+
+# MCP client sessions (see mcp_sessions.py)
+# Set MCP_SESSION_REUSE to False to open a new server session per tool call.
+MCP_SESSION_REUSE = _env_flag("MCP_SESSION_REUSE", True)
+MCP_SESSION_POOL_SIZE = int(os.getenv("MCP_SESSION_POOL_SIZE", "1"))
+MCP_HEALTH_CHECK_INTERVAL_S = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL_S", "30"))
+MCP_HEALTH_CHECK_TIMEOUT_S = float(os.getenv("MCP_HEALTH_CHECK_TIMEOUT_S", "5"))
+# On-disk cache of the server's tool schemas (see tool_cache.py); only used
+# with MCP_SESSION_REUSE, whose warm sessions refresh it in the background.
+MCP_TOOL_CACHE_ENABLED = _env_flag("MCP_TOOL_CACHE_ENABLED", True)
+MCP_TOOL_CACHE_DIR = os.getenv("MCP_TOOL_CACHE_DIR", ".cache")
+DB_PATH = os.getenv("DB_PATH", "trip_budget.db")
+
+# Storage mode: "file" (DB_PATH on disk) or "memory" (in-memory database that
+# is loaded from DB_PATH at start-up and snapshotted back to it)
+DB_STORAGE = os.getenv("DB_STORAGE", "file").lower()
+DB_MEMORY_LOAD = _env_flag("DB_MEMORY_LOAD", True)
+DB_SNAPSHOT_INTERVAL_S = float(os.getenv("DB_SNAPSHOT_INTERVAL_S", "60"))
+
+# Database connection layer (see database.py)
+# Set DB_POOLING to False to fall back to one connection per operation.
+DB_POOLING = _env_flag("DB_POOLING", True)
+DB_READER_POOL_SIZE = int(os.getenv("DB_READER_POOL_SIZE", "4"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "8192"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "128"))
+# Threads that run blocking sqlite3 calls for the async MCP tools
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(DB_READER_POOL_SIZE + 1)))
+
+# Write-behind durability mode: inserts are queued and group-committed in the
+# background instead of committing before the tool returns.
+DB_WRITE_BEHIND = _env_flag("DB_WRITE_BEHIND", False)
+DB_WRITE_BEHIND_BATCH_SIZE = int(os.getenv("DB_WRITE_BEHIND_BATCH_SIZE", "500"))
+DB_WRITE_BEHIND_INTERVAL_MS = int(os.getenv("DB_WRITE_BEHIND_INTERVAL_MS", "50"))
+# Failed commits of the same queued writes before they are written one by one
+# and the ones that still fail are dropped (logged), so the queue keeps moving
+DB_WRITE_BEHIND_MAX_RETRIES = int(os.getenv("DB_WRITE_BEHIND_MAX_RETRIES", "5"))
+
+# Expense listing (list_expenses tool)
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "20"))
+LIST_MAX_PAGE_SIZE = int(os.getenv("LIST_MAX_PAGE_SIZE", "100"))
+
+# Response cache for read-only MCP tools (see response_cache.py)
+RESPONSE_CACHE_ENABLED = _env_flag("RESPONSE_CACHE_ENABLED", True)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+
+# MCP resource holding the budget state version (see llm_cache.py)
+BUDGET_VERSION_URI = "budget://state-version"
+
+# Attach per-call tool body and SQLite timings to MCP tool results (_meta)
+MCP_REPORT_TIMINGS = _env_flag("MCP_REPORT_TIMINGS", False)
+
+# Logging (see logger_config.py): write through a background queue listener
+# and rotate log files by "size", "time" or not at all ("none")
+LOG_QUEUE_ENABLED = _env_flag("LOG_QUEUE_ENABLED", True)
+LOG_ROTATION = os.getenv("LOG_ROTATION", "size").lower()
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "midnight")
+
+# "text" or "json" (one JSON object per record, with correlation IDs)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Per-logger DEBUG/INFO sampling, e.g. "mcp_server:INFO=0.1,*:DEBUG=0.01";
+# WARNING and above are always kept
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+
+# Tracing (see tracing.py): export OpenTelemetry spans of the agent and the
+# MCP server as JSON lines to TRACING_FILE ("file") or the console
+TRACING_ENABLED = _env_flag("TRACING_ENABLED", False)
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "logs/traces.jsonl")
+
+# Server metrics (see metrics.py): per-tool and per-database-function call
+# counts and latency percentiles, served by the server_stats tool and, over
+# HTTP, in the Prometheus text format at METRICS_PATH
+METRICS_ENABLED = _env_flag("METRICS_ENABLED", True)
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
@@ -0,0 +1,249 @@
+"""
+Context Budget Module
+
+Summary:
+This module keeps the input of every model call within a token budget so
+the per-turn cost and latency stay flat over long sessions.
+
+Description:
+- Estimates the token cost of the three parts of a model call: the system
+  prompt, the tool schemas and the conversation history.
+- ContextBudgetMiddleware keeps the newest conversation turns that fit in
+  CONTEXT_MAX_HISTORY_TOKENS and replaces the older ones with a rolling
+  summary appended to the system prompt. The current turn is always sent
+  in full, and a turn's tool calls are never separated from their results.
+- The summary is built from the dropped turns themselves (each user
+  request and the tool results it produced) rather than by another model
+  call, so it adds no latency and is identical for identical history. It
+  keeps the newest lines that fit in CONTEXT_MAX_SUMMARY_TOKENS.
+- bounded_history() drops the turns that can no longer reach the model, so
+  a long interactive session does not carry an ever-growing history
+  through the agent either.
+- Every model call logs the estimated input tokens per part, the number of
+  messages kept and the input tokens reported by the model.
+
+Token counts are estimated at 4 characters per token, the same rule the
+scripted model uses; the expenses themselves are in the database, so the
+summary only has to preserve conversational context.
+"""
+
+import json
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from fast_router import message_text
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+CHARS_PER_TOKEN = 4
+SUMMARY_HEADER = "## Earlier in this conversation"
+SUMMARY_LINE_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def message_tokens(message) -> int:
+    """Estimate the token count of a message, including its tool calls."""
+    tokens = estimate_tokens(message_text(message))
+    if isinstance(message, AIMessage) and message.tool_calls:
+        tokens += estimate_tokens(json.dumps([[c["name"], c["args"]] for c in message.tool_calls], default=str))
+    return tokens
+
+
+def tool_schema_tokens(tools) -> int:
+    """Estimate the token count of the tool schemas sent with every model call."""
+    return sum(
+        estimate_tokens(json.dumps(tool if isinstance(tool, dict) else convert_to_openai_tool(tool)))
+        for tool in tools
+    )
+
+
+def split_turns(messages):
+    """Split a conversation into turns, each starting at a user message."""
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _clip(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= SUMMARY_LINE_CHARS else text[:SUMMARY_LINE_CHARS - 1] + "…"
+
+
+def summarize_turn(turn) -> str:
+    """
+    Summary:
+        Reduce one conversation turn to a single summary line.
+
+    Args:
+        turn: Messages of the turn, starting with the user message.
+
+    Returns:
+        The user request followed by the outcome of each tool call, or by
+        the reply when no tool was called.
+    """
+    request = next((message_text(m) for m in turn if isinstance(m, HumanMessage)), "")
+    outcomes = []
+    for message in turn:
+        if not isinstance(message, ToolMessage):
+            continue
+        text = message_text(message)
+        try:
+            result = json.loads(text)
+        except ValueError:
+            result = None
+        if isinstance(result, dict) and result.get("details"):
+            outcomes.append(f"{message.name}: {result['details']} = ₹{result.get('amount')}")
+        elif isinstance(result, dict) and result.get("status") == "error":
+            outcomes.append(f"{message.name} failed: {result.get('message')}")
+        else:
+            outcomes.append(f"{message.name} called")
+    if not outcomes:
+        reply = next((message_text(m) for m in reversed(turn) if isinstance(m, AIMessage) and message_text(m)), "")
+        outcomes.append(f"replied: {reply}")
+    return _clip(f"- User: {request} → " + "; ".join(outcomes))
+
+
+def _plan(messages, max_history_tokens: int, max_summary_tokens: int):
+    """Split messages into the turns to summarize, their summary lines and the turns to keep."""
+    turns = split_turns(messages)
+    kept = [turns.pop()] if turns else []
+    used = sum(message_tokens(m) for m in kept[0]) if kept else 0
+    while turns:
+        cost = sum(message_tokens(m) for m in turns[-1])
+        if used + cost > max_history_tokens:
+            break
+        kept.insert(0, turns.pop())
+        used += cost
+
+    # Newest dropped turns first, as many as the summary budget allows
+    lines = []
+    used = estimate_tokens(SUMMARY_HEADER) + 1
+    for turn in reversed(turns):
+        line = summarize_turn(turn)
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_summary_tokens:
+            break
+        lines.insert(0, line)
+        used += cost
+    return turns, lines, kept
+
+
+def fit_history(messages, max_history_tokens: int, max_summary_tokens: int):
+    """
+    Summary:
+        Keep the newest turns that fit in the history budget and summarize
+        the turns before them.
+
+    Args:
+        messages: Conversation messages (without the system prompt).
+        max_history_tokens: Token budget for the messages that are kept.
+        max_summary_tokens: Token budget for the summary of the rest.
+
+    Returns:
+        (kept_messages, summary) tuple; summary is None when nothing was dropped.
+    """
+    dropped, lines, kept = _plan(messages, max_history_tokens, max_summary_tokens)
+    kept_messages = [message for turn in kept for message in turn]
+    if not dropped:
+        return kept_messages, None
+    return kept_messages, "\n".join([SUMMARY_HEADER, *lines])
+
+
+def bounded_history(messages, max_history_tokens: int, max_summary_tokens: int):
+    """
+    Summary:
+        Drop the turns that fit_history() would neither keep nor summarize.
+
+    Callers that carry a conversation across turns (interactive mode) use
+    this to keep their history bounded; the model input built from the
+    result is the same as from the full history.
+
+    Returns:
+        The newest messages that still affect the model input.
+    """
+    dropped, lines, kept = _plan(messages, max_history_tokens, max_summary_tokens)
+    turns = dropped[len(dropped) - len(lines):] + kept
+    return [message for turn in turns for message in turn]
+
+
+def _with_summary(system_message, summary: str) -> SystemMessage:
+    """Append the summary of older turns to the system message (str or content blocks)."""
+    if system_message is None:
+        return SystemMessage(content=summary)
+    content = system_message.content
+    if isinstance(content, str):
+        content = f"{content.rstrip()}\n\n{summary}" if content else summary
+    else:
+        # Content blocks: keep them as they are and add the summary as one more text block
+        content = [*content, {"type": "text", "text": summary}]
+    return SystemMessage(content=content)
+
+
+class ContextBudgetMiddleware(AgentMiddleware):
+    """
+    Summary:
+        Agent middleware that bounds the history sent to the model and logs
+        the input token cost of every call.
+
+    Args:
+        max_history_tokens: Token budget for the conversation history.
+        max_summary_tokens: Token budget for the summary of older turns.
+    """
+
+    def __init__(self, max_history_tokens: int = 2000, max_summary_tokens: int = 300):
+        super().__init__()
+        self.max_history_tokens = max_history_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self._tool_tokens = {}
+
+        self.calls = 0
+        self.trimmed_calls = 0
+
+    def _tools_tokens(self, tools) -> int:
+        key = tuple(tool["name"] if isinstance(tool, dict) else tool.name for tool in tools)
+        if key not in self._tool_tokens:
+            self._tool_tokens[key] = tool_schema_tokens(tools)
+        return self._tool_tokens[key]
+
+    async def awrap_model_call(self, request, handler):
+        received = len(request.messages)
+        messages, summary = fit_history(request.messages, self.max_history_tokens, self.max_summary_tokens)
+        if summary is not None:
+            request = request.override(
+                messages=messages, system_message=_with_summary(request.system_message, summary)
+            )
+            self.trimmed_calls += 1
+        self.calls += 1
+
+        system_tokens = estimate_tokens(message_text(request.system_message)) if request.system_message else 0
+        tools_tokens = self._tools_tokens(request.tools)
+        history_tokens = sum(message_tokens(m) for m in messages)
+        response = await handler(request)
+
+        result = getattr(response, "result", None) or [response]
+        usage = getattr(result[-1], "usage_metadata", None) or {}
+        logger.info(
+            "Model call input tokens: system=%d tools=%d history=%d estimated_total=%d reported=%s "
+            "(kept %d/%d messages%s)",
+            system_tokens, tools_tokens, history_tokens, system_tokens + tools_tokens + history_tokens,
+            usage.get("input_tokens"), len(messages), received,
+            ", older turns summarized" if summary is not None else "",
+        )
+        return response
+
+    def stats(self) -> dict:
+        """Return how many model calls were made and how many had their history trimmed."""
+        return {
+            "calls": self.calls,
+            "trimmed_calls": self.trimmed_calls
+        }
@@ -0,0 +1,678 @@
+"""
+SQLite Connection Layer Module
+
+Summary:
+This module provides the storage connection layer used by the MCP server.
+
+Description:
+- Keeps long-lived SQLite connections instead of opening one per operation.
+- Serves reads from a small pool of reader connections.
+- Serializes all writes through a single writer connection.
+- Enables WAL journal mode and applies tuned pragmas
+  (synchronous, busy_timeout, cache_size, temp_store).
+- Relies on the per-connection prepared statement cache of sqlite3,
+  which is only effective because connections are reused.
+
+Setting DB_POOLING to False in config.py falls back to opening and closing
+a fresh connection for every operation. Setting DB_STORAGE to "memory" keeps
+the whole database in memory, optionally loaded from and snapshotted back to
+DB_PATH with the sqlite3 backup API.
+
+The schema is created and upgraded lazily by migrations.ensure_schema()
+the first time get_pool() is called, not at import time.
+
+Async callers run database functions through run_blocking(), which hands
+them to a dedicated thread pool so sqlite3 I/O never blocks the event loop.
+When the sqlite_timings context variable holds a dict, run_blocking() adds
+the time spent in each call to it (used to attribute tool latency). Each
+run_blocking() call is also a tracing span named after the function, which
+records the time spent waiting for the writer lock or a pooled reader, and
+is counted and timed per function in the db_* metrics (METRICS_ENABLED).
+
+WriteBehindQueue implements the opt-in write-behind durability mode: writes
+are queued in process and group-committed by a background thread.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from opentelemetry import trace
+
+import migrations
+from config import (
+    DB_BUSY_TIMEOUT_MS,
+    DB_CACHE_SIZE_KB,
+    DB_EXECUTOR_WORKERS,
+    DB_MEMORY_LOAD,
+    DB_PATH,
+    DB_POOLING,
+    DB_READER_POOL_SIZE,
+    DB_SNAPSHOT_INTERVAL_S,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_STORAGE,
+    DB_SYNCHRONOUS,
+    DB_WRITE_BEHIND_BATCH_SIZE,
+    DB_WRITE_BEHIND_INTERVAL_MS,
+    DB_WRITE_BEHIND_MAX_RETRIES,
+    METRICS_ENABLED,
+)
+from metrics import registry
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Recorded by run_blocking() on the executor thread, so lock and pool waits count
+DB_CALLS = registry.counter("db_calls_total", "Database function calls by outcome", ("function", "status"))
+DB_LATENCY = registry.histogram("db_latency_ms", "Database function duration in milliseconds", ("function",))
+
+
+class ChangeWatcher:
+    """
+    Summary:
+        Cheap change token for the database, used to invalidate cached responses.
+
+    The token combines PRAGMA data_version, read on a dedicated connection that
+    never writes (so it changes whenever any other connection or process
+    commits), with an in-process write generation bumped after every commit.
+
+    Args:
+        db_path: Path to the SQLite database file, or None when every writer
+            lives in this process (the write generation alone is then exact).
+    """
+
+    def __init__(self, db_path):
+        self._conn = None
+        if db_path is not None:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def bump(self):
+        """Record that this process committed a write."""
+        with self._lock:
+            self._generation += 1
+
+    def token(self) -> tuple:
+        """Return a value that changes whenever the database content may have changed."""
+        with self._lock:
+            if self._conn is None:
+                return self._generation, 0
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            return self._generation, data_version
+
+    def close(self):
+        """Close the watcher connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ConnectionPool:
+    """
+    Summary:
+        Pool of long-lived SQLite connections with one serialized writer.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        reader_pool_size: Maximum number of reader connections.
+        busy_timeout_ms: How long a connection waits on a locked database.
+        synchronous: Value for PRAGMA synchronous (OFF, NORMAL, FULL).
+        cache_size_kb: Page cache size per connection in KiB.
+        statement_cache_size: Number of prepared statements cached per connection.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        reader_pool_size: int = DB_READER_POOL_SIZE,
+        busy_timeout_ms: int = DB_BUSY_TIMEOUT_MS,
+        synchronous: str = DB_SYNCHRONOUS,
+        cache_size_kb: int = DB_CACHE_SIZE_KB,
+        statement_cache_size: int = DB_STATEMENT_CACHE_SIZE,
+    ):
+        self.db_path = db_path
+        self.reader_pool_size = max(1, reader_pool_size)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.cache_size_kb = cache_size_kb
+        self.statement_cache_size = statement_cache_size
+
+        self._readers = queue.LifoQueue(maxsize=self.reader_pool_size)
+        self._reader_count = 0
+        self._pool_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._closed = False
+        self.watcher = ChangeWatcher(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection and apply the tuned pragmas."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _get_writer(self) -> sqlite3.Connection:
+        """Return the writer connection, opening it on first use."""
+        if self._writer is None:
+            self._writer = self._connect()
+            mode = self._writer.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            logger.info(f"Writer connection opened (journal_mode={mode})")
+        return self._writer
+
+    @contextmanager
+    def reader(self):
+        """
+        Summary:
+            Borrow a reader connection from the pool.
+
+        Yields:
+            sqlite3.Connection to run read-only queries on.
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._pool_lock:
+                if self._reader_count < self.reader_pool_size:
+                    conn = self._connect()
+                    self._reader_count += 1
+            if conn is None:
+                start = time.perf_counter()
+                conn = self._readers.get(timeout=self.busy_timeout_ms / 1000)
+                trace.get_current_span().set_attribute("db.pool_wait_ms", (time.perf_counter() - start) * 1000)
+
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    @contextmanager
+    def writer(self):
+        """
+        Summary:
+            Acquire the single writer connection inside a transaction.
+
+        The transaction is committed when the block exits normally and
+        rolled back if it raises.
+
+        Yields:
+            sqlite3.Connection to run write statements on.
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        start = time.perf_counter()
+        with self._write_lock:
+            # Recorded on the run_blocking() span of the calling function
+            trace.get_current_span().set_attribute("db.lock_wait_ms", (time.perf_counter() - start) * 1000)
+            conn = self._get_writer()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self.watcher.bump()
+
+    def close(self):
+        """Close every connection held by the pool."""
+        self._closed = True
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        self._reader_count = 0
+        self.watcher.close()
+        logger.info("Connection pool closed")
+
+
+class DirectConnections:
+    """
+    Summary:
+        Legacy strategy that opens a fresh connection for every operation.
+
+    Args:
+        db_path: Path to the SQLite database file.
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self.watcher = ChangeWatcher(db_path)
+
+    @contextmanager
+    def reader(self):
+        """Open a connection for a single read and close it afterwards."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def writer(self):
+        """Open a connection for a single write, commit and close it."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+            self.watcher.bump()
+
+    def close(self):
+        """Close the change watcher; data connections are closed after each operation."""
+        self.watcher.close()
+
+
+class MemoryConnections:
+    """
+    Summary:
+        In-memory database shared by reads and writes through one connection.
+
+    The database is optionally loaded from snapshot_path at start-up and
+    copied back to it with the sqlite3 backup API every snapshot_interval_s
+    seconds and on close. Operations on an in-memory database take
+    microseconds, so a single lock-protected connection is simpler and faster
+    than a shared-cache pool.
+
+    Args:
+        snapshot_path: On-disk database to load from and snapshot to, or None.
+        load: Load snapshot_path into memory at start-up if it exists.
+        snapshot_interval_s: Seconds between background snapshots (0 disables;
+            a final snapshot is still taken on close).
+    """
+
+    def __init__(
+        self,
+        snapshot_path=DB_PATH,
+        load: bool = DB_MEMORY_LOAD,
+        snapshot_interval_s: float = DB_SNAPSHOT_INTERVAL_S,
+    ):
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval_s = snapshot_interval_s
+
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._lock = threading.RLock()
+        self._closed = False
+        self._stop = threading.Event()
+        self.watcher = ChangeWatcher(None)
+
+        if load and snapshot_path and os.path.exists(snapshot_path):
+            source = sqlite3.connect(snapshot_path)
+            try:
+                source.backup(self._conn)
+            finally:
+                source.close()
+            logger.info(f"Loaded in-memory database from {snapshot_path}")
+
+        self._snapshot_thread = None
+        if snapshot_path and snapshot_interval_s > 0:
+            self._snapshot_thread = threading.Thread(
+                target=self._snapshot_loop, name="db-snapshot", daemon=True
+            )
+            self._snapshot_thread.start()
+
+    @contextmanager
+    def reader(self):
+        """Use the shared in-memory connection for a read."""
+        if self._closed:
+            raise RuntimeError("In-memory database is closed")
+        with self._lock:
+            try:
+                yield self._conn
+            finally:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+
+    @contextmanager
+    def writer(self):
+        """Use the shared in-memory connection inside a transaction."""
+        if self._closed:
+            raise RuntimeError("In-memory database is closed")
+        with self._lock:
+            try:
+                yield self._conn
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            finally:
+                self.watcher.bump()
+
+    def snapshot(self):
+        """Copy the in-memory database to snapshot_path with the backup API."""
+        if not self.snapshot_path:
+            return
+        target = sqlite3.connect(self.snapshot_path)
+        try:
+            with self._lock:
+                self._conn.backup(target)
+        finally:
+            target.close()
+        logger.debug("Snapshot written to %s", self.snapshot_path)
+
+    def _snapshot_loop(self):
+        """Background loop taking a snapshot every snapshot_interval_s seconds."""
+        while not self._stop.wait(self.snapshot_interval_s):
+            try:
+                self.snapshot()
+            except Exception:
+                logger.exception("Periodic snapshot failed")
+
+    def close(self):
+        """Stop the snapshot thread, write a final snapshot and close the database."""
+        if self._closed:
+            return
+        self._stop.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        try:
+            self.snapshot()
+        finally:
+            self._closed = True
+            with self._lock:
+                self._conn.close()
+            self.watcher.close()
+        logger.info("In-memory database closed")
+
+
+class WriteBehindQueue:
+    """
+    Summary:
+        In-process write queue flushed by a background thread in group commits.
+
+    Items are flushed when batch_size of them are pending or when the oldest
+    has waited flush_interval_ms, whichever comes first. Callers that need to
+    see queued writes call flush(), which commits everything pending before
+    returning.
+
+    A batch that fails is put back and retried. After max_retries failed
+    attempts in a row its items are committed one at a time and the ones
+    that still fail are logged and dropped, so a single bad write cannot
+    block the queue (and every read that flushes it) forever.
+
+    Args:
+        flush_func: Called with a list of queued items; must write them all
+            in one transaction.
+        batch_size: Pending item count that triggers an immediate flush.
+        flush_interval_ms: Maximum time an item waits before being flushed.
+        max_retries: Failed attempts before a batch is split and its
+            failing items dropped.
+    """
+
+    def __init__(
+        self,
+        flush_func,
+        batch_size: int = DB_WRITE_BEHIND_BATCH_SIZE,
+        flush_interval_ms: int = DB_WRITE_BEHIND_INTERVAL_MS,
+        max_retries: int = DB_WRITE_BEHIND_MAX_RETRIES,
+    ):
+        self.flush_func = flush_func
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_retries = max(1, max_retries)
+        self.dropped = 0
+        self._failures = 0
+
+        self._pending = []
+        self._oldest = None
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="db-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, item):
+        """Queue one item for the next group commit."""
+        self.put_many([item])
+
+    def put_many(self, items):
+        """Queue several items, preserving their order."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            was_empty = not self._pending
+            if was_empty:
+                self._oldest = time.monotonic()
+            self._pending.extend(items)
+            # The idle thread waits without a timeout, so wake it to start the interval
+            if was_empty or len(self._pending) >= self.batch_size:
+                self._condition.notify()
+
+    def pending_count(self) -> int:
+        """Number of queued items not yet committed."""
+        with self._condition:
+            return len(self._pending)
+
+    def flush(self):
+        """Commit every queued item before returning."""
+        # Holding the flush lock while taking the batch keeps commits in queue order.
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+                self._oldest = None
+            if not batch:
+                return
+            try:
+                self.flush_func(batch)
+            except Exception:
+                self._failures += 1
+                if self._failures < self.max_retries:
+                    # Put the batch back in front so nothing is lost; the next flush retries it.
+                    with self._condition:
+                        self._pending[:0] = batch
+                        self._oldest = time.monotonic()
+                    raise
+                logger.exception(
+                    "Group commit of %d queued writes failed %d times; writing them one by one",
+                    len(batch), self._failures
+                )
+                self._failures = 0
+                self._flush_each(batch)
+                return
+            self._failures = 0
+            logger.debug("Group-committed %d queued writes", len(batch))
+
+    def _flush_each(self, batch):
+        """Commit the items one at a time, dropping (and logging) the ones that fail."""
+        for item in batch:
+            try:
+                self.flush_func([item])
+            except Exception:
+                self.dropped += 1
+                logger.exception("Dropped queued write %r", item)
+
+    def _run(self):
+        """Background loop flushing on the size or time threshold."""
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if len(self._pending) >= self.batch_size:
+                        break
+                    if self._pending:
+                        remaining = self._oldest + self.flush_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    else:
+                        self._condition.wait()
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Write-behind flush failed; will retry")
+                time.sleep(self.flush_interval)
+
+    def close(self):
+        """Stop the background thread and flush whatever is still queued."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self.flush()
+        logger.info("Write-behind queue flushed and closed")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_executor = None
+
+
+def get_pool():
+    """
+    Summary:
+        Return the process-wide connection strategy, creating it on first use.
+
+    The first call also applies any pending schema migrations.
+
+    Returns:
+        MemoryConnections when DB_STORAGE is "memory", otherwise
+        ConnectionPool when DB_POOLING is enabled and DirectConnections if not.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if DB_STORAGE == "memory":
+                    pool = MemoryConnections()
+                elif DB_POOLING:
+                    pool = ConnectionPool()
+                else:
+                    pool = DirectConnections()
+                migrations.ensure_schema(pool)
+                _pool = pool
+                logger.info(f"Database connection strategy: {type(_pool).__name__}")
+    return _pool
+
+
+def reader():
+    """Shortcut for get_pool().reader()."""
+    return get_pool().reader()
+
+
+def writer():
+    """Shortcut for get_pool().writer()."""
+    return get_pool().writer()
+
+
+def change_token() -> tuple:
+    """Shortcut for get_pool().watcher.token()."""
+    return get_pool().watcher.token()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the thread pool dedicated to database work, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _pool_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=DB_EXECUTOR_WORKERS,
+                    thread_name_prefix="db"
+                )
+    return _executor
+
+
+# Per-tool-call accumulator ({"sqlite_ms": float, "sqlite_calls": int}) set by
+# the MCP server's timing middleware; None when timings are not collected
+sqlite_timings = contextvars.ContextVar("sqlite_timings", default=None)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Summary:
+        Run a blocking database function on the database executor.
+
+    Args:
+        func: Synchronous function to call.
+        *args: Positional arguments for func.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        The return value of func.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    timings = sqlite_timings.get()
+    if timings is not None:
+        call = functools.partial(_timed_call, call, timings)
+    if METRICS_ENABLED:
+        call = functools.partial(_measured_call, call, getattr(func, "__name__", "call"))
+    with tracer.start_as_current_span(f"db {getattr(func, '__name__', 'call')}") as span:
+        span.set_attribute("db.system", "sqlite")
+        # run_in_executor does not carry context variables to the worker thread;
+        # running the call in a copy keeps log correlation IDs and this span
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(get_executor(), functools.partial(context.run, call))
+
+
+def _timed_call(call, timings):
+    """Run call and add its duration to a sqlite_timings dict."""
+    start = time.perf_counter()
+    try:
+        return call()
+    finally:
+        timings["sqlite_ms"] += (time.perf_counter() - start) * 1000
+        timings["sqlite_calls"] += 1
+
+
+def _measured_call(call, name):
+    """Run call and record its outcome and duration in the db_* metrics."""
+    start = time.perf_counter()
+    status = "error"
+    try:
+        result = call()
+        status = "ok"
+        return result
+    finally:
+        DB_CALLS.inc(name, status)
+        DB_LATENCY.observe((time.perf_counter() - start) * 1000, name)
+
+
+def close_pool():
+    """Shut down the database executor and close the connection strategy."""
+    global _pool, _executor
+    with _pool_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,356 @@
+"""
+Fast-Path Router Module
+
+Summary:
+This module answers simple, fully specified budget requests by calling the
+matching MCP tool directly instead of going through the LLM agent.
+
+Description:
+- Recognises a small set of unambiguous phrasings, e.g.
+  "Calculate hotel cost for 4 nights at 2000 rupees per night",
+  "Calculate transport cost for 300 km by train" and
+  "Show me the total trip budget summary".
+- A request is routed only when the latest message is from the user and
+  matches one pattern as a whole; such a request is fully specified, so
+  earlier turns cannot change its meaning. Anything else (extra words,
+  several expenses, tool errors) falls back to the agent.
+- Routed results have the same shape as an agent result (the input
+  messages followed by a tool call, its ToolMessage and a final
+  AIMessage), and astream_events() emits the matching tool and model
+  events, so callers do not need to know which path answered.
+- Counts route hits and fallbacks and the time spent on each path, so the
+  hit rate and the latency saved can be reported.
+
+clear_all_expenses is deliberately never fast-pathed; destructive requests
+always go through the agent.
+"""
+
+import json
+import re
+import time
+import uuid
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+
+from logger_config import correlation_scope, request_id_var, setup_logger
+from tracing import AGENT_SPAN, tracer
+
+logger = setup_logger(__name__)
+
+
+_ACTION = r"(?:please )?(?:calculate|compute|add|what is|what's)?\s*(?:the |my )?"
+_AMOUNT = r"(?:₹|rs\.? ?|inr )?([1-9]\d*) ?(?:rupees|rs\.?|inr)?"
+_PER = r"(?: per | a |/ ?)"
+
+ROUTES = [
+    (
+        "hotel_cost",
+        re.compile(rf"{_ACTION}hotel (?:cost|expense)s? for ([1-9]\d*) nights? at {_AMOUNT}{_PER}night"),
+        lambda m: {"nights": int(m.group(1)), "price_per_night": int(m.group(2))},
+    ),
+    (
+        "food_cost",
+        re.compile(rf"{_ACTION}food (?:cost|expense)s? for ([1-9]\d*) days? at {_AMOUNT}{_PER}day"),
+        lambda m: {"days": int(m.group(1)), "cost_per_day": int(m.group(2))},
+    ),
+    (
+        "transport_cost",
+        re.compile(
+            rf"{_ACTION}(?:transport|travel) (?:cost|expense)s? for ([1-9]\d*) ?(?:km|kms|kilometers?) "
+            r"(?:by|via|on a|on|in a) (bus|train|cab|flight)"
+        ),
+        lambda m: {"distance_km": int(m.group(1)), "transport_type": m.group(2)},
+    ),
+    (
+        "total_budget",
+        re.compile(
+            r"(?:please )?(?:show|get|display|give)(?: me)? (?:the |my )?total (?:trip )?budget(?: summary)?"
+            r"|(?:what is|what's) (?:the |my )?total (?:trip )?budget"
+        ),
+        lambda m: {},
+    ),
+]
+
+
+def normalize_query(text: str) -> str:
+    """Lower-case a query, collapse whitespace and drop trailing punctuation and digit separators."""
+    text = " ".join(text.lower().split())
+    text = re.sub(r"(?<=\d),(?=\d{3})", "", text)
+    return text.rstrip(" .!?")
+
+
+def match_route(text: str):
+    """
+    Summary:
+        Find the tool call that a query unambiguously asks for.
+
+    Args:
+        text: Raw user query.
+
+    Returns:
+        (tool_name, args) tuple, or None when the query needs the agent.
+    """
+    query = normalize_query(text)
+    for tool_name, pattern, build_args in ROUTES:
+        match = pattern.fullmatch(query)
+        if match:
+            return tool_name, build_args(match)
+    return None
+
+
+def format_tool_reply(tool_name: str, content: str):
+    """
+    Summary:
+        Turn a tool's output into the reply the agent would give.
+
+    Args:
+        tool_name: Name of the tool that was called.
+        content: Text content of its ToolMessage.
+
+    Returns:
+        Reply text, or None when the output is an error the agent should
+        handle or not a single calculated expense.
+    """
+    if tool_name == "total_budget":
+        return None if content.startswith("Error:") else content.strip()
+
+    try:
+        result = json.loads(content)
+    except ValueError:
+        return None
+    if not isinstance(result, dict) or result.get("status") != "success":
+        return None
+    if not {"category", "amount", "details"} <= result.keys():
+        return None
+    return (
+        f"I've calculated your {result['category'].lower()} cost:\n"
+        f"- {result['details']} = ₹{result['amount']:,}\n"
+        "This has been added to your trip budget."
+    )
+
+
+def message_text(message) -> str:
+    """Join the text blocks of a message's (or message chunk's) content."""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in content
+    )
+
+
+class FastPathRouter:
+    """
+    Summary:
+        Agent wrapper that answers routable queries with a direct tool call
+        and hands everything else to the wrapped agent.
+
+    Args:
+        agent: Compiled LangChain agent used as the fallback.
+        tools: LangChain MCP tools the agent was built with.
+        enabled: When False every query goes to the agent.
+    """
+
+    def __init__(self, agent, tools, enabled: bool = True):
+        self.agent = agent
+        self.tools = {tool.name: tool for tool in tools}
+        self.enabled = enabled
+
+        self.routed = 0
+        self.fallbacks = 0
+        self.route_errors = 0
+        self.routed_ms = 0.0
+        self.agent_ms = 0.0
+
+    def __getattr__(self, name):
+        # Everything but ainvoke (streaming, graph inspection) is the agent's
+        return getattr(self.agent, name)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        """
+        Summary:
+            Answer a request on the fast path when possible, else run the agent.
+
+        Args:
+            input: Agent input dict with a "messages" list.
+            config: Optional runnable config passed to the agent.
+
+        Returns:
+            Agent-shaped result dict with the full message list.
+        """
+        # Keeps the caller's request ID, or starts one for this request
+        with correlation_scope(request_id_var.get()), tracer.start_as_current_span(AGENT_SPAN) as span:
+            start = time.perf_counter()
+            route = self._route_for(input)
+            if route is not None:
+                result = await self._call_route(input["messages"], *route)
+                if result is not None:
+                    span.set_attribute("fast_path.routed", True)
+                    self._record_routed(route[0], start)
+                    return result
+                self.route_errors += 1
+
+            span.set_attribute("fast_path.routed", False)
+            result = await self.agent.ainvoke(input, config, **kwargs)
+            self._record_fallback(start)
+            return result
+
+    async def astream_events(self, input, config=None, **kwargs):
+        """
+        Summary:
+            Streaming counterpart of ainvoke().
+
+        Routed requests yield on_tool_start/on_tool_end around the tool call,
+        one on_chat_model_stream chunk with the reply and the root
+        on_chain_end carrying the result. If the fast path fails, an
+        on_tool_error is yielded and the agent's own events follow. Both
+        paths run in the same correlation scope and root span as ainvoke(),
+        which also records the tool calls and time to first token.
+
+        Args:
+            input: Agent input dict with a "messages" list.
+            config: Optional runnable config passed to the agent.
+            **kwargs: Passed to the agent's astream_events (e.g. version="v2").
+
+        Yields:
+            astream_events v2 style event dicts.
+        """
+        with correlation_scope(request_id_var.get()), tracer.start_as_current_span(AGENT_SPAN) as span:
+            span.set_attribute("agent.streaming", True)
+            start = time.perf_counter()
+            tool_calls = 0
+            ttft_ms = None
+            async for event in self._stream_events(input, config, span, **kwargs):
+                if event["event"] == "on_tool_start":
+                    tool_calls += 1
+                elif ttft_ms is None and event["event"] == "on_chat_model_stream":
+                    if message_text(event["data"]["chunk"]):
+                        ttft_ms = (time.perf_counter() - start) * 1000
+                yield event
+            span.set_attribute("agent.tool_calls", tool_calls)
+            if ttft_ms is not None:
+                span.set_attribute("agent.ttft_ms", ttft_ms)
+
+    async def _stream_events(self, input, config, span, **kwargs):
+        """Yield the fast path's events, or the agent's when it does not answer."""
+        start = time.perf_counter()
+        route = self._route_for(input)
+        if route is not None:
+            tool_name, args = route
+            run_id, tool_run_id = str(uuid.uuid4()), str(uuid.uuid4())
+            yield _event("on_chain_start", "FastPathRouter", run_id, [], {"input": input})
+            yield _event("on_tool_start", tool_name, tool_run_id, [run_id], {"input": args})
+            result = await self._call_route(input["messages"], tool_name, args)
+            if result is not None:
+                reply = result["messages"][-1]
+                yield _event("on_tool_end", tool_name, tool_run_id, [run_id], {"output": result["messages"][-2]})
+                yield _event(
+                    "on_chat_model_stream", "FastPathRouter", str(uuid.uuid4()), [run_id],
+                    {"chunk": AIMessageChunk(content=reply.content)}
+                )
+                yield _event("on_chain_end", "FastPathRouter", run_id, [], {"output": result})
+                span.set_attribute("fast_path.routed", True)
+                self._record_routed(tool_name, start)
+                return
+            self.route_errors += 1
+            yield _event(
+                "on_tool_error", tool_name, tool_run_id, [run_id],
+                {"error": "fast path failed, handing over to the agent"}
+            )
+
+        span.set_attribute("fast_path.routed", False)
+        async for event in self.agent.astream_events(input, config, **kwargs):
+            yield event
+        self._record_fallback(start)
+
+    def _record_routed(self, tool_name, start):
+        self.routed += 1
+        self.routed_ms += (time.perf_counter() - start) * 1000
+        logger.info(f"Fast path answered with {tool_name}")
+
+    def _record_fallback(self, start):
+        self.fallbacks += 1
+        self.agent_ms += (time.perf_counter() - start) * 1000
+
+    def _route_for(self, input):
+        """Return (tool_name, args) when the latest message is a routable user request, else None."""
+        if not self.enabled:
+            return None
+        messages = input.get("messages") if isinstance(input, dict) else None
+        if not messages or not isinstance(messages[-1], HumanMessage):
+            return None
+        route = match_route(message_text(messages[-1]))
+        if route is None or route[0] not in self.tools:
+            return None
+        return route
+
+    async def _call_route(self, messages, tool_name, args):
+        """Call the tool and build the agent-shaped result, or None to fall back."""
+        call_id = f"fast_path_{uuid.uuid4().hex}"
+        try:
+            tool_message = await self.tools[tool_name].ainvoke(
+                {"type": "tool_call", "name": tool_name, "args": args, "id": call_id}
+            )
+        except Exception:
+            logger.exception(f"Fast path call to {tool_name} failed, falling back to the agent")
+            return None
+
+        if not isinstance(tool_message, ToolMessage) or tool_message.status == "error":
+            return None
+        reply = format_tool_reply(tool_name, message_text(tool_message))
+        if reply is None:
+            # Nothing was stored on error, so the agent can safely retry
+            logger.info(f"Fast path {tool_name} returned an error, falling back to the agent")
+            return None
+
+        return {
+            "messages": [
+                *messages,
+                AIMessage(content="", tool_calls=[{"name": tool_name, "args": args, "id": call_id}]),
+                tool_message,
+                AIMessage(content=reply),
+            ]
+        }
+
+    def stats(self) -> dict:
+        """
+        Summary:
+            Report route hit rate and the estimated latency saved.
+
+        The saving is estimated from the mean latency of the requests that did
+        go through the agent, so it is None until at least one has.
+
+        Returns:
+            Dictionary of counters and latencies in milliseconds.
+        """
+        requests = self.routed + self.fallbacks
+        mean_routed_ms = self.routed_ms / self.routed if self.routed else None
+        mean_agent_ms = self.agent_ms / self.fallbacks if self.fallbacks else None
+        latency_saved_ms = None
+        if mean_routed_ms is not None and mean_agent_ms is not None:
+            latency_saved_ms = round(self.routed * (mean_agent_ms - mean_routed_ms), 2)
+        return {
+            "enabled": self.enabled,
+            "requests": requests,
+            "routed": self.routed,
+            "fallbacks": self.fallbacks,
+            "route_errors": self.route_errors,
+            "hit_rate": round(self.routed / requests, 4) if requests else 0.0,
+            "mean_routed_ms": round(mean_routed_ms, 2) if mean_routed_ms is not None else None,
+            "mean_agent_ms": round(mean_agent_ms, 2) if mean_agent_ms is not None else None,
+            "latency_saved_ms": latency_saved_ms
+        }
+
+
+def _event(kind, name, run_id, parent_ids, data):
+    """Build an astream_events v2 style event for a routed request."""
+    return {
+        "event": kind,
+        "name": name,
+        "run_id": run_id,
+        "parent_ids": parent_ids,
+        "tags": [],
+        "metadata": {"fast_path": True},
+        "data": data,
+    }
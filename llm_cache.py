@@ -0,0 +1,284 @@
+"""
+LLM Response Cache Module
+
+Summary:
+This module caches model responses on disk so repeated questions do not
+pay for another Gemini round trip while the budget is unchanged.
+
+Description:
+- LLMCacheStore keeps responses in a small SQLite file with a time-to-live
+  and least-recently-used eviction, and counts hits, misses, bypasses,
+  stores, expirations and evictions.
+- LLMResponseCacheMiddleware wraps every model call of the agent. Its key
+  is a hash of the normalized conversation (case, whitespace and trailing
+  punctuation of user messages; message and tool call ids are ignored),
+  the system prompt, the model, the tool schemas and the budget state
+  version read from the MCP server's budget://state-version resource.
+- Write-type requests are never served from the cache: a response that
+  calls any tool not annotated readOnlyHint is never stored, and a turn
+  that has already called such a tool bypasses the cache entirely.
+- If the budget version cannot be read, the call bypasses the cache.
+
+Tool results are part of the conversation, so a cached final answer is
+only reused when the tools returned exactly the same data.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    ToolMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+
+from fast_router import message_text, normalize_query
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+CREATE_CACHE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+)
+"""
+CREATE_CACHE_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used_at)"
+SELECT_ENTRY_SQL = "SELECT response, created_at FROM llm_cache WHERE key = ?"
+TOUCH_ENTRY_SQL = "UPDATE llm_cache SET last_used_at = ? WHERE key = ?"
+DELETE_ENTRY_SQL = "DELETE FROM llm_cache WHERE key = ?"
+UPSERT_ENTRY_SQL = """
+INSERT INTO llm_cache (key, response, created_at, last_used_at) VALUES (?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    response = excluded.response,
+    created_at = excluded.created_at,
+    last_used_at = excluded.last_used_at
+"""
+EVICT_LRU_SQL = """
+DELETE FROM llm_cache WHERE key IN (
+    SELECT key FROM llm_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+)
+"""
+
+
+class LLMCacheStore:
+    """
+    Summary:
+        SQLite-backed response store with TTL expiry and LRU eviction.
+
+    Args:
+        path: Cache database file (":memory:" for a throwaway cache).
+        ttl_s: Seconds an entry stays valid (0 disables expiry).
+        max_entries: Maximum number of entries kept.
+    """
+
+    def __init__(self, path: str, ttl_s: float = 3600, max_entries: int = 1000):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max(1, max_entries)
+
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.stores = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def _connection(self):
+        """Open the cache database on first use."""
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(CREATE_CACHE_TABLE_SQL)
+            conn.execute(CREATE_CACHE_INDEX_SQL)
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str):
+        """
+        Summary:
+            Return the cached response for key, or None on a miss.
+
+        Expired entries are deleted and counted as misses.
+
+        Returns:
+            AIMessage or None.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(SELECT_ENTRY_SQL, (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, created_at = row
+            if self.ttl_s and now - created_at > self.ttl_s:
+                conn.execute(DELETE_ENTRY_SQL, (key,))
+                self.expired += 1
+                self.misses += 1
+                return None
+            conn.execute(TOUCH_ENTRY_SQL, (now, key))
+            self.hits += 1
+        return messages_from_dict([json.loads(response)])[0]
+
+    def put(self, key: str, message):
+        """Store a response and evict the least recently used entries over the bound."""
+        payload = json.dumps(message_to_dict(message))
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(UPSERT_ENTRY_SQL, (key, payload, now, now))
+            self.stores += 1
+            evicted = conn.execute(EVICT_LRU_SQL, (self.max_entries,)).rowcount
+            self.evictions += max(0, evicted)
+
+    def bypass(self):
+        """Count a model call that was not eligible for caching."""
+        self.bypasses += 1
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._connection().execute("DELETE FROM llm_cache")
+
+    def close(self):
+        """Close the cache database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict:
+        """Return the cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "stores": self.stores,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+def normalize_message(message):
+    """Reduce a message to the parts that determine the model's answer."""
+    if isinstance(message, HumanMessage):
+        return ["human", normalize_query(message_text(message))]
+    if isinstance(message, ToolMessage):
+        return ["tool", message.name, message_text(message)]
+    if isinstance(message, AIMessage):
+        calls = [[call["name"], call["args"]] for call in message.tool_calls]
+        return ["ai", message_text(message).strip(), calls]
+    return [message.type, message_text(message)]
+
+
+def model_id(model) -> str:
+    """Identify a chat model by its type, model name and temperature."""
+    return "|".join(
+        str(part) for part in (
+            type(model).__name__,
+            getattr(model, "model", None) or getattr(model, "model_name", None),
+            getattr(model, "temperature", None),
+        )
+    )
+
+
+class LLMResponseCacheMiddleware(AgentMiddleware):
+    """
+    Summary:
+        Agent middleware that serves model calls from an LLMCacheStore.
+
+    Args:
+        store: LLMCacheStore holding the responses.
+        tools_hash: Fingerprint of the agent's tool schemas.
+        read_only_tools: Names of tools that never change the budget.
+        version_func: Async callable returning the budget state version.
+    """
+
+    def __init__(self, store, tools_hash: str, read_only_tools, version_func):
+        super().__init__()
+        self.store = store
+        self.tools_hash = tools_hash
+        self.read_only_tools = frozenset(read_only_tools)
+        self.version_func = version_func
+
+    def _writes_in_turn(self, messages) -> bool:
+        """True if the current turn already called a tool that may write."""
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                return False
+            if isinstance(message, AIMessage) and self._writes(message):
+                return True
+        return False
+
+    def _writes(self, message) -> bool:
+        """True if an AI message calls a tool that may write."""
+        return any(call["name"] not in self.read_only_tools for call in message.tool_calls)
+
+    def _key(self, request, version) -> str:
+        system = request.system_message.content if request.system_message is not None else None
+        payload = {
+            "model": model_id(request.model),
+            "system": system,
+            "tools": self.tools_hash,
+            "budget_version": version,
+            "messages": [normalize_message(message) for message in request.messages],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def awrap_model_call(self, request, handler):
+        if self._writes_in_turn(request.messages):
+            self.store.bypass()
+            return await handler(request)
+
+        try:
+            version = await self.version_func()
+        except Exception as e:
+            logger.warning(f"Budget version unavailable, bypassing LLM cache: {e!r}")
+            self.store.bypass()
+            return await handler(request)
+
+        key = self._key(request, version)
+        cached = await asyncio.to_thread(self.store.get, key)
+        if cached is not None:
+            logger.info("LLM cache hit")
+            return _fresh_copy(cached)
+
+        response = await handler(request)
+        message = response.result[-1] if response.result else None
+        if (
+            isinstance(message, AIMessage)
+            and len(response.result) == 1
+            and not message.invalid_tool_calls
+            and not self._writes(message)
+        ):
+            await asyncio.to_thread(self.store.put, key, message)
+        return response
+
+
+def _fresh_copy(message):
+    """Give a cached response new message and tool call ids and no token usage."""
+    tool_calls = [{**call, "id": f"cached_{uuid.uuid4().hex}"} for call in message.tool_calls]
+    return AIMessage(
+        content=message.content,
+        tool_calls=tool_calls,
+        response_metadata={**message.response_metadata, "llm_cache": "hit"},
+    )
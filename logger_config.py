@@ -1,14 +1,295 @@
+"""
+Logging Configuration Module
+
+Summary:
+This module configures the console and file loggers used across the app.
+
+Description:
+- setup_logger() gives each module a logger that writes to stdout and to
+  its own file under logs/.
+- With LOG_QUEUE_ENABLED (the default) the logger only puts records on an
+  in-memory queue; one background QueueListener thread formats them and
+  does the console and file I/O, so logging never blocks the event loop.
+  Records are formatted on that thread, so arguments passed %-style
+  (logger.debug("Tools: %s", tools)) are only rendered when written.
+- Log files rotate by size (LOG_ROTATION="size", LOG_MAX_BYTES,
+  LOG_BACKUP_COUNT) or by time (LOG_ROTATION="time", LOG_ROTATE_WHEN);
+  LOG_ROTATION="none" keeps one file per day as before.
+- The queue is drained at interpreter exit; shutdown_logging() drains it
+  earlier.
+- LOG_FORMAT="json" writes one JSON object per record instead of text.
+  Every record carries the request and session correlation IDs bound with
+  correlation_scope(); they live in contextvars, so they follow the
+  request through asyncio tasks, and mcp_sessions.py forwards them to the
+  MCP server in each tool call's _meta.
+- LOG_SAMPLING keeps only a fraction of the DEBUG/INFO records of chosen
+  loggers ("mcp_server:INFO=0.1,*:DEBUG=0.01"); WARNING and above are
+  always kept. Records with a request ID are sampled per request, so a
+  sampled request keeps all of its records, in the agent and the server.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import queue
+import random
 import sys
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
 from pathlib import Path
-from datetime import datetime
+
+from config import (
+    LOG_BACKUP_COUNT,
+    LOG_FORMAT,
+    LOG_MAX_BYTES,
+    LOG_QUEUE_ENABLED,
+    LOG_ROTATE_WHEN,
+    LOG_ROTATION,
+    LOG_SAMPLING,
+)
+
+# Correlation IDs of the current request and session (see correlation_scope)
+request_id_var = contextvars.ContextVar("request_id", default=None)
+session_id_var = contextvars.ContextVar("session_id", default=None)
+
+# Key of the correlation IDs in an MCP request's _meta
+CORRELATION_META_KEY = "correlation"
+
+# LogRecord attributes that are not user-supplied extras
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "session_id", "log_route"
+}
+
+
+def new_correlation_id() -> str:
+    """Return a new random correlation ID."""
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def correlation_scope(request_id=None, session_id=None):
+    """
+    Summary:
+        Bind correlation IDs to the current context for the duration of a
+        with block.
+
+    Args:
+        request_id: Request ID to bind; a new one is generated when None.
+        session_id: Session ID to bind; the current one is kept when None.
+
+    Yields:
+        The bound request ID.
+    """
+    request_id = request_id or new_correlation_id()
+    request_token = request_id_var.set(request_id)
+    session_token = session_id_var.set(session_id) if session_id is not None else None
+    try:
+        yield request_id
+    finally:
+        request_id_var.reset(request_token)
+        if session_token is not None:
+            session_id_var.reset(session_token)
+
+
+def start_session(session_id=None) -> str:
+    """Bind a session ID to the current context (and the tasks it starts); returns it."""
+    session_id = session_id or new_correlation_id()
+    session_id_var.set(session_id)
+    return session_id
+
+
+def correlation_meta() -> dict:
+    """Return the bound correlation IDs as an MCP _meta entry, or {} when none is bound."""
+    ids = {"request_id": request_id_var.get(), "session_id": session_id_var.get()}
+    ids = {key: value for key, value in ids.items() if value}
+    return {CORRELATION_META_KEY: ids} if ids else {}
+
+
+def parse_sampling_rules(spec: str) -> dict:
+    """
+    Summary:
+        Parse LOG_SAMPLING rules.
+
+    Args:
+        spec: Comma-separated "logger:LEVEL=rate" rules; "*" matches every
+            logger and a rule for a logger also covers its children.
+
+    Returns:
+        Dictionary mapping (logger, level number) to the kept fraction.
+
+    Raises:
+        ValueError: If a rule is malformed.
+    """
+    rules = {}
+    for rule in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            target, rate = rule.split("=")
+            name, level = target.rsplit(":", 1)
+            levelno = logging.getLevelName(level.strip().upper())
+            rate = float(rate)
+        except ValueError:
+            raise ValueError(f"Invalid LOG_SAMPLING rule '{rule}', expected logger:LEVEL=rate") from None
+        if not isinstance(levelno, int) or not 0 <= rate <= 1:
+            raise ValueError(f"Invalid LOG_SAMPLING rule '{rule}', expected logger:LEVEL=rate")
+        rules[(name.strip(), levelno)] = rate
+    return rules
+
+
+class CorrelationFilter(logging.Filter):
+    """
+    Summary:
+        Stamp records with the bound correlation IDs and drop the DEBUG/INFO
+        records that sampling leaves out.
+
+    Args:
+        sampling: (logger, level number) -> kept fraction, from
+            parse_sampling_rules(); WARNING and above are never sampled.
+    """
+
+    def __init__(self, sampling=None):
+        super().__init__()
+        self.sampling = sampling or {}
+        self._rates = {}
+
+    def _rate(self, name: str, levelno: int) -> float:
+        key = (name, levelno)
+        if key not in self._rates:
+            rate = self.sampling.get(("*", levelno), 1.0)
+            # The most specific logger rule wins
+            for (rule_name, rule_level), rule_rate in sorted(self.sampling.items(), key=lambda r: len(r[0][0])):
+                if rule_level == levelno and (name == rule_name or name.startswith(rule_name + ".")):
+                    rate = rule_rate
+            self._rates[key] = rate
+        return self._rates[key]
+
+    def filter(self, record):
+        request_id = request_id_var.get()
+        record.request_id = request_id
+        record.session_id = session_id_var.get()
+        if record.levelno >= logging.WARNING or not self.sampling:
+            return True
+        rate = self._rate(record.name, record.levelno)
+        if rate >= 1.0:
+            return True
+        # Same request, same decision, in every logger and process
+        draw = zlib.crc32(request_id.encode()) / 0xFFFFFFFF if request_id else random.random()
+        return draw < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as one JSON object, including correlation IDs and extra fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "session_id": getattr(record, "session_id", None),
+            "module": record.module,
+            "line": record.lineno,
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# One filter for every logger, so sampling rates are resolved once
+correlation_filter = CorrelationFilter(parse_sampling_rules(LOG_SAMPLING))
+
+
+class _RoutingHandler(logging.Handler):
+    """Listener-side handler passing each record to the handlers of the logger that queued it."""
+
+    def __init__(self):
+        super().__init__()
+        self.routes = {}
+
+    def emit(self, record):
+        for handler in self.routes.get(record.log_route, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+class _RoutedQueueHandler(QueueHandler):
+    """Queue handler of one logger; defers formatting to the listener thread."""
+
+    def __init__(self, log_queue, route: str):
+        super().__init__(log_queue)
+        self.route = route
+
+    def enqueue(self, record):
+        if _listener is None:
+            _start_listener()
+        super().enqueue(record)
+
+    def prepare(self, record):
+        # Shallow copy so a record propagated through several loggers keeps
+        # one route per queue entry; the message is formatted by the listener
+        record = copy.copy(record)
+        record.log_route = self.route
+        return record
+
+
+_queue_lock = threading.Lock()
+_log_queue = queue.SimpleQueue()
+_router = _RoutingHandler()
+_listener = None
+_atexit_registered = False
+
+
+def _start_listener():
+    """Start the writer thread on first use, or again after shutdown_logging()."""
+    global _listener, _atexit_registered
+    with _queue_lock:
+        if _listener is None:
+            _listener = QueueListener(_log_queue, _router)
+            _listener.start()
+            if not _atexit_registered:
+                atexit.register(shutdown_logging)
+                _atexit_registered = True
+
+
+def shutdown_logging():
+    """Write every queued record and stop the writer thread; safe to call more than once."""
+    global _listener
+    with _queue_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _file_handler(name: str, log_path: Path) -> logging.Handler:
+    """Build the file handler for a logger according to LOG_ROTATION."""
+    base = name.replace('.', '_')
+    if LOG_ROTATION == "time":
+        # The rotated files get the date suffix
+        return TimedRotatingFileHandler(
+            log_path / f"{base}.log", when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+
+    log_file = log_path / f"{base}_{datetime.now().strftime('%Y%m%d')}.log"
+    if LOG_ROTATION == "size":
+        return RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+    return logging.FileHandler(log_file, encoding='utf-8')
 
 
 def setup_logger(
     name: str = __name__,
     log_level: int = logging.INFO,
     log_to_file: bool = True,
-    log_dir: str = "logs"
+    log_dir: str = "logs",
+    use_queue: bool = LOG_QUEUE_ENABLED
 ) -> logging.Logger:
     """
     Configure and return a logger with console and optional file handlers.
@@ -18,6 +299,8 @@ def setup_logger(
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_to_file: Whether to write logs to a file
         log_dir: Directory to store log files
+        use_queue: Hand records to the background writer thread instead of
+            writing them on the calling thread
     
     Returns:
         Configured logger instance
@@ -40,12 +323,20 @@ def setup_logger(
         fmt='%(asctime)s - %(levelname)s - %(message)s',
         datefmt='%H:%M:%S'
     )
+
+    if LOG_FORMAT == "json":
+        detailed_formatter = simple_formatter = JsonFormatter()
+
+    # Stamps correlation IDs and applies sampling on the calling thread
+    logger.addFilter(correlation_filter)
     
+    handlers = []
+
     # Console Handler (stdout)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
     console_handler.setFormatter(simple_formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
     
     # File Handler (optional)
     if log_to_file:
@@ -53,14 +344,19 @@ def setup_logger(
         log_path = Path(log_dir)
         log_path.mkdir(exist_ok=True)
         
-        # Create log file with timestamp
-        log_filename = f"{name.replace('.', '_')}_{datetime.now().strftime('%Y%m%d')}.log"
-        log_file = log_path / log_filename
-        
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        # Create log file (dated, or rotated per LOG_ROTATION)
+        file_handler = _file_handler(name, log_path)
         file_handler.setLevel(log_level)
         file_handler.setFormatter(detailed_formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    if use_queue:
+        _router.routes[name] = handlers
+        _start_listener()
+        logger.addHandler(_RoutedQueueHandler(_log_queue, name))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
     
     return logger
 
@@ -94,31 +390,44 @@ class LogConfig:
     LOG_DIR = "logs"
     LOG_TO_FILE = True
     
-    # Format strings
+    # Format strings (LOG_FORMAT="json" uses JsonFormatter instead)
+    FORMAT = LOG_FORMAT
     DETAILED_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
     SIMPLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
     DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 
-def configure_root_logger(level: int = logging.INFO):
+def configure_root_logger(level: int = logging.INFO, stream=None):
     """
     Configure the root logger for the entire application.
     
     Args:
         level: Logging level to set
+        stream: Stream to write to (default sys.stdout; the stdio MCP
+            server passes sys.stderr)
     """
-    logging.basicConfig(
-        level=level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S',
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    handler = logging.StreamHandler(stream or sys.stdout)
+    # A handler filter also sees the records propagated from child loggers
+    handler.addFilter(correlation_filter)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+    logging.basicConfig(level=level, handlers=[handler])
 
 
-# Pre-configured logger for quick use
-default_logger = setup_logger("app", log_level=logging.INFO, log_to_file=True)
+def __getattr__(name: str):
+    """
+    Create the pre-configured default_logger on first use rather than at
+    import, so importing this module (as the stdio MCP server does) adds no
+    stdout handler, log file or writer thread.
+    """
+    if name == "default_logger":
+        return setup_logger("app", log_level=logging.INFO, log_to_file=True)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
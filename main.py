@@ -11,16 +11,32 @@ Description:
 - Initializes the MCP client connection.
 - Creates the LangChain agent with MCP tools.
 - Provides a main execution loop for processing user queries.
-- Handles graceful shutdown and resource cleanup.
+- Provides an interactive mode that streams tool progress and model tokens
+  as they arrive and reports time to first token per turn.
+- Provides a batch mode that runs the queries of a JSONL file concurrently
+  (see batch_runner.py).
+- Binds a logging session ID for the run and a request ID per query or
+  turn (see logger_config.correlation_scope).
+- Handles graceful shutdown and resource cleanup, including the persistent
+  MCP server sessions.
 
 If initialization or execution fails, errors are logged with stack trace details
 and appropriate cleanup is performed.
 """
 import asyncio
 from langchain_core.messages import HumanMessage
-from logger_config import setup_logger
-from client import client
-from agent import create_budget_agent
+from logger_config import correlation_scope, setup_logger, start_session
+from client import session_manager, tool_client
+from agent import create_budget_agent, llm_cache_store, model_rate_limiter
+from batch_runner import format_batch_summary, percentile, run_batch
+from config import (
+    BATCH_CONCURRENCY,
+    CONTEXT_BUDGET_ENABLED,
+    CONTEXT_MAX_HISTORY_TOKENS,
+    CONTEXT_MAX_SUMMARY_TOKENS,
+)
+from context_budget import bounded_history
+from streaming import stream_turn
 
 logger = setup_logger(__name__)
 
@@ -38,7 +54,7 @@ async def main():
     try:
         # Create the agent with MCP tools
         logger.debug("Initializing budget agent")
-        agent = await create_budget_agent(client)
+        agent = await create_budget_agent(tool_client)
         logger.info("Agent initialized successfully")
         
         # Example queries - you can modify this section
@@ -89,12 +105,18 @@ async def main():
         print(result["messages"][-2].content)
         
         logger.info("All example queries processed successfully")
+        logger.info(f"Fast path stats: {agent.stats()}")
+        if llm_cache_store is not None:
+            logger.info(f"LLM cache stats: {llm_cache_store.stats()}")
+        if model_rate_limiter is not None:
+            logger.info(f"Model rate limiter stats: {model_rate_limiter.stats()}")
         
     except Exception:
         logger.exception("Error in main execution")
         raise
     
     finally:
+        await session_manager.close()
         logger.info("Trip Budget Agent application shutting down")
 
 
@@ -102,6 +124,9 @@ async def interactive_mode():
     """
     Summary:
         Interactive mode for processing user queries in real-time.
+        Tool calls and model tokens are streamed as they happen, the
+        conversation history is kept across turns, and time to first token
+        and total latency are reported for every turn.
     
     Returns:
         None
@@ -111,7 +136,7 @@ async def interactive_mode():
     try:
         # Create the agent
         logger.debug("Initializing corporate agent for interactive mode")
-        agent = await create_budget_agent(client)
+        agent = await create_budget_agent(tool_client)
         logger.info("Agent initialized successfully")
         
         print("\n" + "="*60)
@@ -124,52 +149,126 @@ async def interactive_mode():
         print("  - Type 'exit' or 'quit' to end session")
         print("="*60 + "\n")
         
-    #     while True:
-    #         try:
-    #             user_input = input("\n💬 You: ").strip()
+        messages = []
+        turns = []
+        while True:
+            try:
+                # Read input off the event loop so MCP health checks keep running
+                user_input = (await asyncio.to_thread(input, "\n💬 You: ")).strip()
                 
-    #             if user_input.lower() in ['exit', 'quit', 'bye']:
-    #                 logger.info("User requested exit")
-    #                 print("\n👋 Goodbye! Safe travels!")
-    #                 break
+                if user_input.lower() in ['exit', 'quit', 'bye']:
+                    logger.info("User requested exit")
+                    print("\n👋 Goodbye! Safe travels!")
+                    break
                 
-    #             if not user_input:
-    #                 continue
+                if not user_input:
+                    continue
                 
-    #             logger.info(f"Processing user query: {user_input}")
-    #             result = await agent.ainvoke({
-    #                 "messages": [HumanMessage(content=user_input)]
-    #             })
+                with correlation_scope():
+                    logger.info(f"Processing user query: {user_input}")
+                    turn = await stream_turn(agent, [*messages, HumanMessage(content=user_input)])
+                if turn["messages"]:
+                    messages = turn["messages"]
+                    if CONTEXT_BUDGET_ENABLED:
+                        messages = bounded_history(
+                            messages, CONTEXT_MAX_HISTORY_TOKENS, CONTEXT_MAX_SUMMARY_TOKENS
+                        )
+                turns.append(turn)
                 
-    #             output = result.get('output', result)
-    #             print(f"\n🤖 Agent: {output}")
-    #             logger.debug(f"Agent response: {output}")
-                
-    #         except KeyboardInterrupt:
-    #             logger.info("Keyboard interrupt received")
-    #             print("\n\n👋 Session interrupted. Goodbye!")
-    #             break
-    #         except Exception as e:
-    #             logger.exception("Error processing query in interactive mode")
-    #             print(f"\n❌ Error: {str(e)}")
-    #             print("Please try again with a different query.")
+            except (KeyboardInterrupt, EOFError):
+                logger.info("Keyboard interrupt received")
+                print("\n\n👋 Session interrupted. Goodbye!")
+                break
+            except Exception as e:
+                logger.exception("Error processing query in interactive mode")
+                print(f"\n❌ Error: {str(e)}")
+                print("Please try again with a different query.")
+        
+        if turns:
+            ttft_p50 = percentile(sorted(t["ttft_ms"] for t in turns if t["ttft_ms"] is not None), 50)
+            total_p50 = percentile(sorted(t["total_ms"] for t in turns), 50)
+            first_token = f"{ttft_p50:.0f} ms" if ttft_p50 is not None else "n/a"
+            logger.info(
+                f"Interactive session: {len(turns)} turn(s), "
+                f"p50 first token {first_token}, p50 total {total_p50:.0f} ms"
+            )
+        logger.info(f"Fast path stats: {agent.stats()}")
+        if llm_cache_store is not None:
+            logger.info(f"LLM cache stats: {llm_cache_store.stats()}")
+        if model_rate_limiter is not None:
+            logger.info(f"Model rate limiter stats: {model_rate_limiter.stats()}")
         
     except Exception:
         logger.exception("Error in interactive mode")
         raise
     
     finally:
+        await session_manager.close()
         logger.info("Interactive mode session ended")
 
 
+async def batch_mode(input_path, output_path, concurrency):
+    """
+    Summary:
+        Batch mode that runs every query of a JSONL file through the agent
+        concurrently and writes the results to another JSONL file.
+
+    Args:
+        input_path: JSONL file with one query per line.
+        output_path: JSONL file for the results, written as queries finish.
+        concurrency: Maximum number of queries in flight.
+
+    Returns:
+        None
+    """
+    logger.info(f"Starting Trip Budget Agent in batch mode: {input_path} -> {output_path}")
+    
+    try:
+        agent = await create_budget_agent(tool_client)
+        logger.info("Agent initialized successfully")
+        
+        summary = await run_batch(agent, input_path, output_path, concurrency)
+        print("\n" + format_batch_summary(summary))
+        print(f"Results written to {output_path}")
+        logger.info(f"Fast path stats: {agent.stats()}")
+        if llm_cache_store is not None:
+            logger.info(f"LLM cache stats: {llm_cache_store.stats()}")
+        if model_rate_limiter is not None:
+            logger.info(f"Model rate limiter stats: {model_rate_limiter.stats()}")
+        
+    except Exception:
+        logger.exception("Error in batch mode")
+        raise
+    
+    finally:
+        await session_manager.close()
+        logger.info("Batch mode session ended")
+
+
 if __name__ == "__main__":
+    import argparse
     import sys
+    from pathlib import Path
+    
+    # Every log record of this run, here and in the MCP server, carries the session ID
+    session_id = start_session()
+    logger.info(f"Trip Budget Agent starting (session {session_id})")
+    logger.debug("Command line arguments: %s", sys.argv)
     
-    logger.info("Trip Budget Agent starting")
-    logger.debug(f"Command line arguments: {sys.argv}")
+    parser = argparse.ArgumentParser(description="Trip Budget Agent")
+    parser.add_argument("--interactive", action="store_true", help="chat with the agent")
+    parser.add_argument("--batch", metavar="FILE.jsonl", help="run the queries of a JSONL file")
+    parser.add_argument("--output", metavar="FILE.jsonl",
+                        help="batch results file (default: <input>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help=f"batch queries in flight at once (default: {BATCH_CONCURRENCY})")
+    args = parser.parse_args()
     
-    # Check if interactive mode is requested
-    if len(sys.argv) > 1 and sys.argv[1] == "--interactive":
+    if args.batch:
+        output_path = args.output or str(Path(args.batch).with_suffix(".results.jsonl"))
+        logger.info("Running in batch mode")
+        asyncio.run(batch_mode(args.batch, output_path, args.concurrency))
+    elif args.interactive:
         logger.info("Running in interactive mode")
         asyncio.run(interactive_mode())
     else:
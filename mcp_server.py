@@ -1,92 +1,496 @@
+import atexit
+import json
 import logging
-import sqlite3
+import sys
+import time
 from datetime import datetime
+from pathlib import Path
 from fastmcp import FastMCP
+from fastmcp.server.middleware import Middleware
+from opentelemetry.trace import SpanKind
+from starlette.responses import PlainTextResponse
+
+import database
+from config import (
+    DB_PATH,
+    DB_STORAGE,
+    BUDGET_VERSION_URI,
+    DB_WRITE_BEHIND,
+    LIST_MAX_PAGE_SIZE,
+    LIST_PAGE_SIZE,
+    MCP_HTTP_HOST,
+    MCP_HTTP_PATH,
+    MCP_HTTP_PORT,
+    MCP_HTTP_STATELESS,
+    MCP_HTTP_WORKERS,
+    MCP_REPORT_TIMINGS,
+    MCP_TRANSPORT,
+    METRICS_ENABLED,
+    METRICS_PATH,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_SIZE,
+    TRACING_ENABLED,
+)
+from logger_config import CORRELATION_META_KEY, configure_root_logger, correlation_scope
+from metrics import registry
+from response_cache import ResponseCache
+from tracing import extract_trace_context, setup_tracing, tracer
+
+# Logger (stderr: stdout carries the stdio transport). Named explicitly: run as a
+# script the module is __main__, and LOG_SAMPLING rules refer to "mcp_server"
+logger = logging.getLogger("mcp_server")
+configure_root_logger(logging.INFO, stream=sys.stderr)
+setup_tracing("trip-budget-mcp-server", stream=sys.stderr)
+
+# Server metrics (see metrics.py); the db_* metrics are recorded in database.run_blocking
+TOOL_CALLS = registry.counter("mcp_tool_calls_total", "MCP tool calls by outcome", ("tool", "status"))
+TOOL_LATENCY = registry.histogram("mcp_tool_latency_ms", "MCP tool call duration in milliseconds", ("tool",))
+SUMMARY_ROWS = registry.histogram("summary_rows", "Rows read per expense summary or page query", ("function",))
+
+# SQL statements (kept as constants so the per-connection statement cache is reused).
+# The schema itself is defined in migrations.py.
+INSERT_EXPENSE_SQL = """
+INSERT INTO trip_expenses
+(category, amount, description, created_at)
+VALUES (?, ?, ?, ?)
+"""
+SELECT_ALL_EXPENSES_SQL = "SELECT category, amount, description FROM trip_expenses ORDER BY id"
+SELECT_EXPENSE_PAGE_SQL = """
+SELECT id, category, amount, description, created_at
+FROM trip_expenses
+WHERE {conditions}
+ORDER BY id
+LIMIT ?
+"""
+# Categories are ordered by first insertion to match the previous Python grouping
+SELECT_CATEGORY_TOTALS_SQL = """
+SELECT category, subtotal, item_count
+FROM budget_totals
+ORDER BY first_id
+"""
+AGGREGATE_CATEGORY_TOTALS_SQL = """
+SELECT category, SUM(amount), COUNT(*), MIN(id)
+FROM trip_expenses
+GROUP BY category
+ORDER BY MIN(id)
+"""
+SELECT_BUDGET_TOTALS_SQL = "SELECT category, subtotal, item_count, first_id FROM budget_totals ORDER BY first_id"
+INSERT_BUDGET_TOTALS_SQL = (
+    "INSERT INTO budget_totals (category, subtotal, item_count, first_id) "
+    + AGGREGATE_CATEGORY_TOTALS_SQL
+)
+DELETE_ALL_EXPENSES_SQL = "DELETE FROM trip_expenses"
+DELETE_BUDGET_TOTALS_SQL = "DELETE FROM budget_totals"
+# budget_state.version is bumped by an insert trigger and by clear_expenses()
+SELECT_BUDGET_VERSION_SQL = "SELECT version FROM budget_state WHERE id = 1"
+BUMP_BUDGET_VERSION_SQL = "UPDATE budget_state SET version = version + 1 WHERE id = 1"
+
 
-# Logger
-logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+# Database functions
+def write_expense_rows(rows):
+    """Write (category, amount, description, created_at) rows in one transaction."""
+    with database.writer() as conn:
+        conn.executemany(INSERT_EXPENSE_SQL, rows)
 
-# Database configuration
-DB_PATH = "trip_budget.db"
 
+# Write-behind mode: inserts are queued and group-committed in the background
+write_queue = database.WriteBehindQueue(write_expense_rows) if DB_WRITE_BEHIND else None
+
+
+def flush_pending_writes():
+    """Commit queued write-behind inserts so the next read sees them."""
+    if write_queue is not None:
+        write_queue.flush()
 
-# Database functions
-def get_connection():
-    """Create and return a database connection."""
-    return sqlite3.connect(DB_PATH)
-
-
-def create_tables():
-    """Create the trip_expenses table if it doesn't exist."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS trip_expenses (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        category TEXT,
-        amount INTEGER,
-        description TEXT,
-        created_at TEXT
-    )
-    """)
 
-    conn.commit()
-    conn.close()
-    logger.info("Database tables created/verified")
+def shutdown_storage():
+    """Flush queued writes and close the database; safe to call more than once."""
+    if write_queue is not None:
+        write_queue.close()
+    database.close_pool()
 
 
 def insert_expense(category, amount, description):
-    """Insert a new expense into the database."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        """
-        INSERT INTO trip_expenses
-        (category, amount, description, created_at)
-        VALUES (?, ?, ?, ?)
-        """,
-        (category, amount, description, datetime.now().isoformat())
-    )
+    """Insert a new expense into the database (or queue it in write-behind mode)."""
+    row = (category, amount, description, datetime.now().isoformat())
+    if write_queue is not None:
+        write_queue.put(row)
+        return
+
+    with database.writer() as conn:
+        conn.execute(INSERT_EXPENSE_SQL, row)
+
 
-    conn.commit()
-    conn.close()
+def insert_expenses(expenses):
+    """Insert several (category, amount, description) expenses in one transaction."""
+    created_at = datetime.now().isoformat()
+    rows = [(category, amount, description, created_at)
+            for category, amount, description in expenses]
+    if write_queue is not None:
+        write_queue.put_many(rows)
+        return
+
+    write_expense_rows(rows)
 
 
 def fetch_all_expenses():
     """Fetch all expenses from the database."""
-    conn = get_connection()
-    cursor = conn.cursor()
+    flush_pending_writes()
+    with database.reader() as conn:
+        return conn.execute(SELECT_ALL_EXPENSES_SQL).fetchall()
+
+
+def fetch_expense_breakdown(include_items=False):
+    """
+    Fetch category totals and, optionally, the expense items grouped by category.
+
+    Totals come from the budget_totals rollup. Both queries run in one read
+    transaction so the items always add up to the totals.
+
+    Returns:
+        Tuple of (category totals rows, {category: [(amount, description), ...]})
+    """
+    flush_pending_writes()
+    with database.reader() as conn:
+        conn.execute("BEGIN")
+        totals = conn.execute(SELECT_CATEGORY_TOTALS_SQL).fetchall()
+        items = {}
+        if include_items:
+            for category, amount, description in conn.execute(SELECT_ALL_EXPENSES_SQL):
+                items.setdefault(category, []).append((amount, description))
+        conn.rollback()
+    if METRICS_ENABLED:
+        SUMMARY_ROWS.observe(len(totals) + sum(map(len, items.values())), "fetch_expense_breakdown")
+    return totals, items
+
+
+def fetch_expense_page(cursor=0, page_size=LIST_PAGE_SIZE, category=None,
+                       created_after=None, created_before=None):
+    """
+    Fetch one page of expenses using keyset pagination on id.
 
-    cursor.execute("SELECT category, amount, description FROM trip_expenses")
-    rows = cursor.fetchall()
+    Only page_size + 1 rows are read, so the cost of a page does not depend
+    on the size of the table or on how deep the cursor is.
 
-    conn.close()
-    return rows
+    Returns:
+        Tuple of (rows, next_cursor); next_cursor is None on the last page
+    """
+    conditions = ["id > ?"]
+    params = [cursor]
+    if category is not None:
+        conditions.append("category = ?")
+        params.append(category)
+    if created_after is not None:
+        conditions.append("created_at >= ?")
+        params.append(created_after)
+    if created_before is not None:
+        conditions.append("created_at < ?")
+        params.append(created_before)
+    params.append(page_size + 1)
+
+    sql = SELECT_EXPENSE_PAGE_SQL.format(conditions=" AND ".join(conditions))
+    flush_pending_writes()
+    with database.reader() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    if METRICS_ENABLED:
+        SUMMARY_ROWS.observe(len(rows), "fetch_expense_page")
+
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, rows[-1][0]
+    return rows, None
 
 
 def clear_expenses():
-    """Clear all expenses from the database."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("DELETE FROM trip_expenses")
-    
-    conn.commit()
-    conn.close()
+    """Clear all expenses and their rollup totals from the database."""
+    flush_pending_writes()
+    with database.writer() as conn:
+        conn.execute(DELETE_ALL_EXPENSES_SQL)
+        conn.execute(DELETE_BUDGET_TOTALS_SQL)
+        conn.execute(BUMP_BUDGET_VERSION_SQL)
+
+
+def fetch_budget_version():
+    """
+    Return the budget state version.
+
+    The version changes with every stored or cleared expense and survives
+    restarts, so clients can key caches on it.
+    """
+    flush_pending_writes()
+    with database.reader() as conn:
+        return conn.execute(SELECT_BUDGET_VERSION_SQL).fetchone()[0]
+
 
+def check_budget_totals(rebuild=False):
+    """
+    Compare the budget_totals rollup with a full aggregation of trip_expenses.
+
+    Args:
+        rebuild: Recompute budget_totals from trip_expenses when they differ.
+
+    Returns:
+        Dictionary with "consistent" flag, the mismatching categories and
+        whether the rollup was rebuilt
+    """
+    flush_pending_writes()
+    with database.writer() as conn:
+        expected = {row[0]: row[1:] for row in conn.execute(AGGREGATE_CATEGORY_TOTALS_SQL)}
+        actual = {row[0]: row[1:] for row in conn.execute(SELECT_BUDGET_TOTALS_SQL)}
+
+        mismatches = [
+            {
+                "category": category,
+                "expected": expected.get(category),
+                "actual": actual.get(category)
+            }
+            for category in sorted(set(expected) | set(actual), key=str)
+            if expected.get(category) != actual.get(category)
+        ]
+
+        rebuilt = False
+        if mismatches and rebuild:
+            conn.execute(DELETE_BUDGET_TOTALS_SQL)
+            conn.execute(INSERT_BUDGET_TOTALS_SQL)
+            rebuilt = True
+            logger.warning(f"Rebuilt budget_totals ({len(mismatches)} mismatching categories)")
+
+    return {
+        "consistent": not mismatches,
+        "mismatches": mismatches,
+        "rebuilt": rebuilt
+    }
+
+
+# Expense calculation rules (shared by the single and batch tools)
+TRANSPORT_RATES = {
+    "bus": 2,
+    "train": 1.5,
+    "cab": 10,
+    "flight": 6
+}
+
+
+def calculate_food_expense(days, cost_per_day):
+    """Return the stored description and tool result for a food expense."""
+    total = days * cost_per_day
+    return f"{days} days @ ₹{cost_per_day}", {
+        "status": "success",
+        "category": "Food",
+        "amount": total,
+        "currency": "INR",
+        "details": f"{days} days × ₹{cost_per_day}/day"
+    }
+
+
+def calculate_hotel_expense(nights, price_per_night):
+    """Return the stored description and tool result for a hotel expense."""
+    total = nights * price_per_night
+    return f"{nights} nights @ ₹{price_per_night}", {
+        "status": "success",
+        "category": "Hotel",
+        "amount": total,
+        "currency": "INR",
+        "details": f"{nights} nights × ₹{price_per_night}/night"
+    }
+
+
+def calculate_transport_expense(distance_km, transport_type):
+    """
+    Return the stored description and tool result for a transport expense.
+
+    Raises:
+        ValueError: If transport_type is not one of TRANSPORT_RATES.
+    """
+    rate = TRANSPORT_RATES.get(transport_type.lower())
+    if not rate:
+        raise ValueError(
+            f"Invalid transport type '{transport_type}'. Valid options: bus, train, cab, flight"
+        )
+
+    cost = int(distance_km * rate)
+    return f"{distance_km} km via {transport_type}", {
+        "status": "success",
+        "category": "Transport",
+        "amount": cost,
+        "transport_type": transport_type,
+        "distance_km": distance_km,
+        "rate_per_km": rate,
+        "currency": "INR",
+        "details": f"{distance_km} km × ₹{rate}/km via {transport_type}"
+    }
+
+
+# Batch item category -> (calculator, required integer fields, required string fields)
+EXPENSE_CALCULATORS = {
+    "food": (calculate_food_expense, ("days", "cost_per_day"), ()),
+    "hotel": (calculate_hotel_expense, ("nights", "price_per_night"), ()),
+    "transport": (calculate_transport_expense, ("distance_km",), ("transport_type",)),
+}
+
+
+def calculate_batch_item(item):
+    """
+    Validate one add_expenses item and apply the matching calculation rule.
+
+    Raises:
+        ValueError: If the item is malformed or its category is unknown.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Item must be an object")
+
+    category = str(item.get("category", "")).lower()
+    if category not in EXPENSE_CALCULATORS:
+        raise ValueError(
+            f"Invalid category '{item.get('category')}'. Valid options: food, hotel, transport"
+        )
+
+    calculator, int_fields, str_fields = EXPENSE_CALCULATORS[category]
+    kwargs = {}
+    for field in int_fields:
+        value = item.get(field)
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"'{field}' must be an integer for {category} items")
+        kwargs[field] = value
+    for field in str_fields:
+        value = item.get(field)
+        if not isinstance(value, str) or not value:
+            raise ValueError(f"'{field}' must be a non-empty string for {category} items")
+        kwargs[field] = value
+
+    return calculator(**kwargs)
+
+
+async def response_cache_token():
+    """Change token for the response cache; None bypasses it while writes are queued."""
+    if write_queue is not None and write_queue.pending_count():
+        return None
+    # PRAGMA data_version (and opening the pool on first use) is blocking I/O
+    return await database.run_blocking(database.change_token)
+
+
+# Memoizes read-only tool responses until the next insert or clear
+response_cache = ResponseCache(
+    response_cache_token,
+    max_entries=RESPONSE_CACHE_SIZE,
+    enabled=RESPONSE_CACHE_ENABLED
+)
+
+class ToolTimingMiddleware(Middleware):
+    """
+    Attach server-side timings to every tool result's _meta.
+
+    meta["timings"] holds tool_ms (the whole tool call inside the server),
+    sqlite_ms and sqlite_calls (time spent in database.run_blocking calls),
+    so a client can split its observed latency into transport, tool body
+    and SQLite time.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        timings = {"sqlite_ms": 0.0, "sqlite_calls": 0}
+        token = database.sqlite_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            result = await call_next(context)
+        finally:
+            database.sqlite_timings.reset(token)
+        timings["tool_ms"] = (time.perf_counter() - start) * 1000
+        result.meta = {**(result.meta or {}), "timings": timings}
+        return result
+
+
+def _tool_failed(result) -> bool:
+    """Whether a tool result has one of the error shapes the tools return (see response_cache._is_error)."""
+    structured = result.structured_content
+    if isinstance(structured, dict) and structured.get("status") == "error":
+        return True
+    text = getattr(result.content[0], "text", "") if result.content else ""
+    return text.startswith("Error:")
+
+
+class MetricsMiddleware(Middleware):
+    """
+    Count every tool call by outcome and record its latency.
+
+    A call is an error when it raised or returned an error status, so the
+    error rate includes the failures the tools report to the model. The
+    latency covers the whole call inside the server, response cache hits
+    included.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        name = context.message.name
+        status = "error"
+        start = time.perf_counter()
+        try:
+            result = await call_next(context)
+            status = "error" if _tool_failed(result) else "ok"
+            return result
+        finally:
+            TOOL_CALLS.inc(name, status)
+            TOOL_LATENCY.observe((time.perf_counter() - start) * 1000, name)
+
+
+def _request_meta(context) -> dict:
+    """Return the extra _meta fields the client sent with the current request."""
+    # FastMCP rebuilds context.message without _meta; the request context keeps it
+    request_context = context.fastmcp_context.request_context if context.fastmcp_context else None
+    meta = request_context.meta if request_context is not None else None
+    return (meta.model_extra or {}) if meta is not None else {}
+
+
+class CorrelationMiddleware(Middleware):
+    """
+    Bind the client's correlation IDs for the duration of each request.
+
+    The agent sends its request and session IDs in the request's
+    _meta["correlation"] (see mcp_sessions.py); binding them here stamps
+    every server log record of the request with the same IDs as the
+    agent's records. Requests without IDs get a server-generated request ID.
+    """
+
+    async def on_request(self, context, call_next):
+        ids = _request_meta(context).get(CORRELATION_META_KEY)
+        ids = ids if isinstance(ids, dict) else {}
+        with correlation_scope(ids.get("request_id"), ids.get("session_id")):
+            return await call_next(context)
+
+
+class TracingMiddleware(Middleware):
+    """
+    Wrap every tool call and resource read in a server span.
+
+    The span's parent is the client span whose trace context came in the
+    request's _meta (see mcp_sessions.py), so tool bodies and database
+    calls show up under the agent's tool call in the same trace.
+    """
+
+    async def _traced(self, name, context, call_next):
+        parent = extract_trace_context(_request_meta(context))
+        with tracer.start_as_current_span(name, context=parent, kind=SpanKind.SERVER) as span:
+            span.set_attribute("mcp.method.name", context.method or "")
+            return await call_next(context)
+
+    async def on_call_tool(self, context, call_next):
+        return await self._traced(f"tools/call {context.message.name}", context, call_next)
+
+    async def on_read_resource(self, context, call_next):
+        return await self._traced(f"resources/read {context.message.uri}", context, call_next)
 
-# Initialize database
-create_tables()
 
 # Create FastMCP server
 mcp = FastMCP("Travel Budget Calculator")
+mcp.add_middleware(CorrelationMiddleware())
+if TRACING_ENABLED:
+    mcp.add_middleware(TracingMiddleware())
+if METRICS_ENABLED:
+    mcp.add_middleware(MetricsMiddleware())
+if MCP_REPORT_TIMINGS:
+    mcp.add_middleware(ToolTimingMiddleware())
 
 
 @mcp.tool()
-def food_cost(days: int, cost_per_day: int) -> dict:
+async def food_cost(days: int, cost_per_day: int) -> dict:
     """
     Calculates total food expense for the trip and stores it in the database.
 
@@ -98,17 +502,11 @@ def food_cost(days: int, cost_per_day: int) -> dict:
         Dictionary containing status, category, and total amount
     """
     try:
-        total = days * cost_per_day
-        insert_expense("Food", total, f"{days} days @ ₹{cost_per_day}")
-        logger.info(f"Food expense inserted: ₹{total}")
+        description, result = calculate_food_expense(days, cost_per_day)
+        await database.run_blocking(insert_expense, "Food", result["amount"], description)
+        logger.info(f"Food expense inserted: ₹{result['amount']}")
         
-        return {
-            "status": "success",
-            "category": "Food",
-            "amount": total,
-            "currency": "INR",
-            "details": f"{days} days × ₹{cost_per_day}/day"
-        }
+        return result
     except Exception as e:
         logger.exception("Error calculating food cost")
         return {
@@ -118,7 +516,7 @@ def food_cost(days: int, cost_per_day: int) -> dict:
 
 
 @mcp.tool()
-def hotel_cost(nights: int, price_per_night: int) -> dict:
+async def hotel_cost(nights: int, price_per_night: int) -> dict:
     """
     Calculates total hotel expense for the trip and stores it in the database.
 
@@ -130,17 +528,11 @@ def hotel_cost(nights: int, price_per_night: int) -> dict:
         Dictionary containing status, category, and total amount
     """
     try:
-        total = nights * price_per_night
-        insert_expense("Hotel", total, f"{nights} nights @ ₹{price_per_night}")
-        logger.info(f"Hotel expense inserted: ₹{total}")
+        description, result = calculate_hotel_expense(nights, price_per_night)
+        await database.run_blocking(insert_expense, "Hotel", result["amount"], description)
+        logger.info(f"Hotel expense inserted: ₹{result['amount']}")
         
-        return {
-            "status": "success",
-            "category": "Hotel",
-            "amount": total,
-            "currency": "INR",
-            "details": f"{nights} nights × ₹{price_per_night}/night"
-        }
+        return result
     except Exception as e:
         logger.exception("Error calculating hotel cost")
         return {
@@ -150,7 +542,7 @@ def hotel_cost(nights: int, price_per_night: int) -> dict:
 
 
 @mcp.tool()
-def transport_cost(distance_km: int, transport_type: str) -> dict:
+async def transport_cost(distance_km: int, transport_type: str) -> dict:
     """
     Calculates transport cost based on distance and type, then stores it in the database.
 
@@ -162,35 +554,19 @@ def transport_cost(distance_km: int, transport_type: str) -> dict:
         Dictionary containing status, category, and total amount
     """
     try:
-        rates = {
-            "bus": 2,
-            "train": 1.5,
-            "cab": 10,
-            "flight": 6
-        }
-
-        rate = rates.get(transport_type.lower())
-        if not rate:
+        try:
+            description, result = calculate_transport_expense(distance_km, transport_type)
+        except ValueError as e:
             logger.warning(f"Invalid transport type: {transport_type}")
             return {
                 "status": "error",
-                "message": f"Invalid transport type '{transport_type}'. Valid options: bus, train, cab, flight"
+                "message": str(e)
             }
 
-        cost = int(distance_km * rate)
-        insert_expense("Transport", cost, f"{distance_km} km via {transport_type}")
-        logger.info(f"Transport expense inserted: ₹{cost}")
+        await database.run_blocking(insert_expense, "Transport", result["amount"], description)
+        logger.info(f"Transport expense inserted: ₹{result['amount']}")
         
-        return {
-            "status": "success",
-            "category": "Transport",
-            "amount": cost,
-            "transport_type": transport_type,
-            "distance_km": distance_km,
-            "rate_per_km": rate,
-            "currency": "INR",
-            "details": f"{distance_km} km × ₹{rate}/km via {transport_type}"
-        }
+        return result
     except Exception as e:
         logger.exception("Error calculating transport cost")
         return {
@@ -200,36 +576,101 @@ def transport_cost(distance_km: int, transport_type: str) -> dict:
 
 
 @mcp.tool()
-def total_budget() -> str:
+async def add_expenses(items: list[dict]) -> dict:
     """
-    Retrieves all expenses from the database and returns a trip budget summary.
+    Calculates several food, hotel and transport expenses at once and stores
+    them in the database in a single transaction.
+
+    Args:
+        items: List of expense items. Each item has a "category" plus the same
+            parameters as the matching single-expense tool:
+            - {"category": "food", "days": int, "cost_per_day": int}
+            - {"category": "hotel", "nights": int, "price_per_night": int}
+            - {"category": "transport", "distance_km": int, "transport_type": str}
+
+    Returns:
+        Dictionary containing status, per-item results and the batch total.
+        If any item is invalid nothing is stored and the item errors are returned.
+    """
+    try:
+        if not items:
+            return {
+                "status": "error",
+                "message": "No expense items provided"
+            }
+
+        results = []
+        errors = []
+        rows = []
+        for index, item in enumerate(items):
+            try:
+                description, result = calculate_batch_item(item)
+            except ValueError as e:
+                errors.append({"index": index, "message": str(e)})
+                continue
+            results.append(result)
+            rows.append((result["category"], result["amount"], description))
+
+        if errors:
+            logger.warning(f"Rejected expense batch with {len(errors)} invalid item(s)")
+            return {
+                "status": "error",
+                "message": "Invalid expense items; nothing was stored",
+                "errors": errors
+            }
+
+        await database.run_blocking(insert_expenses, rows)
+        batch_total = sum(result["amount"] for result in results)
+        logger.info(f"Inserted {len(rows)} expenses in one batch: ₹{batch_total}")
+
+        return {
+            "status": "success",
+            "count": len(results),
+            "items": results,
+            "batch_total": batch_total,
+            "currency": "INR"
+        }
+    except Exception as e:
+        logger.exception("Error adding expenses")
+        return {
+            "status": "error",
+            "message": f"Failed to add expenses: {str(e)}"
+        }
+
+
+@mcp.tool(annotations={"readOnlyHint": True})
+@response_cache.cached
+async def total_budget(include_items: bool = True) -> str:
+    """
+    Retrieves the expense totals from the database and returns a trip budget summary.
+
+    Args:
+        include_items: List every expense under its category (default True).
+            Set to False for a subtotals-only summary.
 
     Returns:
         Formatted string showing breakdown of all expenses and total amount
     """
     try:
-        expenses = fetch_all_expenses()
+        category_totals, items_by_category = await database.run_blocking(
+            fetch_expense_breakdown, include_items
+        )
         
-        if not expenses:
+        if not category_totals:
             return "No expenses recorded yet. Start adding expenses to see your budget!"
         
-        # Calculate totals by category
-        category_totals = {}
-        for category, amount, description in expenses:
-            if category not in category_totals:
-                category_totals[category] = []
-            category_totals[category].append((amount, description))
-        
         # Build the breakdown
         breakdown_lines = []
         grand_total = 0
         
-        for category, items in category_totals.items():
-            category_total = sum(amount for amount, _ in items)
+        for category, category_total, item_count in category_totals:
             grand_total += category_total
             breakdown_lines.append(f"\n{category}:")
-            for amount, description in items:
-                breakdown_lines.append(f"  • ₹{amount:,} ({description})")
+            if include_items:
+                for amount, description in items_by_category.get(category, []):
+                    breakdown_lines.append(f"  • ₹{amount:,} ({description})")
+            else:
+                breakdown_lines.append(f"  {item_count} item(s)")
             breakdown_lines.append(f"  Subtotal: ₹{category_total:,}")
         
         breakdown = "\n".join(breakdown_lines)
@@ -250,8 +691,8 @@ def total_budget() -> str:
         return f"Error: Failed to fetch total budget - {str(e)}"
 
 
-@mcp.tool()
-def clear_all_expenses() -> dict:
+@mcp.tool(annotations={"destructiveHint": True})
+async def clear_all_expenses() -> dict:
     """
     Clears all expenses from the database (useful for starting a new trip calculation).
 
@@ -259,7 +700,7 @@ def clear_all_expenses() -> dict:
         Dictionary with status message
     """
     try:
-        clear_expenses()
+        await database.run_blocking(clear_expenses)
         logger.info("All expenses cleared")
         return {
             "status": "success",
@@ -273,18 +714,97 @@ def clear_all_expenses() -> dict:
         }
 
 
-@mcp.tool()
-def get_expense_summary() -> dict:
+@mcp.tool(annotations={"readOnlyHint": True})
+@response_cache.cached
+async def list_expenses(
+    cursor: int = 0,
+    page_size: int = LIST_PAGE_SIZE,
+    category: str | None = None,
+    created_after: str | None = None,
+    created_before: str | None = None
+) -> dict:
+    """
+    Lists recorded expenses one page at a time, oldest first.
+
+    Args:
+        cursor: Pass 0 for the first page, then the next_cursor of the previous page
+        page_size: Number of expenses per page (capped by the server)
+        category: Only list this category (food, hotel, transport)
+        created_after: Only list expenses created at or after this ISO timestamp
+        created_before: Only list expenses created before this ISO timestamp
+
+    Returns:
+        Dictionary containing the page of expenses and next_cursor
+        (null when there are no more pages)
+    """
+    try:
+        if page_size < 1:
+            return {
+                "status": "error",
+                "message": "page_size must be at least 1"
+            }
+        page_size = min(page_size, LIST_MAX_PAGE_SIZE)
+
+        if category is not None:
+            category = category.strip().capitalize()
+        for name, value in (("created_after", created_after), ("created_before", created_before)):
+            if value is not None:
+                try:
+                    datetime.fromisoformat(value)
+                except ValueError:
+                    return {
+                        "status": "error",
+                        "message": f"Invalid {name} '{value}'. Use an ISO timestamp such as 2025-01-31T09:00:00"
+                    }
+
+        rows, next_cursor = await database.run_blocking(
+            fetch_expense_page, cursor, page_size, category, created_after, created_before
+        )
+
+        return {
+            "status": "success",
+            "items": [
+                {
+                    "id": expense_id,
+                    "category": expense_category,
+                    "amount": amount,
+                    "description": description,
+                    "created_at": created_at
+                }
+                for expense_id, expense_category, amount, description, created_at in rows
+            ],
+            "count": len(rows),
+            "next_cursor": next_cursor,
+            "currency": "INR"
+        }
+    except Exception as e:
+        logger.exception("Error listing expenses")
+        return {
+            "status": "error",
+            "message": f"Failed to list expenses: {str(e)}"
+        }
+
+
+@mcp.tool(annotations={"readOnlyHint": True})
+@response_cache.cached
+async def get_expense_summary(include_items: bool = True) -> dict:
     """
     Get a structured summary of all expenses with category-wise breakdown.
 
+    Args:
+        include_items: Include the individual expenses of each category
+            (default True). Set to False to return only subtotals and counts
+            plus an items_cursor for paging through the items with list_expenses.
+
     Returns:
         Dictionary containing expenses grouped by category with totals
     """
     try:
-        expenses = fetch_all_expenses()
+        category_totals, items_by_category = await database.run_blocking(
+            fetch_expense_breakdown, include_items
+        )
         
-        if not expenses:
+        if not category_totals:
             return {
                 "status": "success",
                 "total": 0,
@@ -296,25 +816,28 @@ def get_expense_summary() -> dict:
         categories = {}
         total = 0
         
-        for category, amount, description in expenses:
-            total += amount
-            if category not in categories:
-                categories[category] = {
-                    "items": [],
-                    "subtotal": 0
-                }
-            categories[category]["items"].append({
-                "amount": amount,
-                "description": description
-            })
-            categories[category]["subtotal"] += amount
+        for category, subtotal, item_count in category_totals:
+            total += subtotal
+            categories[category] = {
+                "subtotal": subtotal,
+                "count": item_count
+            }
+            if include_items:
+                categories[category]["items"] = [
+                    {"amount": amount, "description": description}
+                    for amount, description in items_by_category.get(category, [])
+                ]
         
-        return {
+        summary = {
             "status": "success",
             "total": total,
             "categories": categories,
             "currency": "INR"
         }
+        if not include_items:
+            # Cursor for the first page of list_expenses
+            summary["items_cursor"] = 0
+        return summary
     except Exception as e:
         logger.exception("Error getting expense summary")
         return {
@@ -323,7 +846,121 @@ def get_expense_summary() -> dict:
         }
 
 
+@mcp.resource(BUDGET_VERSION_URI, mime_type="application/json")
+async def budget_state_version() -> str:
+    """
+    Current budget state version as JSON ({"version": n}).
+
+    The version changes whenever an expense is stored or the expenses are
+    cleared. It is a resource rather than a tool so it is not offered to the
+    model; clients read it to validate cached model responses.
+    """
+    version = await database.run_blocking(fetch_budget_version)
+    return json.dumps({"version": version})
+
+
+def _latency_table(calls, latency) -> dict:
+    """Merge a calls counter and a latency histogram into {name: calls, errors, error_rate, latency_ms}."""
+    table = {}
+    for (name, status), series in calls.items():
+        entry = table.setdefault(name, {"calls": 0, "errors": 0})
+        entry["calls"] += series.value
+        if status == "error":
+            entry["errors"] += series.value
+    for (name,), series in latency.items():
+        entry = table.setdefault(name, {"calls": 0, "errors": 0})
+        entry["error_rate"] = round(entry["errors"] / entry["calls"], 4) if entry["calls"] else 0.0
+        entry["latency_ms"] = series.summary()
+    return table
+
+
+@mcp.tool(annotations={"readOnlyHint": True}, meta={"operator": True})
+async def server_stats() -> dict:
+    """
+    Operational statistics of this server process: calls, errors and latency
+    percentiles per tool and per database function, rows read per summary
+    query, and the response cache counters.
+
+    Returns:
+        Dictionary with the metrics collected since the process started
+    """
+    if not METRICS_ENABLED:
+        return {"status": "error", "message": "Metrics are disabled (METRICS_ENABLED=false)"}
+    stats = {
+        "status": "success",
+        "uptime_s": round(time.time() - registry.started, 1),
+        "tools": _latency_table(TOOL_CALLS, TOOL_LATENCY),
+        "database": _latency_table(database.DB_CALLS, database.DB_LATENCY),
+        "summary_rows": {name: series.summary() for (name,), series in SUMMARY_ROWS.items()},
+        "response_cache": response_cache.stats(),
+    }
+    if write_queue is not None:
+        stats["pending_writes"] = write_queue.pending_count()
+    return stats
+
+
+@mcp.custom_route(METRICS_PATH, methods=["GET"])
+async def prometheus_metrics(request):
+    """Prometheus scrape endpoint (HTTP transport only); metrics are per worker process."""
+    if not METRICS_ENABLED:
+        return PlainTextResponse("Metrics are disabled\n", status_code=404)
+    return PlainTextResponse(registry.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+def create_http_app():
+    """
+    Build the streamable-HTTP ASGI app; used as the uvicorn app factory.
+
+    Each uvicorn worker process imports this module and calls the factory,
+    so every worker shares the same WAL-mode database file.
+    """
+    atexit.register(shutdown_storage)
+    return mcp.http_app(
+        path=MCP_HTTP_PATH,
+        stateless_http=MCP_HTTP_STATELESS or MCP_HTTP_WORKERS > 1
+    )
+
+
+def run_http():
+    """Serve the MCP server over streamable HTTP with MCP_HTTP_WORKERS workers."""
+    import uvicorn
+
+    if DB_STORAGE == "memory" and MCP_HTTP_WORKERS > 1:
+        raise SystemExit("DB_STORAGE=memory cannot be shared between HTTP workers; use MCP_HTTP_WORKERS=1")
+    if DB_WRITE_BEHIND and MCP_HTTP_WORKERS > 1:
+        logger.warning("Write-behind queues are per worker; reads only see queued writes of their own worker")
+
+    logger.info(
+        f"Serving streamable HTTP on http://{MCP_HTTP_HOST}:{MCP_HTTP_PORT}{MCP_HTTP_PATH} "
+        f"with {MCP_HTTP_WORKERS} worker(s)"
+    )
+    uvicorn.run(
+        "mcp_server:create_http_app",
+        factory=True,
+        host=MCP_HTTP_HOST,
+        port=MCP_HTTP_PORT,
+        workers=MCP_HTTP_WORKERS,
+        app_dir=str(Path(__file__).resolve().parent),
+        log_level="warning"
+    )
+
+
 if __name__ == "__main__":
+    # Maintenance commands: verify or rebuild the budget_totals rollup
+    if len(sys.argv) > 1 and sys.argv[1] in ("--check-totals", "--rebuild-totals"):
+        report = check_budget_totals(rebuild=sys.argv[1] == "--rebuild-totals")
+        print(report)
+        database.close_pool()
+        sys.exit(0 if report["consistent"] or report["rebuilt"] else 1)
+
+    transport = "http" if "--http" in sys.argv[1:] else MCP_TRANSPORT
+
     logger.info("Starting Travel Budget FastMCP Server")
     logger.info(f"Database: {DB_PATH}")
-    mcp.run(transport="stdio")
\ No newline at end of file
+    if transport == "http":
+        run_http()
+    else:
+        try:
+            mcp.run(transport="stdio")
+        finally:
+            shutdown_storage()
@@ -0,0 +1,438 @@
+"""
+Persistent MCP Session Manager Module
+
+Summary:
+This module keeps warm MCP client sessions alive for the lifetime of the
+process instead of spawning a server per tool call.
+
+Description:
+- Tools returned by MultiServerMCPClient.get_tools() open a brand-new
+  session (a new stdio server subprocess, imports and MCP handshake) for
+  every single tool invocation.
+- MCPSessionManager opens a small pool of sessions once, loads the tools
+  through them and routes every tool call to a warm session via a
+  langchain-mcp-adapters tool interceptor.
+- Sessions are health-checked with MCP pings in the background and
+  restarted when they fail.
+- get_tools() serves tool schemas from an on-disk ToolSchemaCache when one
+  is configured, so no tools/list round trip is needed before the agent
+  can be built; the cache is refreshed through a warm session in the
+  background.
+- close() shuts every session (and its server subprocess) down cleanly.
+- Every tool call carries the caller's correlation IDs and trace context
+  in its _meta, so the server's log records share the agent's request ID
+  and its spans join the agent's trace.
+
+Each session lives inside its own background task because MCP sessions are
+anyio context managers that must be entered and exited in the same task.
+"""
+
+import asyncio
+import itertools
+
+import anyio
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from mcp import types
+from mcp.shared.exceptions import McpError
+from opentelemetry.trace import SpanKind
+
+from config import (
+    MCP_HEALTH_CHECK_INTERVAL_S,
+    MCP_HEALTH_CHECK_TIMEOUT_S,
+    MCP_SESSION_POOL_SIZE,
+)
+from logger_config import correlation_meta, setup_logger
+from tool_cache import server_fingerprint, tools_fingerprint
+from tracing import trace_meta, tracer
+
+logger = setup_logger(__name__)
+
+# Errors meaning the session's connection to the server is gone
+TRANSPORT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, OSError)
+
+
+def is_transport_error(exc: BaseException) -> bool:
+    """
+    Summary:
+        Tell whether a failed call lost the connection to the server, as
+        opposed to an error reply (such as a request timeout) on a session
+        that still works.
+
+    Args:
+        exc: Exception raised by a session call.
+
+    Returns:
+        True if the session has to be restarted.
+    """
+    if isinstance(exc, McpError):
+        return exc.error.code == types.CONNECTION_CLOSED
+    return isinstance(exc, TRANSPORT_ERRORS)
+
+
+class PersistentSession:
+    """
+    Summary:
+        One long-lived MCP ClientSession owned by a background task.
+
+    Args:
+        client: MultiServerMCPClient holding the connection configuration.
+        server_name: Name of the server connection to open.
+    """
+
+    def __init__(self, client, server_name: str):
+        self.client = client
+        self.server_name = server_name
+        self.session = None
+        self._task = None
+        self._ready = None
+        self._stop = None
+        self._error = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        """True while the session is open and its owner task is running."""
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self):
+        """
+        Summary:
+            Open the session and wait until the MCP handshake has completed.
+
+        Raises:
+            RuntimeError: If the session could not be opened.
+        """
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error = None
+        self._task = asyncio.create_task(self._run(), name=f"mcp-session-{self.server_name}")
+        await self._ready.wait()
+        if self.session is None:
+            raise RuntimeError(f"Failed to open MCP session '{self.server_name}'") from self._error
+
+    async def _run(self):
+        """Own the session context for as long as the session should stay open."""
+        try:
+            async with self.client.session(self.server_name) as session:
+                self.session = session
+                self._ready.set()
+                await self._stop.wait()
+        except Exception as e:
+            self._error = e
+            logger.exception(f"MCP session '{self.server_name}' terminated")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def ping(self, timeout: float):
+        """Send an MCP ping and wait at most timeout seconds for the reply."""
+        await asyncio.wait_for(self.session.send_ping(), timeout)
+
+    async def close(self):
+        """Ask the owner task to leave the session context and wait for it."""
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+    async def restart(self, failed=None):
+        """
+        Summary:
+            Close the session if it is still open and open a fresh one.
+
+        Args:
+            failed: The ClientSession that was seen failing. When the session
+                is alive and no longer that one by the time the lock is held,
+                another caller has restarted it already and nothing is done.
+        """
+        async with self._lock:
+            if self.alive and self.session is not failed:
+                return
+            await self.close()
+            await self.start()
+            logger.info(f"MCP session '{self.server_name}' restarted")
+
+
+class MCPSessionManager:
+    """
+    Summary:
+        Pool of warm MCP sessions for one server, usable in place of the
+        MultiServerMCPClient when loading tools.
+
+    Args:
+        client: MultiServerMCPClient holding the connection configuration,
+            callbacks and interceptors.
+        server_name: Name of the server connection to keep warm.
+        pool_size: Number of sessions (server processes) to keep open.
+        health_check_interval_s: Seconds between background pings (0 disables).
+        health_check_timeout_s: Seconds to wait for a ping reply.
+        tool_cache: Optional tool_cache.ToolSchemaCache used by get_tools().
+    """
+
+    def __init__(
+        self,
+        client,
+        server_name: str,
+        pool_size: int = MCP_SESSION_POOL_SIZE,
+        health_check_interval_s: float = MCP_HEALTH_CHECK_INTERVAL_S,
+        health_check_timeout_s: float = MCP_HEALTH_CHECK_TIMEOUT_S,
+        tool_cache=None,
+    ):
+        self.client = client
+        self.server_name = server_name
+        self.pool_size = max(1, pool_size)
+        self.health_check_interval_s = health_check_interval_s
+        self.health_check_timeout_s = health_check_timeout_s
+        self.tool_cache = tool_cache
+
+        self._sessions = []
+        self._next = None
+        self._health_task = None
+        self._restart_tasks = {}
+        self._start_lock = asyncio.Lock()
+
+        self._tool_schemas = None
+        self._tools = None
+        self._refresh_task = None
+
+    @property
+    def started(self) -> bool:
+        """True once the session pool has been opened."""
+        return bool(self._sessions)
+
+    async def start(self):
+        """Open every session in the pool and start the health checker."""
+        async with self._start_lock:
+            if self._sessions:
+                return
+            sessions = [PersistentSession(self.client, self.server_name) for _ in range(self.pool_size)]
+            try:
+                await asyncio.gather(*(session.start() for session in sessions))
+            except BaseException:
+                # Includes cancellation: never leave a server process behind
+                await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+                raise
+            self._sessions = sessions
+            self._next = itertools.cycle(sessions)
+            if self.health_check_interval_s > 0:
+                self._health_task = asyncio.create_task(self._health_loop(), name="mcp-health-check")
+            logger.info(f"Opened {len(sessions)} persistent MCP session(s) for '{self.server_name}'")
+
+    async def _acquire(self) -> PersistentSession:
+        """Return the next session in round-robin order, restarting it if it died."""
+        if not self._sessions:
+            await self.start()
+        pooled = next(self._next)
+        if not pooled.alive:
+            logger.warning(f"MCP session for '{self.server_name}' is down, restarting")
+            await pooled.restart(failed=pooled.session)
+        return pooled
+
+    async def __call__(self, request, handler):
+        """
+        Summary:
+            Tool call interceptor that runs the call on a warm pooled session.
+
+        The per-call handler (which would spawn a new session) is never used.
+        A call that fails at the transport level is not retried, because the
+        server may already have applied it; the session is restarted for the
+        calls that follow. Other failures, such as request timeouts, leave the
+        session as it is.
+        """
+        pooled = await self._acquire()
+        with tracer.start_as_current_span(f"tools/call {request.name}", kind=SpanKind.CLIENT) as span:
+            span.set_attribute("mcp.method.name", "tools/call")
+            span.set_attribute("gen_ai.tool.name", request.name)
+            # Sent from inside the span so the server's span is its child
+            meta = {**correlation_meta(), **trace_meta()}
+            session = pooled.session
+            try:
+                return await session.call_tool(request.name, request.args, meta=meta or None)
+            except Exception as e:
+                logger.exception(f"MCP tool call '{request.name}' failed on pooled session")
+                if is_transport_error(e):
+                    self._restart_in_background(pooled, session)
+                raise
+
+    def _restart_in_background(self, pooled, failed):
+        """Restart a session without making the caller wait, at most once at a time per session."""
+        if pooled in self._restart_tasks:
+            return
+        # The event loop only holds weak references to tasks
+        task = asyncio.create_task(pooled.restart(failed), name=f"mcp-session-restart-{self.server_name}")
+        self._restart_tasks[pooled] = task
+        task.add_done_callback(lambda done: self._restart_done(pooled, done))
+
+    def _restart_done(self, pooled, task):
+        self._restart_tasks.pop(pooled, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Failed to restart MCP session", exc_info=task.exception())
+
+    async def read_resource(self, uri: str) -> str:
+        """
+        Summary:
+            Read a text resource from the server through a pooled session.
+
+        Args:
+            uri: Resource URI.
+
+        Returns:
+            Text of the first content item.
+        """
+        pooled = await self._acquire()
+        with tracer.start_as_current_span(f"resources/read {uri}", kind=SpanKind.CLIENT) as span:
+            span.set_attribute("mcp.method.name", "resources/read")
+            meta = {**correlation_meta(), **trace_meta()}
+            # ClientSession.read_resource() has no _meta argument, so build the request
+            params = types.ReadResourceRequestParams(uri=uri, _meta=meta or None)
+            result = await pooled.session.send_request(
+                types.ClientRequest(types.ReadResourceRequest(params=params)), types.ReadResourceResult
+            )
+        return result.contents[0].text
+
+    @property
+    def tools_version(self):
+        """Fingerprint of the tool schemas currently served, or None before loading."""
+        if self._tool_schemas is None:
+            return None
+        return tools_fingerprint(self._tool_schemas)
+
+    async def get_tools(self):
+        """
+        Summary:
+            Return the server's tools, routed to the pooled sessions.
+
+        The first call takes the schemas from the on-disk tool cache when it
+        holds an entry for this server's fingerprint and refreshes them in the
+        background; otherwise it lists them through a pooled session. Later
+        calls return the tools already built.
+
+        Returns:
+            LangChain tools whose calls are routed to the pooled sessions.
+            The client's own interceptors still wrap every call.
+        """
+        if self._tools is None:
+            cached = None
+            if self.tool_cache is not None:
+                cached = self.tool_cache.load(self.server_name, self._server_key())
+            if cached is not None:
+                logger.info(f"Loaded {len(cached)} tool schema(s) for '{self.server_name}' from cache")
+                self._set_tool_schemas(cached)
+                self._refresh_task = asyncio.create_task(
+                    self._background_refresh(), name=f"mcp-tool-refresh-{self.server_name}"
+                )
+            else:
+                await self.refresh_tools()
+        return list(self._tools)
+
+    async def refresh_tools(self) -> bool:
+        """
+        Summary:
+            List the server's tools through a pooled session and update the
+            in-memory tools and the on-disk cache when they changed.
+
+        Returns:
+            True if the schemas differ from the ones previously served.
+        """
+        pooled = await self._acquire()
+        schemas = []
+        cursor = None
+        while True:
+            page = await pooled.session.list_tools(cursor=cursor)
+            schemas.extend(page.tools)
+            cursor = page.nextCursor
+            if not cursor:
+                break
+
+        changed = self.tools_version != tools_fingerprint(schemas)
+        if changed:
+            if self._tool_schemas is not None:
+                logger.info(f"Tool schemas for '{self.server_name}' changed, rebuilding tools")
+            self._set_tool_schemas(schemas)
+        if changed and self.tool_cache is not None:
+            self.tool_cache.save(self.server_name, self._server_key(), schemas)
+        return changed
+
+    async def _background_refresh(self):
+        """Refresh cached tool schemas without failing the caller."""
+        try:
+            await self.refresh_tools()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Background tool refresh for '{self.server_name}' failed")
+
+    def _server_key(self) -> str:
+        """Fingerprint of this server's connection used as the tool cache key."""
+        return server_fingerprint(self.client.connections[self.server_name])
+
+    def _set_tool_schemas(self, schemas):
+        """Build LangChain tools for the given MCP tool definitions."""
+        connection = self.client.connections[self.server_name]
+        self._tool_schemas = schemas
+        self._tools = [
+            convert_mcp_tool_to_langchain_tool(
+                None,
+                tool,
+                connection=connection,
+                callbacks=self.client.callbacks,
+                tool_interceptors=[*self.client.tool_interceptors, self],
+                server_name=self.server_name,
+                tool_name_prefix=self.client.tool_name_prefix,
+                handle_tool_errors=self.client.handle_tool_errors,
+            )
+            for tool in schemas
+        ]
+
+    async def _health_loop(self):
+        """Ping every session periodically and restart the ones that fail."""
+        while True:
+            await asyncio.sleep(self.health_check_interval_s)
+            for pooled in self._sessions:
+                session = pooled.session
+                try:
+                    if not pooled.alive:
+                        raise RuntimeError("session closed")
+                    await pooled.ping(self.health_check_timeout_s)
+                except Exception as e:
+                    logger.warning(f"MCP session health check failed ({e!r}), restarting")
+                    try:
+                        await pooled.restart(failed=session)
+                    except Exception:
+                        logger.exception("Failed to restart MCP session")
+
+    async def close(self):
+        """Stop the background tasks and close every pooled session."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        restarts = list(self._restart_tasks.values())
+        for task in restarts:
+            task.cancel()
+        await asyncio.gather(*restarts, return_exceptions=True)
+        await asyncio.gather(*(pooled.close() for pooled in self._sessions), return_exceptions=True)
+        if self._sessions:
+            logger.info(f"Closed persistent MCP sessions for '{self.server_name}'")
+        self._sessions = []
+        self._next = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,275 @@
+"""
+Server Metrics Module
+
+Summary:
+This module keeps in-process counters and latency histograms for the MCP
+server and renders them as a dict or in the Prometheus text format.
+
+Description:
+- Counter counts events per label set (for example tool and status).
+- Histogram records observations in fixed log-spaced buckets, each 10%
+  wider than the one before, from 1 µs to about 10 minutes. Recording is a
+  binary search and an increment under a lock, and the memory per series
+  is constant. p50/p95/p99 are interpolated within their bucket, so they
+  are accurate to a few percent; min, max, sum and count are exact.
+- MetricsRegistry holds the named metrics. snapshot() returns plain data
+  for the server_stats tool, prometheus_text() the text exposition format,
+  where histograms are rendered as summaries (quantiles, _sum and _count)
+  to keep the output small.
+- Metrics are per process and cover the time since it started; with
+  several HTTP workers every worker keeps its own.
+
+Observations are safe from any thread, so database functions running on
+the executor threads can record them directly.
+"""
+
+import bisect
+import math
+import threading
+import time
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Upper bounds of the histogram buckets: 1e-3 * 1.1**i, up to about 6e5
+BUCKET_BOUNDS = [1e-3 * 1.1 ** i for i in range(212)]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs) -> str:
+    """Render (name, value) pairs as a Prometheus label set."""
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    """Render a sample value, spelling NaN and infinity the Prometheus way."""
+    if value is None or math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _CounterSeries:
+    """Count of one label set."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+
+def _bucket_quantile(q, buckets, count, low, high):
+    """Estimate the q-quantile (0..1) of bucket counts, or None if there are none."""
+    if not count:
+        return None
+    rank = q * count
+    seen = 0
+    for index, bucket_count in enumerate(buckets):
+        if not bucket_count or seen + bucket_count < rank:
+            seen += bucket_count
+            continue
+        lower = BUCKET_BOUNDS[index - 1] if index else 0.0
+        upper = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else high
+        # Linear interpolation within the bucket, clamped to what was observed
+        value = lower + (upper - lower) * (rank - seen) / bucket_count
+        return min(max(value, low), high)
+    return high
+
+
+class _HistogramSeries:
+    """Bucketed observations of one label set."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(BUCKET_BOUNDS, value)
+        with self._lock:
+            self.buckets[index] += 1
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def snapshot(self) -> dict:
+        """
+        Summary:
+            Read the series under its lock, so every figure covers the same
+            observations.
+
+        Returns:
+            Dictionary with count, sum, min, max and the QUANTILES keyed by q
+            (min, max and the quantiles are None before the first observation).
+        """
+        with self._lock:
+            buckets, count, total, low, high = list(self.buckets), self.count, self.sum, self.min, self.max
+        return {
+            "count": count,
+            "sum": total,
+            "min": low if count else None,
+            "max": high if count else None,
+            "quantiles": {q: _bucket_quantile(q, buckets, count, low, high) for q in QUANTILES},
+        }
+
+    def quantile(self, q: float):
+        """Estimate the q-quantile (0..1), or None before the first observation."""
+        with self._lock:
+            buckets, count, low, high = list(self.buckets), self.count, self.min, self.max
+        return _bucket_quantile(q, buckets, count, low, high)
+
+    def summary(self) -> dict:
+        """Return count, mean, min, max and the QUANTILES of the series."""
+        snapshot = self.snapshot()
+        count = snapshot["count"]
+        summary = {"count": count}
+        if count:
+            summary.update(
+                mean=round(snapshot["sum"] / count, 3),
+                min=round(snapshot["min"], 3),
+                max=round(snapshot["max"], 3),
+                **{f"p{round(q * 100)}": round(value, 3) for q, value in snapshot["quantiles"].items()},
+            )
+        return summary
+
+
+class _Metric:
+    """Named metric with one series per label value tuple."""
+
+    series_type = None
+    prometheus_type = None
+
+    def __init__(self, name: str, description: str, label_names=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Return the series for these label values, creating it on first use."""
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}, got {values}")
+            with self._lock:
+                series = self._series.setdefault(values, self.series_type())
+        return series
+
+    def items(self):
+        """Return (label values, series) pairs sorted by label values."""
+        # labels() adds series from the executor threads; copy before iterating
+        with self._lock:
+            series = list(self._series.items())
+        return sorted(series)
+
+
+class Counter(_Metric):
+    """Monotonic event counter."""
+
+    series_type = _CounterSeries
+    prometheus_type = "counter"
+
+    def inc(self, *values, amount: int = 1):
+        self.labels(*values).inc(amount)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies in ms, row counts)."""
+
+    series_type = _HistogramSeries
+    prometheus_type = "summary"
+
+    def observe(self, value: float, *values):
+        self.labels(*values).observe(value)
+
+
+class MetricsRegistry:
+    """
+    Summary:
+        Set of named counters and histograms.
+
+    Metrics are created once, usually at import time, and looked up by name
+    when they are rendered.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._metrics = {}
+
+    def _register(self, metric):
+        existing = self._metrics.setdefault(metric.name, metric)
+        if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+            raise ValueError(f"Metric {metric.name} is already registered with other labels")
+        return existing
+
+    def counter(self, name: str, description: str, label_names=()) -> Counter:
+        """Create (or return the existing) counter."""
+        return self._register(Counter(name, description, label_names))
+
+    def histogram(self, name: str, description: str, label_names=()) -> Histogram:
+        """Create (or return the existing) histogram."""
+        return self._register(Histogram(name, description, label_names))
+
+    def get(self, name: str):
+        """Return the metric registered under name, or None."""
+        return self._metrics.get(name)
+
+    def snapshot(self) -> dict:
+        """
+        Summary:
+            Return every metric as plain data.
+
+        Returns:
+            {name: [{"labels": {...}, "value": n}]} for counters and
+            {name: [{"labels": {...}, "count", "mean", "min", "max", "p50",
+            "p95", "p99"}]} for histograms.
+        """
+        snapshot = {}
+        for name, metric in self._metrics.items():
+            rows = []
+            for values, series in metric.items():
+                row = {"labels": dict(zip(metric.label_names, values))}
+                row.update({"value": series.value} if isinstance(metric, Counter) else series.summary())
+                rows.append(row)
+            snapshot[name] = rows
+        return snapshot
+
+    def prometheus_text(self) -> str:
+        """Render every metric in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} {metric.prometheus_type}")
+            for values, series in metric.items():
+                pairs = list(zip(metric.label_names, values))
+                if isinstance(metric, Counter):
+                    lines.append(f"{name}{_format_labels(pairs)} {series.value}")
+                    continue
+                snapshot = series.snapshot()
+                for q, value in snapshot["quantiles"].items():
+                    lines.append(f"{name}{_format_labels(pairs + [('quantile', q)])} {_format_value(value)}")
+                lines.append(f"{name}_sum{_format_labels(pairs)} {_format_value(snapshot['sum'])}")
+                lines.append(f"{name}_count{_format_labels(pairs)} {snapshot['count']}")
+        lines.append("# HELP process_uptime_seconds Seconds since the metrics registry was created")
+        lines.append("# TYPE process_uptime_seconds gauge")
+        lines.append(f"process_uptime_seconds {_format_value(time.time() - self.started)}")
+        return "\n".join(lines) + "\n"
+
+
+# Registry shared by the server modules (mcp_server.py, database.py)
+registry = MetricsRegistry()
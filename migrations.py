@@ -0,0 +1,183 @@
+"""
+Schema Migrations Module
+
+Summary:
+This module owns the trip budget database schema and upgrades it in place.
+
+Description:
+- Records the schema version in PRAGMA user_version.
+- Applies only the migrations newer than the stored version, in order,
+  each in its own transaction together with its version bump.
+- Is run lazily by database.get_pool() the first time a process touches
+  the database; when the schema is current this costs a single PRAGMA read.
+- Can also be run once as a deployment step: python migrations.py
+
+Migrations are append-only. Never edit one that has shipped; add a new one.
+Statements use IF NOT EXISTS so databases created before versioning
+(user_version 0) upgrade cleanly.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+MIGRATIONS = [
+    (
+        1,
+        "Create trip_expenses table",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS trip_expenses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                category TEXT,
+                amount INTEGER,
+                description TEXT,
+                created_at TEXT
+            )
+            """,
+        ],
+    ),
+    (
+        2,
+        "Add indexes for category totals, created_at ranges and keyset paging",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_trip_expenses_category_amount "
+            "ON trip_expenses (category, amount)",
+            "CREATE INDEX IF NOT EXISTS idx_trip_expenses_created_at "
+            "ON trip_expenses (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_trip_expenses_category_id "
+            "ON trip_expenses (category, id)",
+        ],
+    ),
+    (
+        3,
+        "Add budget_totals rollup, its insert trigger and backfill it",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS budget_totals (
+                category TEXT PRIMARY KEY,
+                subtotal INTEGER NOT NULL DEFAULT 0,
+                item_count INTEGER NOT NULL DEFAULT 0,
+                first_id INTEGER NOT NULL
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_trip_expenses_budget_totals
+            AFTER INSERT ON trip_expenses
+            BEGIN
+                INSERT INTO budget_totals (category, subtotal, item_count, first_id)
+                VALUES (NEW.category, NEW.amount, 1, NEW.id)
+                ON CONFLICT (category) DO UPDATE SET
+                    subtotal = subtotal + excluded.subtotal,
+                    item_count = item_count + 1;
+            END
+            """,
+            "DELETE FROM budget_totals",
+            """
+            INSERT INTO budget_totals (category, subtotal, item_count, first_id)
+            SELECT category, SUM(amount), COUNT(*), MIN(id)
+            FROM trip_expenses
+            GROUP BY category
+            """,
+        ],
+    ),
+    (
+        4,
+        "Add budget_state version counter bumped on every expense insert",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS budget_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+            """,
+            "INSERT OR IGNORE INTO budget_state (id, version) VALUES (1, 0)",
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_trip_expenses_budget_state
+            AFTER INSERT ON trip_expenses
+            BEGIN
+                UPDATE budget_state SET version = version + 1 WHERE id = 1;
+            END
+            """,
+        ],
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn) -> int:
+    """Return the schema version stored in PRAGMA user_version."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn) -> int:
+    """
+    Summary:
+        Apply every pending migration on the given connection.
+
+    Args:
+        conn: sqlite3.Connection with no open transaction.
+
+    Returns:
+        Number of migrations applied.
+    """
+    current = get_schema_version(conn)
+    applied = 0
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        # Another process may have applied it while we waited for the lock
+        if get_schema_version(conn) >= version:
+            conn.rollback()
+            continue
+
+        logger.info(f"Applying migration {version}: {description}")
+        try:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.exception(f"Migration {version} failed")
+            raise
+        applied += 1
+
+    if applied:
+        logger.info(f"Database schema migrated to version {LATEST_VERSION}")
+    return applied
+
+
+def ensure_schema(pool):
+    """
+    Summary:
+        Bring the database behind a connection strategy up to the latest schema.
+
+    Reads the schema version first so an up-to-date database never takes
+    the write lock.
+
+    Args:
+        pool: database.ConnectionPool or database.DirectConnections.
+    """
+    with pool.reader() as conn:
+        if get_schema_version(conn) >= LATEST_VERSION:
+            return
+
+    with pool.writer() as conn:
+        # BEGIN IMMEDIATE in migrate() needs autocommit state
+        conn.commit()
+        migrate(conn)
+
+
+if __name__ == "__main__":
+    import database
+
+    logging.basicConfig(level=logging.INFO)
+    pool = database.get_pool()
+    with pool.reader() as conn:
+        print(f"Schema version: {get_schema_version(conn)} (latest {LATEST_VERSION})")
+    database.close_pool()
@@ -0,0 +1,270 @@
+"""
+Chat Model Backends Module
+
+Summary:
+This module builds the chat model the agent runs on, selected by
+LLM_BACKEND in config.py.
+
+Description:
+- "gemini" (default): Google Gemini through ChatGoogleGenerativeAI.
+- "scripted": ScriptedChatModel, a local, deterministic stand-in that
+  needs no network or API key. It turns our typical queries into the
+  tool calls Gemini would make and summarizes the tool results, so the
+  whole agent -> MCP -> SQLite pipeline can be run and benchmarked in CI.
+- "scripted-http": ScriptedEndpointChatModel, the scripted model behind an
+  HTTP endpoint (SCRIPTED_MODEL_URL). Every call waits for the endpoint,
+  which can inject delays and 429s (benchmarks/fake_llm_endpoint.py), so
+  rate limiting and retries can be exercised offline.
+
+The scripted model understands the phrasings recognised by fast_router.py,
+several of them joined with "and" / "," / ";", plus a few read and reset
+requests. Anything else gets a clarification reply without tool calls.
+When streamed, text replies arrive word by word after the simulated latency.
+"""
+
+import asyncio
+import re
+import time
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from config import (
+    GEMINI_MODEL,
+    LLM_BACKEND,
+    LLM_RATE_LIMIT_ENABLED,
+    SCRIPTED_MODEL_LATENCY_MS,
+    SCRIPTED_MODEL_URL,
+)
+from fast_router import format_tool_reply, match_route, message_text, normalize_query
+
+# Requests the fast path does not take but the scripted model should still call tools for
+EXTRA_ROUTES = [
+    (re.compile(r"(?:please )?(?:clear|reset|delete)(?: all)?(?: my| the)? (?:expenses|budget)"), "clear_all_expenses", {}),
+    (re.compile(r"(?:please )?(?:list|show)(?: me)?(?: all)?(?: my| the)? expenses"), "list_expenses", {}),
+    (re.compile(r"(?:please )?(?:get|show)(?: me)?(?: the| my)? expense summary"), "get_expense_summary", {}),
+]
+
+CLAUSE_SEPARATOR = re.compile(r"\s*(?:,|;|\band\b|\balso\b|\bthen\b)\s*")
+
+CLARIFICATION_REPLY = (
+    "Could you tell me which expense to calculate? For example: "
+    "\"Calculate hotel cost for 4 nights at 2000 rupees per night\"."
+)
+
+
+def script_tool_calls(text: str):
+    """
+    Summary:
+        Derive the tool calls for a user query, one per recognised clause.
+
+    Args:
+        text: User query.
+
+    Returns:
+        List of (tool_name, args) tuples; empty when any clause is not understood.
+    """
+    calls = []
+    for clause in CLAUSE_SEPARATOR.split(normalize_query(text)):
+        if not clause:
+            continue
+        route = match_route(clause)
+        if route is None:
+            route = next(
+                ((name, dict(args)) for pattern, name, args in EXTRA_ROUTES if pattern.fullmatch(clause)),
+                None,
+            )
+        if route is None:
+            return []
+        calls.append(route)
+    return calls
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Summary:
+        Deterministic offline chat model that emits tool calls for our queries.
+
+    Args:
+        latency_ms: Simulated time per model call, to mimic a remote model.
+    """
+
+    latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        """Record the available tool names; calls for other tools are never emitted."""
+        names = [tool["name"] if isinstance(tool, dict) else tool.name for tool in tools]
+        return self.bind(tool_names=names)
+
+    def _respond(self, messages, tool_names=None) -> AIMessage:
+        """Build the next AI message for the conversation so far."""
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            # Summarize every tool result of the latest turn
+            results = []
+            for message in reversed(messages):
+                if not isinstance(message, ToolMessage):
+                    break
+                results.append(message)
+            replies = [
+                format_tool_reply(message.name, message_text(message)) or message_text(message)
+                for message in reversed(results)
+            ]
+            return AIMessage(content="\n\n".join(replies))
+
+        query = next((message_text(m) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        calls = script_tool_calls(query)
+        if tool_names is not None and any(name not in tool_names for name, _ in calls):
+            calls = []
+        if not calls:
+            return AIMessage(content=CLARIFICATION_REPLY)
+
+        turn = sum(isinstance(m, AIMessage) for m in messages)
+        return AIMessage(
+            content="",
+            tool_calls=[
+                {"name": name, "args": args, "id": f"scripted_{turn}_{i}", "type": "tool_call"}
+                for i, (name, args) in enumerate(calls)
+            ],
+        )
+
+    def _result(self, messages, tool_names) -> ChatResult:
+        message = self._respond(messages, tool_names)
+        # Rough token counts (4 characters per token) so usage logging has data
+        input_tokens = sum(len(message_text(m)) for m in messages) // 4
+        output_tokens = max(1, len(message_text(message)) // 4)
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, tool_names=None, **kwargs) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return self._result(messages, tool_names)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tool_names=None, **kwargs) -> ChatResult:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return self._result(messages, tool_names)
+
+    async def _astream(self, messages, stop=None, run_manager=None, tool_names=None, **kwargs):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        message = self._result(messages, tool_names).generations[0].message
+        if message.tool_calls:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="", tool_calls=message.tool_calls, usage_metadata=message.usage_metadata
+                )
+            )
+            return
+
+        pieces = re.findall(r"\S+\s*|\s+", message.content)
+        for i, piece in enumerate(pieces):
+            last = i == len(pieces) - 1
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content=piece, usage_metadata=message.usage_metadata if last else None)
+            )
+            # Let the consumer render each piece before the next one
+            await asyncio.sleep(0)
+
+
+class ModelEndpointError(Exception):
+    """
+    Summary:
+        Non-success reply from the scripted model's HTTP endpoint.
+
+    Args:
+        status_code: HTTP status of the reply.
+        retry_after: Seconds from the Retry-After header, if any.
+    """
+
+    def __init__(self, status_code: int, retry_after=None):
+        super().__init__(f"Model endpoint returned HTTP {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class ScriptedEndpointChatModel(ScriptedChatModel):
+    """
+    Summary:
+        Scripted chat model that calls an HTTP endpoint before each reply,
+        so it gets the endpoint's latency, rate limits and errors.
+
+    Args:
+        endpoint_url: Base URL of the endpoint; POST {endpoint_url}/v1/generate.
+    """
+
+    endpoint_url: str = SCRIPTED_MODEL_URL
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-http"
+
+    def _request(self, messages):
+        return {
+            "url": f"{self.endpoint_url.rstrip('/')}/v1/generate",
+            "json": {"input_chars": sum(len(message_text(m)) for m in messages)},
+        }
+
+    @staticmethod
+    def _check(response):
+        if response.status_code != 200:
+            retry_after = response.headers.get("retry-after")
+            raise ModelEndpointError(response.status_code, float(retry_after) if retry_after else None)
+
+    def _generate(self, messages, stop=None, run_manager=None, tool_names=None, **kwargs) -> ChatResult:
+        self._check(httpx.post(**self._request(messages)))
+        return super()._generate(messages, stop, run_manager, tool_names, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tool_names=None, **kwargs) -> ChatResult:
+        async with httpx.AsyncClient() as client:
+            self._check(await client.post(**self._request(messages)))
+        return await super()._agenerate(messages, stop, run_manager, tool_names, **kwargs)
+
+    async def _astream(self, messages, stop=None, run_manager=None, tool_names=None, **kwargs):
+        async with httpx.AsyncClient() as client:
+            self._check(await client.post(**self._request(messages)))
+        async for chunk in super()._astream(messages, stop, run_manager, tool_names, **kwargs):
+            yield chunk
+
+
+def create_chat_model(backend: str = LLM_BACKEND):
+    """
+    Summary:
+        Build the chat model for the configured backend.
+
+    Args:
+        backend: "gemini", "scripted" or "scripted-http".
+
+    Returns:
+        LangChain chat model.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        from cred import GEMINI_API_KEY
+
+        return ChatGoogleGenerativeAI(
+            model=GEMINI_MODEL,
+            api_key=GEMINI_API_KEY,
+            # rate_limit.py retries with backoff; SDK retries would multiply them
+            max_retries=1 if LLM_RATE_LIMIT_ENABLED else 6,
+        )
+    if backend == "scripted":
+        return ScriptedChatModel(latency_ms=SCRIPTED_MODEL_LATENCY_MS)
+    if backend == "scripted-http":
+        return ScriptedEndpointChatModel(latency_ms=SCRIPTED_MODEL_LATENCY_MS)
+    raise ValueError(f"Unknown LLM_BACKEND '{backend}'. Use 'gemini', 'scripted' or 'scripted-http'.")
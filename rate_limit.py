@@ -0,0 +1,358 @@
+"""
+Model Rate Limiting Module
+
+Summary:
+This module throttles, retries and coalesces the agent's model calls so
+bursts of queries do not run into provider rate limits.
+
+Description:
+- TokenBucket limits model calls per minute and estimated input tokens
+  per minute (the two quotas Gemini enforces).
+- AdaptiveConcurrency caps the model calls in flight and adjusts the cap
+  from what it observes: it is halved on a rate limit (429), an overload
+  (503) or a timeout, lowered when calls are slower than the latency
+  target and raised by one slot per window of healthy calls (AIMD).
+- ModelRateLimiter retries rate limits, overloads and timeouts with
+  exponential backoff and full jitter, honouring a Retry-After hint when
+  the error carries one. Other errors are raised at once.
+- Identical model calls in flight at the same time (same model, system
+  prompt, tools and conversation) are coalesced into one provider call.
+- ModelRateLimitMiddleware applies one shared limiter to every model call
+  of every agent in the process.
+
+Limits are per process; with several agent processes, divide the
+provider quota between them.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+from langchain.agents.middleware import AgentMiddleware
+
+from context_budget import estimate_tokens, message_tokens, tool_schema_tokens
+from fast_router import message_text
+from llm_cache import model_id, normalize_message
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+RATE_LIMITED = "rate_limited"
+OVERLOADED = "overloaded"
+TIMED_OUT = "timed_out"
+
+RETRYABLE_STATUS = {429: RATE_LIMITED, 500: OVERLOADED, 502: OVERLOADED, 503: OVERLOADED, 504: TIMED_OUT}
+RETRYABLE_NAMES = {
+    "ResourceExhausted": RATE_LIMITED,
+    "TooManyRequests": RATE_LIMITED,
+    "RateLimitError": RATE_LIMITED,
+    "ServiceUnavailable": OVERLOADED,
+    "InternalServerError": OVERLOADED,
+    "DeadlineExceeded": TIMED_OUT,
+}
+
+
+def classify_error(error):
+    """
+    Summary:
+        Decide whether a model call error is worth retrying.
+
+    Looks at the error and its causes for an HTTP status (code,
+    status_code or response.status_code), a known exception name or a
+    timeout.
+
+    Returns:
+        RATE_LIMITED, OVERLOADED or TIMED_OUT, or None if the error is final.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+            return TIMED_OUT
+        for status in (
+            getattr(error, "status_code", None),
+            getattr(error, "code", None),
+            getattr(getattr(error, "response", None), "status_code", None),
+        ):
+            if isinstance(status, int) and status in RETRYABLE_STATUS:
+                return RETRYABLE_STATUS[status]
+        for cls in type(error).__mro__:
+            if cls.__name__ in RETRYABLE_NAMES:
+                return RETRYABLE_NAMES[cls.__name__]
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def retry_after(error):
+    """Return the Retry-After delay in seconds carried by an error, or None."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        value = getattr(error, "retry_after", None)
+        if value is None:
+            headers = getattr(getattr(error, "response", None), "headers", None) or {}
+            value = headers.get("retry-after") if hasattr(headers, "get") else None
+        try:
+            if value is not None:
+                return max(0.0, float(value))
+        except (TypeError, ValueError):
+            pass
+        error = error.__cause__ or error.__context__
+    return None
+
+
+class TokenBucket:
+    """
+    Summary:
+        Token bucket refilled continuously at rate tokens per second.
+
+    Waiters are served in arrival order.
+
+    Args:
+        rate: Tokens added per second.
+        capacity: Maximum burst size.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Take amount tokens, waiting until they are available; returns the seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class AdaptiveConcurrency:
+    """
+    Summary:
+        Concurrency cap adjusted with additive increase and multiplicative
+        decrease from observed errors and latency.
+
+    Args:
+        max_limit: Starting and maximum number of calls in flight.
+        min_limit: Lowest cap the limiter backs off to.
+        target_latency_s: Calls slower than this lower the cap (0 disables).
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, target_latency_s: float = 0.0):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.target_latency_s = target_latency_s
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        """Wait for a free slot under the current cap and take it."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, overloaded: bool, latency_s: float):
+        """Give the slot back and adjust the cap from the call's outcome."""
+        async with self._condition:
+            self.in_flight -= 1
+            if overloaded:
+                self.limit = max(self.min_limit, self.limit / 2)
+            elif self.target_latency_s and latency_s > self.target_latency_s:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class ModelRateLimiter:
+    """
+    Summary:
+        Shared limiter for model calls: request and token buckets, adaptive
+        concurrency, retries with jittered backoff and coalescing.
+
+    Args:
+        requests_per_min: Model calls allowed per minute (0 disables).
+        tokens_per_min: Estimated input tokens allowed per minute (0 disables).
+        max_concurrency: Starting and maximum model calls in flight.
+        min_concurrency: Lowest concurrency cap after backing off.
+        max_retries: Retries of a rate-limited, overloaded or timed-out call.
+        backoff_base_s: Backoff cap of the first retry; doubles per retry.
+        backoff_max_s: Largest backoff cap.
+        timeout_s: Per-attempt timeout in seconds (0 disables).
+        target_latency_s: Latency above which concurrency is lowered (0 disables).
+    """
+
+    def __init__(
+        self,
+        requests_per_min: float = 0,
+        tokens_per_min: float = 0,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_retries: int = 4,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 20.0,
+        timeout_s: float = 60.0,
+        target_latency_s: float = 0.0,
+    ):
+        self.request_bucket = (
+            TokenBucket(requests_per_min / 60, max(1.0, requests_per_min / 60)) if requests_per_min > 0 else None
+        )
+        self.token_bucket = TokenBucket(tokens_per_min / 60, tokens_per_min) if tokens_per_min > 0 else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency, min_concurrency, target_latency_s)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.timeout_s = timeout_s
+        self._in_flight = {}
+
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.errors = {RATE_LIMITED: 0, OVERLOADED: 0, TIMED_OUT: 0}
+        self.throttled_s = 0.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry (0-based)."""
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+
+    async def call(self, func, key=None, tokens: int = 0):
+        """
+        Summary:
+            Run one model call under the limits.
+
+        Args:
+            func: Zero-argument coroutine function making the call; called
+                again for every retry.
+            key: Coalescing key; calls with the same key in flight at the
+                same time share one result (None disables coalescing).
+            tokens: Estimated input tokens, charged to the token bucket.
+
+        Returns:
+            The call's result.
+
+        Raises:
+            Exception: The last error, once it is final or retries run out.
+        """
+        self.calls += 1
+        if key is None:
+            return await self._call_with_retries(func, tokens)
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug("Coalesced identical in-flight model call")
+        else:
+            task = asyncio.ensure_future(self._call_with_retries(func, tokens))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded so one caller giving up does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def _call_with_retries(self, func, tokens):
+        for attempt in range(self.max_retries + 1):
+            throttle_start = time.perf_counter()
+            if self.request_bucket is not None:
+                await self.request_bucket.acquire(1)
+            if self.token_bucket is not None and tokens:
+                await self.token_bucket.acquire(tokens)
+            await self.concurrency.acquire()
+            self.throttled_s += time.perf_counter() - throttle_start
+
+            self.attempts += 1
+            start = time.perf_counter()
+            try:
+                if self.timeout_s:
+                    result = await asyncio.wait_for(func(), self.timeout_s)
+                else:
+                    result = await func()
+            except Exception as e:
+                kind = classify_error(e)
+                await self.concurrency.release(kind is not None, time.perf_counter() - start)
+                if kind is None:
+                    self.failures += 1
+                    raise
+                self.errors[kind] += 1
+                if attempt == self.max_retries:
+                    self.failures += 1
+                    logger.error(f"Model call {kind} after {attempt + 1} attempt(s), giving up")
+                    raise
+                delay = retry_after(e)
+                delay = min(delay, self.backoff_max_s) if delay is not None else self.backoff(attempt)
+                self.retries += 1
+                logger.warning(
+                    f"Model call {kind}, retry {attempt + 1}/{self.max_retries} in {delay:.2f} s "
+                    f"(concurrency limit {int(self.concurrency.limit)})"
+                )
+                await asyncio.sleep(delay)
+                continue
+            await self.concurrency.release(False, time.perf_counter() - start)
+            return result
+
+    def stats(self) -> dict:
+        """Return call, retry, coalescing and error counters and the current limits."""
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            **self.errors,
+            "throttled_s": round(self.throttled_s, 3),
+            "concurrency_limit": int(self.concurrency.limit)
+        }
+
+
+class ModelRateLimitMiddleware(AgentMiddleware):
+    """
+    Summary:
+        Agent middleware that sends every model call through a shared
+        ModelRateLimiter.
+
+    Args:
+        limiter: The process-wide ModelRateLimiter.
+    """
+
+    def __init__(self, limiter):
+        super().__init__()
+        self.limiter = limiter
+        self._tool_tokens = {}
+
+    def _estimate_tokens(self, request) -> int:
+        names = tuple(tool["name"] if isinstance(tool, dict) else tool.name for tool in request.tools)
+        if names not in self._tool_tokens:
+            self._tool_tokens[names] = tool_schema_tokens(request.tools)
+        system = estimate_tokens(message_text(request.system_message)) if request.system_message else 0
+        return system + self._tool_tokens[names] + sum(message_tokens(m) for m in request.messages)
+
+    @staticmethod
+    def _key(request) -> str:
+        payload = {
+            "model": model_id(request.model),
+            "system": message_text(request.system_message) if request.system_message else None,
+            "tools": sorted(tool["name"] if isinstance(tool, dict) else tool.name for tool in request.tools),
+            "messages": [normalize_message(message) for message in request.messages],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def awrap_model_call(self, request, handler):
+        return await self.limiter.call(
+            lambda: handler(request),
+            key=self._key(request),
+            tokens=self._estimate_tokens(request),
+        )
@@ -0,0 +1,121 @@
+"""
+Tool Response Cache Module
+
+Summary:
+This module memoizes the responses of read-only MCP tools.
+
+Description:
+- Keys each entry on the tool name, its arguments and a database change
+  token (see database.ChangeWatcher), so any insert or clear invalidates
+  every cached response without explicit bookkeeping.
+- Bounds memory with least-recently-used eviction.
+- Counts hits, misses, bypasses and evictions for observability.
+
+A hit costs one dictionary lookup plus the change token read, which runs
+on the database executor like every other query, so repeated summary
+requests skip rebuilding the summary without blocking the event loop.
+"""
+
+import functools
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Summary:
+        Bounded LRU cache of tool responses validated by a change token.
+
+    Args:
+        token_func: Async function returning the current change token, or
+            None when the cache must be bypassed (e.g. writes are still queued).
+        max_entries: Maximum number of cached responses.
+        enabled: When False every call goes straight to the tool.
+    """
+
+    def __init__(self, token_func, max_entries: int = 256, enabled: bool = True):
+        self.token_func = token_func
+        self.max_entries = max(1, max_entries)
+        self.enabled = enabled
+
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    def cached(self, func):
+        """
+        Summary:
+            Decorate an async read-only tool so its responses are memoized.
+
+        Error responses (a dict with status "error" or a string starting with
+        "Error:") are never cached.
+
+        Args:
+            func: Async tool function.
+
+        Returns:
+            Wrapped async function with the same signature.
+        """
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            token = await self.token_func() if self.enabled else None
+            if token is None:
+                self.bypasses += 1
+                return await func(*args, **kwargs)
+
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == token:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            result = await func(*args, **kwargs)
+            if not _is_error(result):
+                # Re-read the token: a write during the call must not be masked
+                if await self.token_func() == token:
+                    self._store(key, token, result)
+            return result
+
+        return wrapper
+
+    def _store(self, key, token, result):
+        """Insert an entry and evict the least recently used ones over the bound."""
+        self._entries[key] = (token, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached response."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return the cache counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+def _is_error(result) -> bool:
+    """Return True for the error shapes the tools return."""
+    if isinstance(result, dict):
+        return result.get("status") == "error"
+    if isinstance(result, str):
+        return result.startswith("Error:")
+    return False
@@ -0,0 +1,59 @@
+"""
+Run Config Propagation Module
+
+Summary:
+This module hands the agent run's callbacks to its model calls on Python
+versions where LangChain cannot do it by itself.
+
+Description:
+- The agent's model node calls the model without a config and relies on
+  the child runnable config context variable, which langgraph only sets
+  for nodes on Python 3.11+ (asyncio tasks accept a context from 3.11 on).
+  On 3.10 model calls therefore run without the run's callbacks, so
+  astream_events reports no on_chat_model_* events and no tokens stream.
+- RunConfigMiddleware picks up the config langgraph injects into its
+  before_model hook, which runs right before every model call of the run,
+  and binds its callbacks for the duration of the model call. It is only
+  installed on Python < 3.11 (see agent._build_middleware).
+"""
+
+import contextvars
+import sys
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import var_child_runnable_config
+
+# Python versions where langgraph binds the node config itself
+BINDS_NODE_CONFIG = sys.version_info >= (3, 11)
+
+# Config of the run's latest before_model step; the loop runs that step and
+# the model call in the same task, so the model call sees what it set
+_before_model_config = contextvars.ContextVar("before_model_config", default=None)
+
+
+class RunConfigMiddleware(AgentMiddleware):
+    """
+    Summary:
+        Agent middleware that runs every model call with the agent run's
+        callbacks, tags and metadata.
+    """
+
+    async def abefore_model(self, state, runtime, config: RunnableConfig):
+        _before_model_config.set(config)
+        return None
+
+    async def awrap_model_call(self, request, handler):
+        config = _before_model_config.get()
+        if config is None or var_child_runnable_config.get() is not None:
+            return await handler(request)
+        # Only what tracing and streaming need; the step's pregel internals stay out
+        token = var_child_runnable_config.set({
+            "callbacks": config.get("callbacks"),
+            "tags": config.get("tags", []),
+            "metadata": {**config.get("metadata", {}), "langgraph_node": "model"},
+        })
+        try:
+            return await handler(request)
+        finally:
+            var_child_runnable_config.reset(token)
@@ -0,0 +1,116 @@
+"""
+Streaming Turn Module
+
+Summary:
+This module runs one conversational turn through the agent with
+astream_events and renders it in the terminal as it happens.
+
+Description:
+- Prints model tokens as they arrive instead of waiting for the full answer.
+- Shows each MCP tool call when it starts and when it finishes, with its
+  duration.
+- Measures time to first token (the first answer text shown to the user)
+  and total turn latency.
+- Works the same for the agent and for FastPathRouter, which emits the
+  equivalent events for requests it answers directly and wraps the turn
+  in its root tracing span.
+"""
+
+import sys
+import time
+
+from fast_router import message_text
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+PLAIN_TYPES = (str, int, float, bool, list, dict, type(None))
+
+
+def _format_args(args) -> str:
+    """Render the user-facing tool arguments as key=value pairs."""
+    if not isinstance(args, dict):
+        return str(args)
+    # Skip values injected by the agent runtime (state, config, ...)
+    return ", ".join(f"{key}={value!r}" for key, value in args.items() if isinstance(value, PLAIN_TYPES))
+
+
+async def stream_turn(agent, messages, out=None) -> dict:
+    """
+    Summary:
+        Run one turn with astream_events and stream it to the terminal.
+
+    Args:
+        agent: Agent or FastPathRouter.
+        messages: Conversation so far, ending with the new user message.
+        out: Text stream to write to (default sys.stdout).
+
+    Returns:
+        Dictionary with the final "messages" (None if the run produced no
+        result), "ttft_ms" (None if no text was produced), "total_ms" and
+        "tool_calls".
+    """
+    out = out or sys.stdout
+    start = time.perf_counter()
+    ttft_ms = None
+    final_messages = None
+    tool_starts = {}
+    tool_calls = 0
+    at_line_start = True
+
+    def write(text):
+        out.write(text)
+        out.flush()
+
+    async for event in agent.astream_events({"messages": messages}, version="v2"):
+        kind = event["event"]
+
+        if kind == "on_chat_model_stream":
+            text = message_text(event["data"]["chunk"])
+            if not text:
+                continue
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - start) * 1000
+                write("\n🤖 Agent: ")
+            write(text)
+            at_line_start = text.endswith("\n")
+
+        elif kind == "on_tool_start":
+            tool_calls += 1
+            tool_starts[event["run_id"]] = time.perf_counter()
+            if not at_line_start:
+                write("\n")
+            write(f"🔧 {event['name']}({_format_args(event['data'].get('input'))}) ...\n")
+            at_line_start = True
+
+        elif kind == "on_tool_end":
+            started = tool_starts.pop(event["run_id"], None)
+            took = f" in {(time.perf_counter() - started) * 1000:,.0f} ms" if started else ""
+            write(f"   ✅ {event['name']} done{took}\n")
+            at_line_start = True
+
+        elif kind == "on_tool_error":
+            tool_starts.pop(event["run_id"], None)
+            write(f"   ❌ {event['name']} failed: {event['data'].get('error')}\n")
+            at_line_start = True
+
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            output = event["data"].get("output")
+            if isinstance(output, dict) and "messages" in output:
+                final_messages = output["messages"]
+
+    total_ms = (time.perf_counter() - start) * 1000
+    if ttft_ms is None and final_messages:
+        # Model did not stream: show the final answer in one piece; no first token to report
+        write(f"\n🤖 Agent: {message_text(final_messages[-1])}")
+    write("\n")
+
+    first_token = f"{ttft_ms:,.0f} ms" if ttft_ms is not None else "n/a"
+    write(f"   ⏱  first token {first_token} · total {total_ms:,.0f} ms\n")
+    logger.info(f"Turn finished: ttft_ms={ttft_ms}, total_ms={total_ms:.1f}, tool_calls={tool_calls}")
+    return {
+        "messages": final_messages,
+        "ttft_ms": ttft_ms,
+        "total_ms": total_ms,
+        "tool_calls": tool_calls,
+    }
@@ -0,0 +1,204 @@
+"""
+Tool Call Batching Module
+
+Summary:
+This module merges the expense tool calls of one model turn into a single
+add_expenses MCP call.
+
+Description:
+- When a request names several expenses ("food for 5 days, hotel for 4
+  nights and transport for 300 km"), the model emits one food_cost,
+  hotel_cost and transport_cost call per expense. The agent runs them
+  concurrently, but each is still its own MCP round trip and its own
+  database transaction, and the server handles them one after another.
+- ExpenseBatchMiddleware collects those sibling calls as they reach the
+  tool node, sends them as one add_expenses call (one round trip, one
+  transaction on the server) and hands every original call the result of
+  its own item, shaped like the single-expense tool's result.
+- If the batch is rejected (add_expenses stores nothing when any item is
+  invalid) or a sibling does not arrive in time, the calls run one by one
+  as before, so the model still gets per-call errors.
+- A batch that fails at the transport level is not retried, because the
+  server may already have stored it.
+- The add_expenses call runs with the first call's run config, so the
+  run's callbacks (astream_events, tracing) see it as a tool run.
+- Batches are keyed by the agent run as well as the call IDs, which are
+  not unique across runs (the scripted model reuses them, and coalesced
+  model calls hand concurrent runs the same AIMessage).
+"""
+
+import asyncio
+import json
+import uuid
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, ToolMessage
+
+from fast_router import message_text
+from logger_config import setup_logger
+
+logger = setup_logger(__name__)
+
+BATCH_TOOL = "add_expenses"
+
+# Single-expense tool -> add_expenses item category
+BATCHABLE_TOOLS = {
+    "food_cost": "food",
+    "hotel_cost": "hotel",
+    "transport_cost": "transport",
+}
+
+
+class _PendingBatch:
+    """Sibling calls of one model turn waiting to be sent together."""
+
+    def __init__(self, call_ids, state, config):
+        self.call_ids = call_ids
+        # Held so the state's id() in the batch key is not reused while pending
+        self.state = state
+        self.config = config
+        self.unseen = set(call_ids)
+        self.calls = {}
+        self.results = {}
+        self.closed = False
+        self.complete = asyncio.Event()
+
+    def add(self, tool_call):
+        self.calls[tool_call["id"]] = tool_call
+        self.results[tool_call["id"]] = asyncio.get_running_loop().create_future()
+        if len(self.calls) == len(self.call_ids):
+            self.complete.set()
+
+
+def _turn_calls(state, call_id):
+    """Return the batchable tool calls of the AI message that issued call_id."""
+    messages = state.get("messages", []) if isinstance(state, dict) else getattr(state, "messages", [])
+    for message in reversed(messages):
+        if isinstance(message, AIMessage) and any(call["id"] == call_id for call in message.tool_calls):
+            return [call for call in message.tool_calls if call["name"] in BATCHABLE_TOOLS]
+    return []
+
+
+class ExpenseBatchMiddleware(AgentMiddleware):
+    """
+    Summary:
+        Agent middleware that sends the expense tool calls of one model turn
+        as a single add_expenses call.
+
+    Args:
+        batch_tool: The add_expenses LangChain tool.
+        wait_ms: How long the first call of a turn waits for its siblings.
+    """
+
+    def __init__(self, batch_tool, wait_ms: float = 50):
+        super().__init__()
+        self.batch_tool = batch_tool
+        self.wait_s = wait_ms / 1000
+        self._pending = {}
+
+        self.batches = 0
+        self.batched_calls = 0
+        self.fallbacks = 0
+
+    async def awrap_tool_call(self, request, handler):
+        tool_call = request.tool_call
+        if tool_call["name"] not in BATCHABLE_TOOLS:
+            return await handler(request)
+        siblings = _turn_calls(request.state, tool_call["id"])
+        if len(siblings) < 2:
+            return await handler(request)
+
+        # The Send payloads of one model turn share the run's state object
+        call_ids = tuple(call["id"] for call in siblings)
+        key = (id(request.state), call_ids)
+        batch = self._pending.get(key)
+        leader = batch is None
+        if leader:
+            config = request.runtime.config if request.runtime is not None else None
+            batch = self._pending[key] = _PendingBatch(call_ids, request.state, config)
+        batch.unseen.discard(tool_call["id"])
+        if not batch.unseen:
+            del self._pending[key]
+        if batch.closed:
+            # Arrived after the batch was sent
+            return await handler(request)
+        batch.add(tool_call)
+
+        if leader:
+            try:
+                try:
+                    await asyncio.wait_for(batch.complete.wait(), self.wait_s)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Only {len(batch.calls)} of {len(call_ids)} expense calls arrived, batching those")
+                batch.closed = True
+                await self._run(batch)
+            except BaseException:
+                # Never leave the sibling calls waiting on a cancelled leader
+                batch.closed = True
+                self._pending.pop(key, None)
+                for future in batch.results.values():
+                    future.cancel()
+                raise
+
+        message = await batch.results[tool_call["id"]]
+        if message is None:
+            return await handler(request)
+        return message
+
+    async def _run(self, batch):
+        """Send the batch and resolve every call's future (None means run it alone)."""
+        calls = list(batch.calls.values())
+        if len(calls) < 2:
+            self._resolve(batch, {})
+            return
+
+        items = [{"category": BATCHABLE_TOOLS[call["name"]], **call["args"]} for call in calls]
+        try:
+            reply = await self.batch_tool.ainvoke({
+                "type": "tool_call",
+                "name": BATCH_TOOL,
+                "args": {"items": items},
+                "id": f"batch_{uuid.uuid4().hex}",
+            }, batch.config)
+        except Exception as e:
+            logger.exception(f"{BATCH_TOOL} call for {len(calls)} expenses failed")
+            for future in batch.results.values():
+                future.set_exception(e)
+            return
+
+        try:
+            result = json.loads(message_text(reply))
+        except ValueError:
+            result = None
+        if (
+            getattr(reply, "status", None) == "error"
+            or not isinstance(result, dict)
+            or result.get("status") != "success"
+            or len(result.get("items", [])) != len(calls)
+        ):
+            # add_expenses stores nothing unless every item is valid
+            logger.info(f"Expense batch rejected, running {len(calls)} calls individually")
+            self.fallbacks += 1
+            self._resolve(batch, {})
+            return
+
+        self.batches += 1
+        self.batched_calls += len(calls)
+        logger.info(f"Sent {len(calls)} expense calls as one {BATCH_TOOL} call")
+        self._resolve(batch, {
+            call["id"]: ToolMessage(content=json.dumps(item, ensure_ascii=False), name=call["name"], tool_call_id=call["id"])
+            for call, item in zip(calls, result["items"])
+        })
+
+    @staticmethod
+    def _resolve(batch, messages):
+        for call_id, future in batch.results.items():
+            future.set_result(messages.get(call_id))
+
+    def stats(self) -> dict:
+        """Return how many calls were merged and how many batches fell back."""
+        return {
+            "batches": self.batches,
+            "batched_calls": self.batched_calls,
+            "fallbacks": self.fallbacks
+        }
@@ -0,0 +1,134 @@
+"""
+MCP Tool Schema Cache Module
+
+Summary:
+This module persists the tool schemas an MCP server advertises so agents can
+be built without a tools/list round trip.
+
+Description:
+- Stores the MCP Tool definitions (name, description, input schema, ...)
+  of one server as JSON on disk.
+- Keys every entry on a server fingerprint: the connection settings plus,
+  for stdio servers, the contents of the server script. Editing
+  mcp_server.py or pointing at another server invalidates the entry.
+- Anything the fingerprint cannot see (an upgraded HTTP server, schema
+  defaults read from the environment) is caught by the background refresh
+  in MCPSessionManager, which re-lists the tools and rewrites the entry
+  when they changed.
+
+Files are replaced atomically, so a crashed writer never leaves a torn
+cache behind; an unreadable entry is treated as a miss.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from mcp.types import Tool
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk format changes
+CACHE_FORMAT_VERSION = 2
+
+
+def server_fingerprint(connection: dict) -> str:
+    """
+    Summary:
+        Hash what determines a server's tool schemas without contacting it.
+
+    Args:
+        connection: langchain-mcp-adapters connection dict.
+
+    Returns:
+        Hex digest of the connection settings and any local script files.
+    """
+    digest = hashlib.sha256()
+    settings = {key: value for key, value in connection.items() if key not in ("env", "session_kwargs")}
+    digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+
+    if connection.get("transport") == "stdio":
+        cwd = Path(connection.get("cwd") or os.getcwd())
+        for arg in connection.get("args", []):
+            script = cwd / arg
+            if script.suffix == ".py" and script.is_file():
+                digest.update(script.read_bytes())
+    return digest.hexdigest()
+
+
+def tools_fingerprint(tools) -> str:
+    """Hash a list of MCP Tool definitions so schema changes can be detected."""
+    payload = [tool.model_dump(mode="json", exclude_none=True) for tool in tools]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class ToolSchemaCache:
+    """
+    Summary:
+        On-disk cache of MCP tool definitions, one JSON file per server.
+
+    Args:
+        cache_dir: Directory holding the cache files.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+
+    def path_for(self, server_name: str) -> Path:
+        """Return the cache file used for a server."""
+        return self.cache_dir / f"mcp_tools_{server_name}.json"
+
+    def load(self, server_name: str, key: str):
+        """
+        Summary:
+            Read the cached tools of a server.
+
+        Args:
+            server_name: Connection name of the server.
+            key: Expected server fingerprint.
+
+        Returns:
+            List of mcp.types.Tool, or None when there is no valid entry for key.
+        """
+        path = self.path_for(server_name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry.get("format") != CACHE_FORMAT_VERSION or entry.get("key") != key:
+                logger.info(f"Tool cache for '{server_name}' is stale")
+                return None
+            return [Tool.model_validate(tool) for tool in entry["tools"]]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable tool cache {path}: {e!r}")
+            return None
+
+    def save(self, server_name: str, key: str, tools):
+        """
+        Summary:
+            Write a server's tools to disk, replacing any previous entry.
+
+        Args:
+            server_name: Connection name of the server.
+            key: Server fingerprint the tools were listed under.
+            tools: List of mcp.types.Tool.
+        """
+        path = self.path_for(server_name)
+        entry = {
+            "format": CACHE_FORMAT_VERSION,
+            "key": key,
+            # By alias, so _meta (e.g. the operator flag) survives model_validate()
+            "tools": [tool.model_dump(mode="json", exclude_none=True, by_alias=True) for tool in tools],
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, indent=2)
+            os.replace(tmp_path, path)
+            logger.debug("Saved %d tool schema(s) to %s", len(tools), path)
+        except OSError as e:
+            logger.warning(f"Could not write tool cache {path}: {e!r}")
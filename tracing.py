@@ -0,0 +1,106 @@
+"""
+Tracing Module
+
+Summary:
+This module sets up OpenTelemetry tracing for the agent and the MCP server
+and carries the trace context across the MCP boundary.
+
+Description:
+- Instrumentation uses the OpenTelemetry API (tracer below), so spans can
+  go to any OpenTelemetry backend. Without TRACING_ENABLED the API's no-op
+  tracer is used and spans cost next to nothing.
+- setup_tracing() installs an SDK tracer provider that exports finished
+  spans as one JSON object per line, to TRACING_FILE (TRACING_EXPORTER=
+  "file", the default) or to the console ("console"). No collector is
+  needed. The agent and the server append to the same file, each under its
+  own service.name.
+- trace_meta() and extract_trace_context() put the W3C traceparent of the
+  current span into an MCP request's _meta and read it back on the server,
+  so the server's spans join the agent's trace.
+
+This module only depends on the OpenTelemetry API so the MCP server can
+import it without LangChain; the agent's model and tool call spans are in
+agent_tracing.py.
+"""
+
+import atexit
+import logging
+import os
+import sys
+from pathlib import Path
+
+from opentelemetry import propagate, trace
+
+from config import TRACING_ENABLED, TRACING_EXPORTER, TRACING_FILE
+
+logger = logging.getLogger(__name__)
+
+# Spans are created through the global provider installed by setup_tracing()
+tracer = trace.get_tracer("trip_budget")
+
+# Root span of one agent request (FastPathRouter.ainvoke and astream_events)
+AGENT_SPAN = "invoke_agent trip_budget"
+
+_provider = None
+
+
+def setup_tracing(service_name: str, stream=None) -> bool:
+    """
+    Summary:
+        Install the span exporter for this process when TRACING_ENABLED is set.
+
+    Args:
+        service_name: service.name resource attribute of the process's spans.
+        stream: Console exporter stream (default sys.stdout; the stdio MCP
+            server passes sys.stderr).
+
+    Returns:
+        True if spans are exported.
+    """
+    global _provider
+    if _provider is not None or not TRACING_ENABLED:
+        return _provider is not None
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        logger.warning("TRACING_ENABLED is set but opentelemetry-sdk is not installed; spans are not exported")
+        return False
+
+    if TRACING_EXPORTER == "console":
+        out = stream or sys.stdout
+    else:
+        Path(TRACING_FILE).parent.mkdir(parents=True, exist_ok=True)
+        # Line buffered, so each span is one append even with both processes writing
+        out = open(TRACING_FILE, "a", encoding="utf-8", buffering=1)
+    exporter = ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + os.linesep)
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    atexit.register(_provider.shutdown)
+    logger.info(f"Tracing enabled for {service_name}, exporting to {TRACING_EXPORTER}")
+    return True
+
+
+def trace_meta() -> dict:
+    """Return the current trace context as MCP _meta entries ({} when no span is recording)."""
+    carrier = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+def extract_trace_context(meta):
+    """
+    Summary:
+        Read the trace context a client put in an MCP request's _meta.
+
+    Args:
+        meta: The request's _meta fields as a dict, or None.
+
+    Returns:
+        OpenTelemetry context to parent the server's span with.
+    """
+    return propagate.extract(meta or {})